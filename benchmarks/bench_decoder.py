@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+
+# benchmarks the decoder module against the per-field jmespath searches it replaced, using the captured
+# responses in `example_requests_responses`
+#
+# run from the root of the repo with: python -m benchmarks.bench_decoder
+
+import argparse
+
+import jmespath
+
+from leetcode_dl import decoder
+from leetcode_dl.model import SingleLeetcodeProblemCodeSnippet, SingleLeetcodeProblem
+
+from benchmarks import common
+
+# the jmespath expressions the downloader used to use
+JMESPATH_API_PROBLEMS_ALL_SEARCH_QUERY = jmespath.compile("stat_status_pairs")
+JMESPATH_Q_QUESTION_ID = jmespath.compile("stat.question_id")
+JMESPATH_Q_TITLE = jmespath.compile("stat.question__title")
+JMESPATH_Q_SLUG = jmespath.compile("stat.question__title_slug")
+JMESPATH_Q_DIFFICULTY = jmespath.compile("difficulty.level")
+JMESPATH_Q_PAID_ONLY = jmespath.compile("paid_only")
+JMESPATH_Q_IS_NEW_QUESTION = jmespath.compile("stat.is_new_question")
+JMESPATH_Q_CONTENT = jmespath.compile("data.question.content")
+JMESPATH_Q_CODE_SNIPPETS = jmespath.compile("data.question.codeSnippets")
+JMESPATH_Q_CODE_SNIPPET_LANGUAGE = jmespath.compile("lang")
+JMESPATH_Q_CODE_SNIPPET_LANGUAGE_SLUG = jmespath.compile("langSlug")
+JMESPATH_Q_CODE_SNIPPET_CONTENT = jmespath.compile("code")
+
+def jmespath_search_helper(jmespath_compiled_query, dict_to_search, description):
+    jmespath_search_result = jmespath_compiled_query.search(dict_to_search)
+
+    if jmespath_search_result == None:
+        raise Exception(
+            f"jmespath compiled search `{jmespath_compiled_query}` (`{description}`) returned None")
+
+    return jmespath_search_result
+
+def jmespath_decode_api_problems_all_response(response_dict):
+    result_list = []
+    problems_list_result = jmespath_search_helper(JMESPATH_API_PROBLEMS_ALL_SEARCH_QUERY, response_dict, "problems list")
+    for iter_problem_dict in sorted(problems_list_result, key=lambda x: JMESPATH_Q_QUESTION_ID.search(x)):
+        result_list.append(SingleLeetcodeProblem(
+            question_id = jmespath_search_helper(JMESPATH_Q_QUESTION_ID, iter_problem_dict, "single question -> question_id"),
+            title = jmespath_search_helper(JMESPATH_Q_TITLE, iter_problem_dict, "single question -> title").strip(),
+            slug = jmespath_search_helper(JMESPATH_Q_SLUG, iter_problem_dict, "single question -> slug").strip(),
+            difficulty = jmespath_search_helper(JMESPATH_Q_DIFFICULTY, iter_problem_dict, "single question -> difficulty"),
+            paid_only = jmespath_search_helper(JMESPATH_Q_PAID_ONLY, iter_problem_dict, "single question -> paid only"),
+            is_new_question = bool(JMESPATH_Q_IS_NEW_QUESTION.search(iter_problem_dict)),
+            question_content = None,
+            code_snippets = None))
+    return result_list
+
+def jmespath_decode_question_data_response(res_json_dict):
+    question_html = jmespath_search_helper(JMESPATH_Q_CONTENT, res_json_dict, "question data -> content")
+    question_code_snippets = jmespath_search_helper(JMESPATH_Q_CODE_SNIPPETS, res_json_dict, "question data -> code snippets")
+    code_snippet_list = []
+    for iter_code_snippet_dict in question_code_snippets:
+        code_snippet_list.append(SingleLeetcodeProblemCodeSnippet(
+            language = jmespath_search_helper(JMESPATH_Q_CODE_SNIPPET_LANGUAGE,
+                iter_code_snippet_dict, "question data -> code snippet -> language"),
+            language_slug = jmespath_search_helper(JMESPATH_Q_CODE_SNIPPET_LANGUAGE_SLUG,
+                iter_code_snippet_dict, "question data -> code snippet -> language slug"),
+            code_snippet = jmespath_search_helper(JMESPATH_Q_CODE_SNIPPET_CONTENT,
+                iter_code_snippet_dict, "question data -> code snippet -> code")))
+    return question_html, code_snippet_list
+
+def run(parsed_args):
+
+    api_problems_all_dict = common.load_example_response_json(common.API_PROBLEMS_ALL_RESPONSE_PATH)
+    question_data_dict = common.load_example_response_json(common.GRAPHQL_QUESTIONDATA_RESPONSE_PATH)
+
+    # make sure both of them give the same answer before we time anything
+    if jmespath_decode_api_problems_all_response(api_problems_all_dict) != decoder.decode_api_problems_all_response(api_problems_all_dict):
+        raise Exception("the decoder and jmespath disagree about the /api/problems/all response")
+    if jmespath_decode_question_data_response(question_data_dict) != decoder.decode_question_data_response(question_data_dict):
+        raise Exception("the decoder and jmespath disagree about the questionData response")
+
+    benchmark_list = [
+        ("/api/problems/all", jmespath_decode_api_problems_all_response, decoder.decode_api_problems_all_response,
+            api_problems_all_dict, parsed_args.number),
+        ("questionData", jmespath_decode_question_data_response, decoder.decode_question_data_response,
+            question_data_dict, parsed_args.number * 1000),
+    ]
+
+    print(f"{'response':<20} {'jmespath':>14} {'decoder':>14} {'speedup':>8}")
+    for name, jmespath_func, decoder_func, arg, number in benchmark_list:
+        jmespath_seconds = common.time_it(lambda: jmespath_func(arg), parsed_args.repeat, number)
+        decoder_seconds = common.time_it(lambda: decoder_func(arg), parsed_args.repeat, number)
+        print(f"{name:<20} {jmespath_seconds * 1000:>11.3f} ms {decoder_seconds * 1000:>11.3f} ms {jmespath_seconds / decoder_seconds:>7.1f}x")
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(
+        description="benchmarks the decoder against the jmespath searches it replaced")
+    parser.add_argument("--repeat", type=int, default=5, help="how many times to repeat each measurement")
+    parser.add_argument("--number", type=int, default=10, help="how many calls per measurement")
+
+    run(parser.parse_args())
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+
+# benchmarks what logging costs while writing a full catalogue, using the captured responses in
+# `example_requests_responses`, with a normal run's INFO level and with --verbose's DEBUG level, formatting
+# the timestamps through arrow like the formatter used to, with the current formatter, and with the current
+# formatter behind --background-logging's queue
+#
+# `caller` is how long the thread writing the problems took, which is what holds up a sync, and `total` also
+# includes waiting for the background thread to write out the rest of the queue. the log goes to a file in a
+# temporary folder
+#
+# run from the root of the repo with: python -m benchmarks.bench_logging
+
+import argparse
+import logging
+import pathlib
+import tempfile
+import time
+
+from leetcode_dl import utils
+
+from benchmarks import common
+from benchmarks import bench_render
+
+import dl_leetcode_problems
+
+LOG_FORMAT = "%(asctime)s %(threadName)-10s %(name)-10s %(levelname)-8s: %(message)s"
+
+class LegacyArrowLoggingFormatter(logging.Formatter):
+    ''' utils.ArrowLoggingFormatter before it stopped going through arrow
+    '''
+
+    def formatTime(self, record, datefmt=None):
+        import arrow
+
+        return arrow.get(f"{record.created}", "X").to("local").isoformat()
+
+class DiscardingFileWriter:
+    ''' stands in for a ProblemFileWriter, so that only the rendering and the logging get timed
+    '''
+
+    def write_file(self, problem_folder_name, file_name, file_content):
+        pass
+
+def time_formatter(formatter:logging.Formatter, record_list:list, repeat:int) -> float:
+    '''
+    @return the best time per formatTime() call, in seconds
+    '''
+
+    return common.time_it(lambda: [formatter.formatTime(x) for x in record_list], repeat, 1) / len(record_list)
+
+def time_write_catalogue(log_path:pathlib.Path, level:int, formatter:logging.Formatter, background:bool,
+        problem_list:list, language_slug_list:list) -> tuple:
+    ''' writes every problem with write_single_leetcode_problem(), logging to a file
+
+    @return a tuple of the seconds the writing thread took, the seconds until everything was logged, and how
+        many lines were logged
+    '''
+
+    logger = logging.getLogger("bench_logging")
+    logger.propagate = False
+    logger.setLevel(level)
+
+    file_handler = logging.FileHandler(log_path, mode="w", encoding="utf-8")
+    file_handler.setFormatter(formatter)
+    logger.addHandler(file_handler)
+
+    queue_listener = utils.start_background_logging(logger) if background else None
+
+    file_writer = DiscardingFileWriter()
+    non_fatal_error_list = []
+
+    try:
+        start_time = time.perf_counter()
+        for iter_problem in problem_list:
+            dl_leetcode_problems.write_single_leetcode_problem(file_writer, logger, iter_problem,
+                language_slug_list, non_fatal_error_list)
+        caller_seconds = time.perf_counter() - start_time
+
+        if queue_listener:
+            queue_listener.stop()
+            queue_listener = None
+        total_seconds = time.perf_counter() - start_time
+
+    finally:
+        if queue_listener:
+            queue_listener.stop()
+        for iter_handler in list(logger.handlers):
+            logger.removeHandler(iter_handler)
+        file_handler.close()
+
+    with open(log_path, "r", encoding="utf-8") as f:
+        line_count = sum(1 for _ in f)
+
+    return caller_seconds, total_seconds, line_count
+
+def run(parsed_args):
+
+    problem_list, language_slug_list = bench_render.build_catalogue()
+
+    legacy_formatter = LegacyArrowLoggingFormatter(LOG_FORMAT)
+    current_formatter = utils.ArrowLoggingFormatter(LOG_FORMAT)
+
+    # records a few milliseconds apart, like a busy sync logs them
+    now = time.time()
+    record_list = [logging.makeLogRecord({"created": now + x * 0.003}) for x in range(10000)]
+
+    # the same timestamps, down to the microsecond
+    for iter_record in record_list:
+        if legacy_formatter.formatTime(iter_record) != current_formatter.formatTime(iter_record):
+            raise Exception(f"the formatters disagree about `{iter_record.created}`")
+
+    legacy_seconds = time_formatter(legacy_formatter, record_list, parsed_args.repeat)
+    current_seconds = time_formatter(current_formatter, record_list, parsed_args.repeat)
+
+    print(f"formatTime() through arrow: {legacy_seconds * 1e6:.2f} us, current: {current_seconds * 1e6:.2f} us "
+        + f"({legacy_seconds / current_seconds:.0f}x)")
+    print()
+
+    scenario_list = [
+        ("info", logging.INFO, current_formatter, False),
+        ("debug, arrow", logging.DEBUG, legacy_formatter, False),
+        ("debug", logging.DEBUG, current_formatter, False),
+        ("debug, background", logging.DEBUG, current_formatter, True),
+    ]
+
+    print(f"{len(problem_list)} problems x {len(language_slug_list)} languages")
+    print(f"{'logging':<18} {'lines':>7} {'caller':>10} {'total':>10}")
+    with tempfile.TemporaryDirectory() as temp_dir:
+        log_path = pathlib.Path(temp_dir) / "bench_logging.log"
+
+        for scenario_name, level, formatter, background in scenario_list:
+            run_list = [time_write_catalogue(log_path, level, formatter, background, problem_list, language_slug_list)
+                for _ in range(parsed_args.repeat)]
+            caller_seconds, total_seconds, line_count = min(run_list)
+
+            print(f"{scenario_name:<18} {line_count:>7} {caller_seconds * 1000:>7.1f} ms {total_seconds * 1000:>7.1f} ms")
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(
+        description="benchmarks the cost of logging while writing a full catalogue, at INFO and DEBUG levels")
+    parser.add_argument("--repeat", type=int, default=5, help="how many times to repeat each measurement")
+
+    run(parser.parse_args())
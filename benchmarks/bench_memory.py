@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+
+# measures the peak RSS of holding a full catalogue in memory with the slotted, interned model against the
+# plain attrs model (and the extra attr.evolve() copies) it replaced, using the captured responses in
+# `example_requests_responses`
+#
+# every problem in the /api/problems/all response gets its own decode of the captured questionData response,
+# like a real sync where every response is a separate json document, and each variant is built in a fresh
+# interpreter so they don't share any memory
+#
+# run from the root of the repo with: python -m benchmarks.bench_memory
+
+import argparse
+import json
+import resource
+import subprocess
+import sys
+
+import attr
+
+from leetcode_dl import decoder
+
+from benchmarks import common
+
+VARIANT_LEGACY = "legacy"
+VARIANT_CURRENT = "current"
+
+@attr.s(auto_attribs=True)
+class LegacyCodeSnippet:
+    ''' SingleLeetcodeProblemCodeSnippet before it was slotted, and before the strings were shared
+    '''
+
+    language:str = attr.ib()
+    language_slug:str = attr.ib()
+    code_snippet:str = attr.ib()
+
+@attr.s(auto_attribs=True)
+class LegacyProblem:
+    ''' SingleLeetcodeProblem before it was slotted
+    '''
+
+    question_id:int = attr.ib()
+    title:str = attr.ib()
+    slug:str = attr.ib()
+    difficulty:int = attr.ib()
+    paid_only:bool = attr.ib()
+    is_new_question:bool = attr.ib(default=False)
+    question_content:str = attr.ib(default=None)
+    code_snippets:dict = attr.ib(default=None)
+
+def build_catalogue_legacy(api_problems_all_text, question_data_text):
+    ''' builds the catalogue the way it used to be built, the problem gets copied once when the questionData
+    response is parsed and again when the pipeline hands it out
+    '''
+
+    problem_list = [LegacyProblem(**attr.asdict(x, recurse=False))
+        for x in decoder.decode_api_problems_all_response(json.loads(api_problems_all_text))]
+
+    result_dict = dict()
+    for iter_problem in problem_list:
+        question_dict = json.loads(question_data_text)["data"]["question"]
+
+        code_snippet_dict = dict()
+        for iter_snippet_dict in question_dict["codeSnippets"]:
+            code_snippet_dict[iter_snippet_dict["langSlug"]] = LegacyCodeSnippet(
+                language=iter_snippet_dict["lang"],
+                language_slug=iter_snippet_dict["langSlug"],
+                code_snippet=iter_snippet_dict["code"])
+
+        fetched_problem = attr.evolve(iter_problem, question_content=question_dict["content"],
+            code_snippets=code_snippet_dict)
+        result_dict[iter_problem.question_id] = attr.evolve(iter_problem,
+            question_content=fetched_problem.question_content, code_snippets=fetched_problem.code_snippets)
+
+    return result_dict
+
+def build_catalogue_current(api_problems_all_text, question_data_text):
+    ''' builds the catalogue the way the downloader does now
+    '''
+
+    problem_list = decoder.decode_api_problems_all_response(json.loads(api_problems_all_text))
+
+    result_dict = dict()
+    for iter_problem in problem_list:
+        question_html, code_snippet_list = decoder.decode_question_data_response(json.loads(question_data_text))
+        result_dict[iter_problem.question_id] = attr.evolve(iter_problem, question_content=question_html,
+            code_snippets={x.language_slug: x for x in code_snippet_list})
+
+    return result_dict
+
+def get_max_rss_bytes() -> int:
+    # linux reports this in kilobytes
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+def run_variant(variant):
+    ''' builds the catalogue with one variant and prints the result as json, this runs in its own interpreter
+    '''
+
+    api_problems_all_text = common.load_example_response_text(common.API_PROBLEMS_ALL_RESPONSE_PATH)
+    question_data_text = common.load_example_response_text(common.GRAPHQL_QUESTIONDATA_RESPONSE_PATH)
+
+    build_func = build_catalogue_legacy if variant == VARIANT_LEGACY else build_catalogue_current
+
+    baseline_rss_bytes = get_max_rss_bytes()
+    catalogue_dict = build_func(api_problems_all_text, question_data_text)
+    peak_rss_bytes = get_max_rss_bytes()
+
+    print(json.dumps({
+        "problems": len(catalogue_dict),
+        "snippets": sum(len(x.code_snippets) for x in catalogue_dict.values()),
+        "baseline_rss_bytes": baseline_rss_bytes,
+        "peak_rss_bytes": peak_rss_bytes,
+    }))
+
+def measure_variant(variant):
+    completed_process = subprocess.run([sys.executable, "-m", "benchmarks.bench_memory", "--variant", variant],
+        check=True, stdout=subprocess.PIPE)
+    return json.loads(completed_process.stdout)
+
+def run(parsed_args):
+
+    if parsed_args.variant:
+        run_variant(parsed_args.variant)
+        return
+
+    result_list = []
+    for iter_variant in (VARIANT_LEGACY, VARIANT_CURRENT):
+
+        # keep the smallest growth out of a few runs, the allocator isn't completely deterministic
+        measurement_list = [measure_variant(iter_variant) for _ in range(parsed_args.repeat)]
+        result_list.append((iter_variant,
+            min(measurement_list, key=lambda x: x["peak_rss_bytes"] - x["baseline_rss_bytes"])))
+
+    first_result = result_list[0][1]
+    print(f"{first_result['problems']} problems, {first_result['snippets']} code snippets")
+    print(f"{'model':<10} {'peak rss':>12} {'catalogue':>12}")
+    for iter_variant, iter_result in result_list:
+        growth_bytes = iter_result["peak_rss_bytes"] - iter_result["baseline_rss_bytes"]
+        print(f"{iter_variant:<10} {iter_result['peak_rss_bytes'] / 2**20:>9.1f} MB {growth_bytes / 2**20:>9.1f} MB")
+
+    legacy_growth_bytes = result_list[0][1]["peak_rss_bytes"] - result_list[0][1]["baseline_rss_bytes"]
+    current_growth_bytes = result_list[1][1]["peak_rss_bytes"] - result_list[1][1]["baseline_rss_bytes"]
+    print(f"the catalogue takes {(1 - current_growth_bytes / legacy_growth_bytes) * 100:.0f}% less memory")
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(
+        description="measures the peak RSS of a full catalogue with the slotted model against the model it replaced")
+    parser.add_argument("--repeat", type=int, default=3, help="how many times to measure each model")
+    parser.add_argument("--variant", choices=[VARIANT_LEGACY, VARIANT_CURRENT],
+        help="only build the catalogue with this model and print the result as json, used internally")
+
+    run(parser.parse_args())
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+
+# benchmarks decoding the /api/problems/all response a chunk at a time against loading the whole response
+# with json.loads() first, on the captured response in `example_requests_responses` and on a synthetic
+# catalogue made by repeating its problems with new question ids and slugs
+#
+# the memory columns are from tracemalloc: `peak` is the most memory the parse had allocated at once,
+# `kept` is what was still allocated afterwards (the problems themselves), so `peak - kept` is what the
+# parse needed on top of its result
+#
+# run from the root of the repo with: python -m benchmarks.bench_parse_stream
+
+import argparse
+import json
+import tracemalloc
+
+from leetcode_dl import constants
+from leetcode_dl import decoder
+
+from benchmarks import common
+
+def make_synthetic_body(api_problems_all_dict:dict, problem_count:int) -> bytes:
+    ''' builds an /api/problems/all response with `problem_count` problems, by cycling through the captured ones
+
+    @param api_problems_all_dict the captured response
+    @param problem_count how many problems the response should have
+    @return the encoded response body
+    '''
+
+    captured_problem_list = api_problems_all_dict["stat_status_pairs"]
+
+    problem_list = []
+    for iter_index in range(problem_count):
+        iter_problem_dict = json.loads(json.dumps(captured_problem_list[iter_index % len(captured_problem_list)]))
+        iter_problem_dict["stat"]["question_id"] = iter_index + 1
+        iter_problem_dict["stat"]["question__title_slug"] += f"-{iter_index + 1}"
+        problem_list.append(iter_problem_dict)
+
+    # newest first, like the real response
+    problem_list.reverse()
+
+    return json.dumps(dict(api_problems_all_dict, stat_status_pairs=problem_list)).encode("utf-8")
+
+def iter_chunks(body:bytes):
+    for iter_offset in range(0, len(body), constants.API_PROBLEMS_ALL_CHUNK_SIZE):
+        yield body[iter_offset:iter_offset + constants.API_PROBLEMS_ALL_CHUNK_SIZE]
+
+def parse_whole(body:bytes):
+    return decoder.decode_api_problems_all_response(json.loads(body))
+
+def parse_stream(body:bytes):
+    problem_list = list(decoder.iter_decode_api_problems_all_chunks(iter_chunks(body)))
+    problem_list.sort(key=lambda x: x.question_id)
+    return problem_list
+
+def measure_memory(func, body:bytes):
+    '''
+    @return a tuple of the peak and the retained bytes that tracemalloc saw while running `func(body)`
+    '''
+
+    tracemalloc.start()
+    try:
+        result = func(body)
+        kept_bytes, peak_bytes = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    del result
+    return peak_bytes, kept_bytes
+
+def run(parsed_args):
+
+    api_problems_all_text = common.load_example_response_text(common.API_PROBLEMS_ALL_RESPONSE_PATH)
+    api_problems_all_dict = json.loads(api_problems_all_text)
+
+    catalogue_list = [
+        ("fixture", api_problems_all_text.encode("utf-8")),
+        ("synthetic", make_synthetic_body(api_problems_all_dict, parsed_args.synthetic_count)),
+    ]
+
+    print(f"{'catalogue':<10} {'problems':>8} {'size':>9} {'parser':<7} {'time':>10} {'peak':>9} {'kept':>9} {'peak - kept':>12}")
+    for catalogue_name, body in catalogue_list:
+
+        # make sure both of them give the same answer before we time anything
+        whole_result = parse_whole(body)
+        if parse_stream(body) != whole_result:
+            raise Exception(f"the streaming parser and json.loads() disagree about the {catalogue_name} catalogue")
+
+        for parser_name, parser_func in (("whole", parse_whole), ("stream", parse_stream)):
+            seconds = common.time_it(lambda: parser_func(body), parsed_args.repeat, 1)
+            peak_bytes, kept_bytes = measure_memory(parser_func, body)
+
+            print(f"{catalogue_name:<10} {len(whole_result):>8} {len(body) / 2**20:>6.1f} MB {parser_name:<7} "
+                + f"{seconds * 1000:>7.1f} ms {peak_bytes / 2**20:>6.1f} MB {kept_bytes / 2**20:>6.1f} MB "
+                + f"{(peak_bytes - kept_bytes) / 2**20:>9.1f} MB")
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(
+        description="benchmarks the streaming /api/problems/all parser against json.loads() on the whole response")
+    parser.add_argument("--repeat", type=int, default=5, help="how many times to repeat each measurement")
+    parser.add_argument("--synthetic-count", dest="synthetic_count", type=int, default=100000,
+        help="how many problems the synthetic catalogue has")
+
+    run(parser.parse_args())
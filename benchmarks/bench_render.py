@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+
+# benchmarks rendering every file for a full catalogue with the ProblemRenderer against the per-language,
+# per-line StringIO loop it replaced, using the captured responses in `example_requests_responses`
+#
+# every problem in the /api/problems/all response gets the captured question content and code snippets, so
+# this renders (number of problems) x (number of known languages) files
+#
+# run from the root of the repo with: python -m benchmarks.bench_render
+
+import argparse
+import io
+import logging
+
+from leetcode_dl import constants
+from leetcode_dl import decoder
+from leetcode_dl import render
+from leetcode_dl.model import SingleLeetcodeProblem
+
+from benchmarks import common
+
+logger = logging.getLogger(__name__)
+
+def stringio_render_problem_file(leetcode_problem, code_snippet_obj):
+    ''' how a file used to be rendered, one line of the question content at a time, with the logging calls
+    whose arguments got built even when debug logging was off
+    '''
+
+    f = io.StringIO()
+
+    problem_url = f"{constants.LEETCODE_PROBLEM_URL_MINUS_SLUG_END_SLASH}{leetcode_problem.slug}"
+    f.write(f"{code_snippet_obj.get_code_snippet_comment_characters()} {leetcode_problem.title}\n")
+    f.write(f"{code_snippet_obj.get_code_snippet_comment_characters()} {problem_url}\n")
+    f.write(f"{code_snippet_obj.get_code_snippet_comment_characters()}\n")
+
+    question_io = io.StringIO(leetcode_problem.question_content)
+    logger.debug("------ question content: `%s`", leetcode_problem.question_content.encode("utf-8"))
+
+    while (iter_question_line := question_io.readline()):
+        str_to_write = f"{code_snippet_obj.get_code_snippet_comment_characters()} {iter_question_line}"
+        logger.debug("-------- before replacing \\r: `%s`", str_to_write.encode("utf-8"))
+        str_to_write = str_to_write.replace("\r", "")
+        logger.debug("-------- after replacing \\r:  `%s`", str_to_write.encode("utf-8"))
+        logger.debug("-------- writing: `%s`", str_to_write.encode("utf-8"))
+        f.write(str_to_write)
+
+    f.write("\n\n")
+    f.write(code_snippet_obj.code_snippet)
+
+    return f.getvalue()
+
+def build_catalogue():
+    ''' builds a fully populated catalogue, every problem gets the captured question content and snippets
+
+    @return a tuple of the list of SingleLeetcodeProblem objects, and the list of language slugs to render
+    '''
+
+    api_problems_all_dict = common.load_example_response_json(common.API_PROBLEMS_ALL_RESPONSE_PATH)
+    question_data_dict = common.load_example_response_json(common.GRAPHQL_QUESTIONDATA_RESPONSE_PATH)
+
+    # the renderer works on the converted text, but the html has the same shape of lines (and the `\r\n` mix)
+    # and we don't want to time html2text here
+    question_content, code_snippet_list = decoder.decode_question_data_response(question_data_dict)
+    code_snippet_dict = {x.language_slug: x for x in code_snippet_list}
+
+    problem_list = []
+    for iter_problem in decoder.decode_api_problems_all_response(api_problems_all_dict):
+        problem_list.append(SingleLeetcodeProblem(
+            question_id=iter_problem.question_id,
+            title=iter_problem.title,
+            slug=iter_problem.slug,
+            difficulty=iter_problem.difficulty,
+            paid_only=iter_problem.paid_only,
+            question_content=question_content,
+            code_snippets=code_snippet_dict))
+
+    language_slug_list = [x for x in constants.KNOWN_LANGUAGE_SLUG_TO_FILE_EXT_DICT.keys() if x in code_snippet_dict]
+
+    return problem_list, language_slug_list
+
+def render_catalogue_stringio(problem_list, language_slug_list):
+    return [stringio_render_problem_file(iter_problem, iter_problem.get_code_snippet(iter_language_slug))
+        for iter_problem in problem_list
+        for iter_language_slug in language_slug_list]
+
+def render_catalogue_renderer(problem_list, language_slug_list):
+    result_list = []
+    for iter_problem in problem_list:
+        problem_renderer = render.ProblemRenderer(iter_problem)
+        for iter_language_slug in language_slug_list:
+            result_list.append(problem_renderer.render(iter_problem.get_code_snippet(iter_language_slug)))
+    return result_list
+
+def run(parsed_args):
+
+    # the same level a normal (non --verbose) run uses, so the old debug calls are skipped but their arguments aren't
+    logging.basicConfig(level=logging.INFO)
+
+    problem_list, language_slug_list = build_catalogue()
+
+    # make sure both of them give the same answer before we time anything
+    if render_catalogue_stringio(problem_list, language_slug_list) != render_catalogue_renderer(problem_list, language_slug_list):
+        raise Exception("the renderer and the StringIO loop disagree")
+
+    file_count = len(problem_list) * len(language_slug_list)
+
+    stringio_seconds = common.time_it(lambda: render_catalogue_stringio(problem_list, language_slug_list),
+        parsed_args.repeat, parsed_args.number)
+    renderer_seconds = common.time_it(lambda: render_catalogue_renderer(problem_list, language_slug_list),
+        parsed_args.repeat, parsed_args.number)
+
+    print(f"{len(problem_list)} problems x {len(language_slug_list)} languages = {file_count} files")
+    print(f"{'implementation':<20} {'catalogue':>14} {'per file':>14}")
+    print(f"{'stringio loop':<20} {stringio_seconds * 1000:>11.1f} ms {stringio_seconds / file_count * 1e6:>11.2f} us")
+    print(f"{'ProblemRenderer':<20} {renderer_seconds * 1000:>11.1f} ms {renderer_seconds / file_count * 1e6:>11.2f} us")
+    print(f"speedup: {stringio_seconds / renderer_seconds:.1f}x")
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(
+        description="benchmarks the ProblemRenderer against the StringIO loop it replaced on a full catalogue")
+    parser.add_argument("--repeat", type=int, default=5, help="how many times to repeat each measurement")
+    parser.add_argument("--number", type=int, default=1, help="how many catalogue renders per measurement")
+
+    run(parser.parse_args())
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+
+# times each of the hot stages of a sync on its own, offline, using the captured responses in
+# `example_requests_responses`, and compares the results against a stored baseline so that
+# performance regressions show up
+#
+# run from the root of the repo with: python -m benchmarks.bench_stages
+#
+# to record a new baseline (for example after an intentional change, or on a new machine):
+# python -m benchmarks.bench_stages --update-baseline
+
+import argparse
+import json
+import pathlib
+import platform
+import sys
+import typing
+
+from leetcode_dl import decoder
+from leetcode_dl import downloader
+from leetcode_dl import render
+from leetcode_dl import constants
+
+from benchmarks import common
+
+DEFAULT_BASELINE_PATH = pathlib.Path(__file__).resolve().parent / "baseline.json"
+
+def get_stages() -> typing.List[typing.Tuple[str, typing.Callable[[], typing.Any], int]]:
+    ''' sets up each stage we want to time
+
+    @return a list of (stage name, function that takes no arguments, calls per measurement) tuples
+    '''
+
+    app = downloader.LeetcodeProblemDownloader(argparse.Namespace())
+
+    api_problems_all_text = common.load_example_response_text(common.API_PROBLEMS_ALL_RESPONSE_PATH)
+    api_problems_all_dict = json.loads(api_problems_all_text)
+    question_data_dict = common.load_example_response_json(common.GRAPHQL_QUESTIONDATA_RESPONSE_PATH)
+    question_html, _ = decoder.decode_question_data_response(question_data_dict)
+
+    # a fully populated problem to render, every language the fixture has a snippet for
+    leetcode_problem = app.parse_graphql_questiondata_response(
+        app.parse_api_problems_all_response(api_problems_all_dict).problems[733], question_data_dict)
+    code_snippet_list = [x for x in leetcode_problem.code_snippets.values()
+        if x.language_slug in constants.KNOWN_LANGUAGE_SLUG_TO_FILE_EXT_DICT]
+
+    def render_every_language():
+        problem_renderer = render.ProblemRenderer(leetcode_problem)
+        for iter_code_snippet in code_snippet_list:
+            render.get_problem_file_name(leetcode_problem, iter_code_snippet)
+            problem_renderer.render(iter_code_snippet)
+
+    return [
+        ("json_decode_api_problems_all", lambda: json.loads(api_problems_all_text), 5),
+        ("parse_api_problems_all_response", lambda: app.parse_api_problems_all_response(api_problems_all_dict), 5),
+        ("html2text_question_content", lambda: app.convert_question_html(question_html), 200),
+        ("snippet_model_construction", lambda: decoder.decode_question_data_response(question_data_dict), 5000),
+        ("render_problem_files_all_languages", render_every_language, 500),
+    ]
+
+def compare_against_baseline(results_dict:dict, baseline_dict:dict, tolerance:float) -> typing.List[str]:
+    ''' compares the results against the baseline
+
+    @param results_dict the results of this run
+    @param baseline_dict the stored baseline results
+    @param tolerance how much slower (as a fraction, 0.25 is 25%) a stage can be before it counts as a regression
+    @return a list of the stages that regressed
+    '''
+
+    regression_list = []
+
+    for stage_name, stage_result in results_dict["stages"].items():
+        baseline_stage_result = baseline_dict["stages"].get(stage_name)
+        if baseline_stage_result is None:
+            stage_result["baseline_ratio"] = None
+            continue
+
+        ratio = stage_result["seconds_per_call"] / baseline_stage_result["seconds_per_call"]
+        stage_result["baseline_ratio"] = ratio
+
+        if ratio > 1 + tolerance:
+            regression_list.append(stage_name)
+
+    return regression_list
+
+def run(parsed_args) -> int:
+
+    results_dict = {
+        "python_version": platform.python_version(),
+        "platform": platform.platform(),
+        "stages": dict()
+    }
+
+    for stage_name, stage_func, number in get_stages():
+        seconds_per_call = common.time_it(stage_func, parsed_args.repeat, number)
+        results_dict["stages"][stage_name] = {"seconds_per_call": seconds_per_call, "calls_per_measurement": number}
+
+    regression_list = []
+    if parsed_args.update_baseline:
+        with open(parsed_args.baseline, "w", encoding="utf-8") as f:
+            json.dump(results_dict, f, indent=4)
+            f.write("\n")
+
+    elif parsed_args.baseline.exists():
+        with open(parsed_args.baseline, "r", encoding="utf-8") as f:
+            baseline_dict = json.load(f)
+        regression_list = compare_against_baseline(results_dict, baseline_dict, parsed_args.tolerance)
+
+    results_dict["regressions"] = regression_list
+
+    output_json = json.dumps(results_dict, indent=4)
+    if parsed_args.output:
+        with open(parsed_args.output, "w", encoding="utf-8") as f:
+            f.write(output_json + "\n")
+    else:
+        print(output_json)
+
+    for iter_stage_name in regression_list:
+        print(f"REGRESSION: stage `{iter_stage_name}` is {results_dict['stages'][iter_stage_name]['baseline_ratio']:.2f}x "
+            + "the baseline", file=sys.stderr)
+
+    return 1 if regression_list else 0
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(
+        description="times each stage of a sync offline and compares the results to a baseline")
+    parser.add_argument("--repeat", type=int, default=7, help="how many times to repeat each measurement")
+    parser.add_argument("--baseline", type=pathlib.Path, default=DEFAULT_BASELINE_PATH,
+        help="the baseline json file to compare against")
+    parser.add_argument("--update-baseline", dest="update_baseline", action="store_true",
+        help="write the results to the baseline file instead of comparing against it")
+    parser.add_argument("--tolerance", type=float, default=0.5,
+        help="how much slower than the baseline a stage can be before it is a regression, 0.5 means 50%%")
+    parser.add_argument("--output", type=pathlib.Path, help="write the json results here instead of to stdout")
+
+    sys.exit(run(parser.parse_args()))
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+
+# measures how long dl_leetcode_problems.py takes to start with `python -X importtime`, for `--version`,
+# `--help` and a render from a small snapshot, and fails if any of them imported a module that only the
+# code paths that talk to leetcode (or convert html) should need
+#
+# the import time column only counts modules that a bare `python -c pass` doesn't already import, so
+# whatever the site packages load at startup isn't blamed on us
+#
+# run from the root of the repo with: python -m benchmarks.bench_startup
+
+import argparse
+import json
+import pathlib
+import re
+import subprocess
+import sys
+import tempfile
+import time
+
+import attr
+
+from leetcode_dl import decoder
+from leetcode_dl import snapshot
+
+from benchmarks import common
+
+REPO_ROOT = pathlib.Path(__file__).resolve().parent.parent
+SCRIPT_PATH = REPO_ROOT / "dl_leetcode_problems.py"
+
+# `import time:  self [us] | cumulative | imported package`, nested imports are indented
+IMPORTTIME_LINE_REGEX = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+# only needed to download, to parse what was downloaded or to print the logger hierarchy
+NETWORK_ONLY_MODULES = ("requests", "urllib3", "jmespath", "logging_tree")
+
+# only needed to convert the question html into text
+CONVERSION_ONLY_MODULES = ("html2text",)
+
+# the logging formatter used to need it, nothing but the benchmarks does now
+UNUSED_MODULES = ("arrow",)
+
+SNAPSHOT_PROBLEM_COUNT = 20
+
+def parse_importtime(stderr_text:str) -> dict:
+    '''
+    @param stderr_text what `python -X importtime` wrote to stderr
+    @return a dict of module name -> the time spent importing just that module, in microseconds
+    '''
+
+    result_dict = dict()
+    for iter_line in stderr_text.splitlines():
+        line_match = IMPORTTIME_LINE_REGEX.match(iter_line)
+        if line_match:
+            result_dict[line_match.group(4)] = int(line_match.group(1))
+
+    return result_dict
+
+def run_importtime(argument_list:list, working_dir:pathlib.Path) -> tuple:
+    ''' runs a python command with `-X importtime`
+
+    @param argument_list what to pass to python after `-X importtime`
+    @param working_dir the directory to run it in
+    @return a tuple of the dict from parse_importtime() and the wall time in seconds
+    '''
+
+    start_time = time.perf_counter()
+    completed_process = subprocess.run([sys.executable, "-X", "importtime"] + argument_list, cwd=working_dir,
+        stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, encoding="utf-8")
+    wall_seconds = time.perf_counter() - start_time
+
+    if completed_process.returncode != 0:
+        raise Exception(f"`{' '.join(argument_list)}` exited with `{completed_process.returncode}`:\n"
+            + completed_process.stderr[-2000:])
+
+    return parse_importtime(completed_process.stderr), wall_seconds
+
+def write_small_snapshot(snapshot_path:pathlib.Path):
+    ''' writes a snapshot of the first few problems of the captured /api/problems/all response, all of them
+    with the captured questionData response as their content
+    '''
+
+    problem_list = decoder.decode_api_problems_all_response(
+        common.load_example_response_json(common.API_PROBLEMS_ALL_RESPONSE_PATH))
+    question_html, code_snippet_list = decoder.decode_question_data_response(
+        common.load_example_response_json(common.GRAPHQL_QUESTIONDATA_RESPONSE_PATH))
+
+    snapshot.write_snapshot(snapshot_path, (attr.evolve(x, question_content=question_html,
+        code_snippets={y.language_slug: y for y in code_snippet_list}) for x in problem_list[:SNAPSHOT_PROBLEM_COUNT]))
+
+def run(parsed_args):
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        temp_dir = pathlib.Path(temp_dir)
+
+        snapshot_path = temp_dir / "small.snapshot"
+        write_small_snapshot(snapshot_path)
+
+        # (name, arguments, the modules it must not import)
+        scenario_list = [
+            ("--version", ["--version"], NETWORK_ONLY_MODULES + CONVERSION_ONLY_MODULES + UNUSED_MODULES),
+            ("--help", ["--help"], NETWORK_ONLY_MODULES + CONVERSION_ONLY_MODULES + UNUSED_MODULES),
+            ("snapshot", ["--from-snapshot", str(snapshot_path), "--path-to-save-to", str(temp_dir),
+                "--programming-languages", "python3", "--skip-search-index"], NETWORK_ONLY_MODULES + UNUSED_MODULES),
+        ]
+
+        bare_run_list = [run_importtime(["-c", "pass"], temp_dir) for _ in range(parsed_args.repeat)]
+        bare_module_set = set(bare_run_list[0][0])
+        print(f"a bare interpreter starts in {min(x[1] for x in bare_run_list) * 1000:.1f} ms")
+
+        failure_list = []
+        result_list = []
+        print(f"{'scenario':<10} {'modules':>8} {'imports':>10} {'wall':>10}  slowest")
+        for scenario_name, argument_list, forbidden_module_tuple in scenario_list:
+
+            # keep the fastest run, the first one also pays for writing the .pyc files
+            run_list = [run_importtime([str(SCRIPT_PATH)] + argument_list, temp_dir) for _ in range(parsed_args.repeat)]
+            import_dict, wall_seconds = min(run_list, key=lambda x: x[1])
+
+            own_import_dict = {x: y for x, y in import_dict.items() if x not in bare_module_set}
+            import_ms = sum(own_import_dict.values()) / 1000
+
+            top_level_dict = dict()
+            for iter_module, iter_us in own_import_dict.items():
+                top_level_name = iter_module.split(".")[0]
+                top_level_dict[top_level_name] = top_level_dict.get(top_level_name, 0) + iter_us
+            slowest_string = ", ".join(f"{x} {y / 1000:.1f}"
+                for x, y in sorted(top_level_dict.items(), key=lambda x: -x[1])[:4])
+
+            print(f"{scenario_name:<10} {len(own_import_dict):>8} {import_ms:>7.1f} ms {wall_seconds * 1000:>7.1f} ms"
+                + f"  {slowest_string}")
+            result_list.append({"scenario": scenario_name, "modules": len(own_import_dict),
+                "import_ms": round(import_ms, 1), "wall_ms": round(wall_seconds * 1000, 1)})
+
+            imported_forbidden_list = sorted(x for x in forbidden_module_tuple if x in import_dict)
+            if imported_forbidden_list:
+                failure_list.append(f"`{scenario_name}` imported {', '.join(imported_forbidden_list)}")
+
+            if parsed_args.max_import_ms is not None and import_ms > parsed_args.max_import_ms:
+                failure_list.append(f"`{scenario_name}` spent {import_ms:.1f} ms importing modules, "
+                    + f"more than --max-import-ms {parsed_args.max_import_ms}")
+
+    if parsed_args.json_out:
+        with open(parsed_args.json_out, "w", encoding="utf-8") as f:
+            json.dump(result_list, f, indent=4)
+
+    if failure_list:
+        for iter_failure in failure_list:
+            print(f"FAIL: {iter_failure}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(
+        description="measures the startup time of dl_leetcode_problems.py and fails if it imports modules it doesn't need")
+    parser.add_argument("--repeat", type=int, default=5, help="how many times to run each scenario")
+    parser.add_argument("--max-import-ms", dest="max_import_ms", type=float,
+        help="if provided, also fail if any scenario spends longer than this importing modules")
+    parser.add_argument("--json-out", dest="json_out", type=pathlib.Path,
+        help="if provided, also write the results to this json file")
+
+    run(parser.parse_args())
@@ -0,0 +1,34 @@
+# helpers shared by the benchmark scripts
+
+import json
+import pathlib
+import timeit
+
+EXAMPLE_RESPONSES_FOLDER = pathlib.Path(__file__).resolve().parent.parent / "example_requests_responses"
+
+API_PROBLEMS_ALL_RESPONSE_PATH = EXAMPLE_RESPONSES_FOLDER / "api_problems_all_json_response.txt"
+GRAPHQL_QUESTIONDATA_RESPONSE_PATH = EXAMPLE_RESPONSES_FOLDER / "graphql_questionData_response.txt"
+
+def load_example_response_text(path:pathlib.Path) -> str:
+    ''' returns the text of one of the captured responses in `example_requests_responses`
+    '''
+
+    with open(path, "r", encoding="utf-8") as f:
+        return f.read()
+
+def load_example_response_json(path:pathlib.Path) -> dict:
+    ''' returns one of the captured responses in `example_requests_responses`, parsed as json
+    '''
+
+    return json.loads(load_example_response_text(path))
+
+def time_it(func, repeat:int, number:int) -> float:
+    ''' times a function that takes no arguments
+
+    @param func the function to time
+    @param repeat how many measurements to take
+    @param number how many calls per measurement
+    @return the best time per call out of all the measurements, in seconds
+    '''
+
+    return min(timeit.repeat(func, repeat=repeat, number=number)) / number
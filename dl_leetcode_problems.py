@@ -5,129 +5,343 @@ import argparse
 import logging
 import logging.config
 import json
+import signal
 import sys
+import threading
+import time
+import typing
 import pathlib
-import io
-
-import arrow
-import logging_tree
 
 import leetcode_dl
-from leetcode_dl import downloader
 from leetcode_dl import utils
 from leetcode_dl import constants
 from leetcode_dl import model
+from leetcode_dl import render
 
+# the rest of the package (and requests, html2text and friends through it) gets imported by the function that
+# needs it, so `--help`, `--version` and argument errors start instantly. see benchmarks/bench_startup.py
+if typing.TYPE_CHECKING:
+    from leetcode_dl import downloader
+    from leetcode_dl import writer
 
 
-def run(parsed_args, root_logger):
+def write_single_leetcode_problem(file_writer:"writer.ProblemFileWriter", logger,
+        single_lc_problem:model.SingleLeetcodeProblem, programming_languages_to_use, non_fatal_error_list,
+        language_slugs_to_name_by_language:typing.AbstractSet[str]=frozenset()):
+    ''' writes the source code files for a single problem, one for each programming language
 
+    @param file_writer the ProblemFileWriter to write the files with
+    @param logger the Logger instance
+    @param single_lc_problem the SingleLeetcodeProblem to write files for
+    @param programming_languages_to_use the list of programming language slugs to write files for
+    @param non_fatal_error_list a list that any ErrorWhenWritingSourceCodeFile objects get appended to
+    @param language_slugs_to_name_by_language the language slugs whose file names include the language slug,
+        from render.get_language_slugs_to_name_by_language()
+    '''
 
-    logger = root_logger.getChild("main")
-    app = downloader.LeetcodeProblemDownloader(parsed_args)
-    all_leetcode_problems = app.get_all_leetcode_problems()
+    logger.debug("writing problem `%s` - `%s`", single_lc_problem.question_id, single_lc_problem.title)
 
-    programming_languages_to_use = []
+    problem_folder_name = render.get_problem_folder_name(single_lc_problem)
 
-    # see what languages we are considering. if ALL is present , just select all supported languages,
-    # else, use what the user passed in
-    if constants.PROGRAMMING_LANGUAGE_CHOICE_ALL in parsed_args.programming_languages:
-        programming_languages_to_use = utils.get_choices_for_programming_language()
-    else:
-        programming_languages_to_use = parsed_args.programming_languages
+    # builds the commented header once per comment style, rather than once per language
+    problem_renderer = render.ProblemRenderer(single_lc_problem)
 
-    logger.info("Programming languages to write problems for: `%s`", programming_languages_to_use)
+    # now create a file for each programming language the user wants files for
 
-    logger.info("Writing problems to the folder: `%s`", parsed_args.path_to_save_to)
+    for iter_programming_lang_str in programming_languages_to_use:
+
+
+        # now get the file that we will be writing to
+        code_snippet_obj = single_lc_problem.get_code_snippet(iter_programming_lang_str)
+
+        # NOTE: it seems that sometimes, leetcode doesn't have the 'complete' list of snippets for each problem
+        # so if the user has requested a language but leetcode didn't give it to us, log a warning
+        if code_snippet_obj == None:
+
+            nfe = model.ErrorWhenWritingSourceCodeFile(
+                problem_obj=single_lc_problem,
+                language_slug = iter_programming_lang_str,
+                reason=f"Leetcode did not give us a code snippet for the specified language, they only had `{single_lc_problem.get_available_code_snippets()}`")
+            non_fatal_error_list.append(nfe)
+            logger.warning("Problem writing source code file for problem `%s` - `%s`, reason: `%s`",
+                 single_lc_problem.question_id, single_lc_problem.title, nfe.reason)
+            continue
+
+        file_name = render.get_problem_file_name(single_lc_problem, code_snippet_obj,
+            include_language_slug=iter_programming_lang_str in language_slugs_to_name_by_language)
+
+        # render the whole file at once, the writer takes care of skipping it if nothing changed
+        file_writer.write_file(problem_folder_name, file_name, problem_renderer.render(code_snippet_obj))
+
+        # one record per file, and not the code snippet itself, since under --verbose this runs for every
+        # language of every problem
+        logger.debug("---- language `%s` done: `%s` / `%s`, code snippet of `%s` characters", iter_programming_lang_str,
+            problem_folder_name, file_name, len(code_snippet_obj.code_snippet))
+
+
+def write_problems(app:"downloader.LeetcodeProblemDownloader", parsed_args, logger,
+        problem_iterable:typing.Iterable[model.SingleLeetcodeProblem], programming_languages_to_use):
+    ''' writes each problem as soon as it arrives, along with the snapshot, the search index and the manifest,
+    and then logs (and writes out) the metrics of the sync
+
+    @param app the LeetcodeProblemDownloader the problems come from
+    @param parsed_args the parsed arguments
+    @param logger the Logger instance
+    @param problem_iterable the SingleLeetcodeProblem objects to write, with the question content and code snippets
+    @param programming_languages_to_use the list of programming language slugs to write files for
+    '''
+
+    from leetcode_dl import metrics
+    from leetcode_dl import search
+    from leetcode_dl import snapshot
+    from leetcode_dl import writer
 
     # keep track of what problems we couldn't create a source code file for
     non_fatal_error_list = []
 
-    # iterate through each problem
-    for iter_question_idx, iter_single_lc_problem in all_leetcode_problems.problems.items():
-        logger.debug("writing problem `%s` - `%s`", iter_single_lc_problem.question_id, iter_single_lc_problem.title)
+    output_format = getattr(parsed_args, "output_format", None) or constants.OUTPUT_FORMAT_DIRECTORY
 
-        # handle invalid character paths
-        tmp_title = iter_single_lc_problem.title
-        escaped_title = constants.INVALID_FILEPATH_CHARACTER_REPLACEMENT_REGEX.sub("_", tmp_title)
-        if tmp_title != escaped_title:
-            logger.debug("escaped invalid path characters in original title `%s` to be `%s`", tmp_title, escaped_title)
+    file_name_policy = getattr(parsed_args, "file_name_policy", None) or constants.DEFAULT_FILE_NAME_POLICY
+    language_slugs_to_name_by_language = render.get_language_slugs_to_name_by_language(file_name_policy,
+        programming_languages_to_use)
 
-        problem_folder = parsed_args.path_to_save_to / f"{iter_single_lc_problem.question_id} - {escaped_title}"
+    file_writer = writer.make_problem_file_writer(output_format, parsed_args.path_to_save_to,
+        overwrite=parsed_args.overwrite,
+        max_workers=parsed_args.writer_threads,
+        sync_metrics=app.metrics)
+    progress_reporter = metrics.ProgressReporter(app.metrics, logger)
 
-        logger.debug("-- creating problem folder: `%s`", problem_folder)
+    snapshot_writer = None
+    if getattr(parsed_args, "save_snapshot", None):
+        snapshot_writer = snapshot.SnapshotWriter(parsed_args.save_snapshot)
 
-        problem_folder.mkdir(exist_ok=True)
+    # so `search` can find problems without reading the files
+    search_index = None
+    if parsed_args.path_to_save_to and not getattr(parsed_args, "skip_search_index", False):
+        search_index = search.SearchIndex(parsed_args.path_to_save_to / constants.SEARCH_INDEX_FILENAME)
 
-        # now create a file for each programming language the user wants files for
+    try:
+
+        # iterate through each problem, writing each one as soon as it has been downloaded
+        for iter_single_lc_problem in problem_iterable:
+
+            with app.metrics.time_stage(metrics.STAGE_RENDER_PROBLEM):
+                write_single_leetcode_problem(file_writer, logger, iter_single_lc_problem,
+                    programming_languages_to_use, non_fatal_error_list, language_slugs_to_name_by_language)
+
+            app.metrics.increment(metrics.COUNTER_PROBLEMS_WRITTEN)
+            progress_reporter.update()
+
+            if snapshot_writer:
+                snapshot_writer.add_problem(iter_single_lc_problem)
+
+            if search_index:
+                with app.metrics.time_stage(metrics.STAGE_SEARCH_INDEX):
+                    search_index.add_problem(iter_single_lc_problem)
+
+            # remember what we wrote so the next `--incremental` run can skip it
+            if app.manifest:
+                app.manifest.record_problem(iter_single_lc_problem)
+
+        # make sure everything is actually on disk before we update the manifest
+        file_writer.close()
+        progress_reporter.update(force=True)
+
+        if snapshot_writer:
+            snapshot_writer.close()
 
-        for iter_programming_lang_str in programming_languages_to_use:
+        if app.manifest:
+            app.manifest.record_programming_languages(programming_languages_to_use, file_name_policy, output_format)
+            app.manifest.save()
 
+        # everything is on disk, so there is nothing left to resume
+        if app.journal:
+            app.journal.close(completed=True)
 
-            # now get the file that we will be writing to
-            code_snippet_obj = iter_single_lc_problem.get_code_snippet(iter_programming_lang_str)
+    finally:
+        # if we got here without closing the writer then something failed, so don't finish the output
+        file_writer.close(succeeded=False)
+        if snapshot_writer:
+            snapshot_writer.close(succeeded=False)
+        if search_index:
+            search_index.close()
 
-            logger.debug("---- language: `%s`, code_snippet_obj: `%s`",
-                iter_programming_lang_str, code_snippet_obj)
+        # even if we failed, knowing where the time went is useful
+        app.metrics.log_summary(logger)
+        if getattr(parsed_args, "metrics_out", None):
+            app.metrics.write(parsed_args.metrics_out)
 
-            # NOTE: it seems that sometimes, leetcode doesn't have the 'complete' list of snippets for each problem
-            # so if the user has requested a language but leetcode didn't give it to us, log a warning
-            if code_snippet_obj == None:
 
-                nfe = model.ErrorWhenWritingSourceCodeFile(
-                    problem_obj=iter_single_lc_problem,
-                    language_slug = iter_programming_lang_str,
-                    reason=f"Leetcode did not give us a code snippet for the specified language, they only had `{iter_single_lc_problem.get_available_code_snippets()}`")
-                non_fatal_error_list.append(nfe)
-                logger.warning("Problem writing source code file for problem `%s` - `%s`, reason: `%s`",
-                     iter_single_lc_problem.question_id, iter_single_lc_problem.title, nfe.reason)
-                continue
+def watch_problems(app:"downloader.LeetcodeProblemDownloader", parsed_args, logger, programming_languages_to_use):
+    ''' keeps syncing every `--watch-interval` seconds with the same session, writing only the problems that are
+    new or changed since the last sync, until interrupted (or sent SIGTERM)
 
-            file_name =  f"{iter_single_lc_problem.question_id}_{iter_single_lc_problem.slug}.{code_snippet_obj.get_code_snippet_file_extension()}"
+    a sync that fails gets logged and tried again at the next interval, logging in again in case that is what
+    went wrong
 
-            iter_problem_file = problem_folder / file_name
+    @param app the LeetcodeProblemDownloader
+    @param parsed_args the parsed arguments
+    @param logger the Logger instance
+    @param programming_languages_to_use the list of programming language slugs to write files for
+    '''
 
-            logger.debug("------ file path: `%s`", iter_problem_file)
+    from leetcode_dl import watch
 
-            if iter_problem_file.exists() and not parsed_args.overwrite:
-                raise Exception(f"the file `{iter_problem_file}` already exists and --overwrite was not provided, not writing over an existing file")
+    interval_seconds = max(0.0, parsed_args.watch_interval)
+    watch_status = watch.WatchStatus(interval_seconds)
 
-            # open the file
-            with open(iter_problem_file, "w", encoding="utf-8") as f:
+    status_server = None
+    if getattr(parsed_args, "status_port", None) is not None:
+        status_server = watch.StatusServer(parsed_args.status_port, watch_status)
+        status_server.start_in_background()
 
-                # write the problem title and url
-                iter_problem_url = f"{constants.LEETCODE_PROBLEM_URL_MINUS_SLUG_END_SLASH}{iter_single_lc_problem.slug}"
-                f.write(f"{code_snippet_obj.get_code_snippet_comment_characters()} {iter_single_lc_problem.title}\n")
-                f.write(f"{code_snippet_obj.get_code_snippet_comment_characters()} {iter_problem_url}\n")
-                f.write(f"{code_snippet_obj.get_code_snippet_comment_characters()}\n")
+    # SIGTERM stops the loop once the sync that is running (if any) is done
+    stop_event = threading.Event()
+    previous_sigterm_handler = signal.signal(signal.SIGTERM, lambda signal_number, frame: stop_event.set())
 
-                # write the problem questions in comments
-                question_io = io.StringIO(iter_single_lc_problem.question_content)
-                logger.debug("------ question content: `%s`", iter_single_lc_problem.question_content.encode("utf-8"))
+    csrf_token = None
+    sync_number = 0
+    sync_result = None
 
+    try:
+        while not stop_event.is_set():
+
+            sync_start_time = time.monotonic()
+            sync_number += 1
+
+            # the first sync uses what the downloader was set up with
+            if sync_number > 1:
+                app.start_sync(reload_manifest=sync_result == watch.SYNC_RESULT_FAILED)
+
+            watch_status.sync_started(app.metrics)
+            logger.info("starting sync `%s`", sync_number)
+
+            sync_result = watch.SYNC_RESULT_WRITTEN
+            sync_error = None
+            try:
+                if csrf_token is None:
+                    csrf_token = app.log_in()
 
-                while (iter_question_line := question_io.readline()):
+                all_leetcode_problems = app.poll_api_problems_all()
 
-                    str_to_write = f"{code_snippet_obj.get_code_snippet_comment_characters()} {iter_question_line}"
+                if all_leetcode_problems is None:
+                    sync_result = watch.SYNC_RESULT_NOT_MODIFIED
+                else:
+                    write_problems(app, parsed_args, logger, app.iter_problems_to_write(csrf_token, all_leetcode_problems),
+                        programming_languages_to_use)
 
-                    # the question content seems to have a mix of newlines and newlines + carriage returns, so
-                    # get rid of the carriage returns. I think what is happening is python determines that it is
-                    # `\n` newlines but since leetcode seems to be inconsistent , if i hae the carriage returns
-                    # left in the string, i get gaps in the comments in the problem file which looks linda ugly
-                    logger.debug("-------- before replacing \\r: `%s`", str_to_write.encode("utf-8"))
-                    str_to_write = str_to_write.replace("\r", "")
-                    logger.debug("-------- after replacing \\r:  `%s`", str_to_write.encode("utf-8"))
-                    logger.debug("-------- writing: `%s`", str_to_write.encode("utf-8"))
-                    f.write(str_to_write)
+            except Exception as e:
+                logger.exception("sync `%s` failed, trying again at the next interval", sync_number)
+                sync_result = watch.SYNC_RESULT_FAILED
+                sync_error = e
 
-                # write a few spaces
-                f.write("\n\n")
+                # maybe the session expired
+                csrf_token = None
 
-                # now write the code snippet
-                f.write(code_snippet_obj.code_snippet)
+            # the interval is from the start of one sync to the start of the next, unless a sync takes longer than that
+            wait_seconds = max(0.0, interval_seconds - (time.monotonic() - sync_start_time))
+            watch_status.sync_finished(sync_result, time.time() + wait_seconds, sync_error)
 
-            logger.debug("------ language `%s` done", iter_programming_lang_str)
+            logger.info("sync `%s` finished (`%s`), the next one starts in `%.0f` seconds", sync_number, sync_result,
+                wait_seconds)
+            stop_event.wait(wait_seconds)
 
+        logger.info("stopping --watch after `%s` syncs", sync_number)
+
+    except KeyboardInterrupt:
+        logger.info("interrupted, stopping --watch after `%s` syncs", sync_number)
+
+    finally:
+        signal.signal(signal.SIGTERM, previous_sigterm_handler)
+
+        if status_server:
+            status_server.shutdown()
+            status_server.server_close()
+
+
+def run(parsed_args, root_logger):
+
+    from leetcode_dl import downloader
+
+    logger = root_logger.getChild("main")
+
+    # see what languages we are considering. if ALL is present , just select all supported languages,
+    # else, use what the user passed in
+    programming_languages_to_use = utils.resolve_programming_languages(parsed_args.programming_languages)
+
+    logger.info("Programming languages to write problems for: `%s`", programming_languages_to_use)
+
+    logger.info("Writing problems to the folder: `%s`", parsed_args.path_to_save_to)
+
+    output_format = getattr(parsed_args, "output_format", None) or constants.OUTPUT_FORMAT_DIRECTORY
+
+    # `--watch` only writes what changed as well, so it has the same restrictions as `--incremental`
+    delta_sync_flag = None
+    if getattr(parsed_args, "watch", False):
+        delta_sync_flag = "--watch"
+    elif parsed_args.incremental:
+        delta_sync_flag = "--incremental"
+
+    # the zip and tar archives are rebuilt from scratch every run, so they would lose every problem that
+    # `--incremental` skipped
+    if delta_sync_flag and output_format in (constants.OUTPUT_FORMAT_ZIP, constants.OUTPUT_FORMAT_TAR_ZST):
+        raise Exception(f"{delta_sync_flag} can't be used with --output-format {output_format}, since the archive is "
+            + "rewritten every run")
+
+    # the snapshot has to have every problem in it, and an incremental run skips the unchanged ones
+    if delta_sync_flag and getattr(parsed_args, "save_snapshot", None):
+        raise Exception(f"{delta_sync_flag} can't be used with --save-snapshot, since the snapshot would be missing "
+            + "every problem that didn't change")
+
+    if getattr(parsed_args, "watch", False) and getattr(parsed_args, "from_snapshot", None):
+        raise Exception("--watch can't be used with --from-snapshot, since a snapshot never changes")
+
+    if parsed_args.resume and (parsed_args.discard_journal or parsed_args.no_journal):
+        raise Exception("--resume can't be used with --discard-journal or --no-journal, since it needs the journal")
+
+    app = downloader.LeetcodeProblemDownloader(parsed_args)
+    try:
+        if getattr(parsed_args, "watch", False):
+            watch_problems(app, parsed_args, logger, programming_languages_to_use)
+        else:
+            write_problems(app, parsed_args, logger, app.iter_all_leetcode_problems(), programming_languages_to_use)
+    finally:
+        app.close()
+
+
+def run_search(parsed_args, root_logger):
+    ''' searches the index that a sync built in the output folder and prints the hits, best match first
+    '''
+
+    from leetcode_dl import search
+
+    logger = root_logger.getChild("search")
+
+    output_folder = parsed_args.search_folder or parsed_args.path_to_save_to
+    if not output_folder:
+        raise Exception("`search` needs the folder the problems were synced to, pass it with --folder")
+
+    difficulty_levels = None
+    if parsed_args.search_difficulty:
+        difficulty_levels = {constants.DIFFICULTY_NAME_TO_LEVEL_DICT[x] for x in parsed_args.search_difficulty}
+
+    difficulty_level_to_name_dict = {y: x for x, y in constants.DIFFICULTY_NAME_TO_LEVEL_DICT.items()}
+
+    search_index = search.SearchIndex(output_folder / constants.SEARCH_INDEX_FILENAME, create=False)
+    try:
+        start_time = time.perf_counter()
+        hit_list = search_index.search(" ".join(parsed_args.query), difficulty_levels, parsed_args.search_limit)
+        elapsed_seconds = time.perf_counter() - start_time
+    finally:
+        search_index.close()
+
+    for iter_rank, iter_hit in enumerate(hit_list, 1):
+        score_str = "slug" if iter_hit.score == float("inf") else f"{iter_hit.score:.2f}"
+        paid_only_str = " (paid only)" if iter_hit.paid_only else ""
+        print(f"{iter_rank:>3}. [{difficulty_level_to_name_dict.get(iter_hit.difficulty, iter_hit.difficulty):<6}] "
+            + f"{iter_hit.folder_name}{paid_only_str}  ({score_str})")
+
+    logger.info("`%s` hits for `%s` in `%.1f` ms", len(hit_list), " ".join(parsed_args.query), elapsed_seconds * 1000)
 
 
 if __name__ == "__main__":
@@ -155,21 +369,149 @@ if __name__ == "__main__":
     parser.add_argument("--path-to-save-to", dest="path_to_save_to",
         type=utils.isDirectoryType, help="the path to download the problems to")
 
+    parser.add_argument("--base-url", dest="base_url", type=str, default=constants.LEETCODE_BASE_URL,
+        help="the url of the leetcode site to download from, for example the local simulator started by `leetcode_simulator.py`")
+
+    parser.add_argument("--max-concurrency", dest="max_concurrency", type=int, default=constants.DEFAULT_MAX_CONCURRENCY,
+        help="how many questionData requests to have in flight at once")
+    parser.add_argument("--graphql-batch-size", dest="graphql_batch_size", type=int,
+        default=constants.DEFAULT_GRAPHQL_BATCH_SIZE,
+        help="how many problems to ask for in a single questionData request")
+    parser.add_argument("--pipeline-queue-size", dest="pipeline_queue_size", type=int,
+        default=constants.DEFAULT_PIPELINE_QUEUE_SIZE,
+        help="how many problems can be downloaded ahead of the one currently being written to disk")
+
+    parser.add_argument("--requests-per-second", dest="requests_per_second", type=float,
+        default=constants.DEFAULT_REQUESTS_PER_SECOND,
+        help="the request rate to start at, it goes up while the server is healthy and down when it throttles us")
+    parser.add_argument("--max-requests-per-second", dest="max_requests_per_second", type=float,
+        default=constants.DEFAULT_MAX_REQUESTS_PER_SECOND,
+        help="the request rate will never go above this")
+    parser.add_argument("--retry-limit", dest="retry_limit", type=int, default=constants.REQUESTS_RETRY_LIMIT,
+        help="how many times to try a request before giving up")
+
+    parser.add_argument("--cache-dir", dest="cache_dir", type=utils.isDirectoryType,
+        help="if provided, http responses are cached in a database in this folder and reused on later runs")
+    parser.add_argument("--cache-ttl", dest="cache_ttl", type=float, default=constants.DEFAULT_RESPONSE_CACHE_TTL_SECONDS,
+        help="how many seconds a cached response is considered fresh for")
+    parser.add_argument("--cache-max-size", dest="cache_max_size", type=int,
+        default=constants.DEFAULT_RESPONSE_CACHE_MAX_SIZE_BYTES,
+        help="the maximum size in bytes of the (compressed) response cache before old entries are evicted")
+
+    parser.add_argument("--incremental", action="store_true",
+        help="if provided, only fetch and write problems that are new or changed since the last run, "
+        + "using the manifest that gets saved in the --path-to-save-to folder. Changed problems need --overwrite")
+
+    parser.add_argument("--conversion-workers", dest="conversion_workers", type=int, default=0,
+        help="how many processes to convert the question content html to text with, 0 converts it on the "
+        + "download threads. Conversions are memoized in --cache-dir if it is provided")
+
+    parser.add_argument("--writer-threads", dest="writer_threads", type=int, default=constants.DEFAULT_WRITER_THREADS,
+        help="how many threads to write the problem files with")
+
+    parser.add_argument("--output-format", dest="output_format", choices=constants.OUTPUT_FORMAT_CHOICES,
+        default=constants.OUTPUT_FORMAT_DIRECTORY,
+        help="`directory` writes a folder per problem with a file per language. `dedup` writes the same folders, but "
+        + "files with identical contents are only stored once, as read only hardlinks to each other. the others write "
+        + f"every file (with the same folder/file layout) into a single `{constants.OUTPUT_ARCHIVE_BASENAME}.<format>` "
+        + "file in --path-to-save-to. `tar.zst` needs the `zstandard` package")
+    parser.add_argument("--file-name-policy", dest="file_name_policy", choices=constants.FILE_NAME_POLICY_CHOICES,
+        default=constants.DEFAULT_FILE_NAME_POLICY,
+        help="how the file for each language is named. `extension` (the default) is `<id>_<slug>.<extension>`, which "
+        + "means languages that share an extension (like `python` and `python3`) share a file and the last one "
+        + "written wins, `language` is always `<id>_<slug>.<language>.<extension>`, and `unique` only uses that for "
+        + "languages that share their extension with another language being written. changing it for an existing "
+        + "folder leaves the files with the old names where they are")
+
+    parser.add_argument("--save-snapshot", dest="save_snapshot", type=pathlib.Path,
+        help="if provided, save every problem (with the question content and every code snippet) to a compact "
+        + "snapshot file at this path, that --from-snapshot can render from later")
+    parser.add_argument("--from-snapshot", dest="from_snapshot", type=utils.isFileType,
+        help="if provided, render the problems from a snapshot saved by --save-snapshot instead of downloading "
+        + "them, this doesn't touch the network at all")
+
+    parser.add_argument("--metrics-out", dest="metrics_out", type=pathlib.Path,
+        help="if provided, write the timing and throughput metrics of the sync to this file, as json if it ends "
+        + "in `.json`, otherwise in the OpenMetrics text format")
+
+    parser.add_argument("--difficulty", dest="difficulty", type=str, nargs="+",
+        choices=constants.DIFFICULTY_NAME_TO_LEVEL_DICT.keys(),
+        help="only download problems with one of these difficulties")
+    parser.add_argument("--paid-only", dest="paid_only", choices=constants.SELECTION_CHOICES,
+        default=constants.SELECTION_INCLUDE,
+        help="whether to include, exclude, or only download the problems that need a premium subscription")
+    parser.add_argument("--new-questions", dest="new_questions", choices=constants.SELECTION_CHOICES,
+        default=constants.SELECTION_INCLUDE,
+        help="whether to include, exclude, or only download the problems that leetcode marks as new")
+    parser.add_argument("--question-ids", dest="question_ids", type=utils.questionIdRangeType, nargs="+",
+        help="only download problems whose question_id is in one of these ranges, like `1-100`, `250` or `2000-`")
+    parser.add_argument("--slugs", dest="slugs", type=str, nargs="+",
+        help="only download problems whose slug matches one of these globs, like `two-*`, quote them so the shell "
+        + "doesn't expand them")
+    parser.add_argument("--shard", dest="shard", type=utils.shardType,
+        help="only download the problems in this shard, like `2/4` for the second of four shards. every problem is "
+        + "in exactly one shard (decided by its question_id), so several machines can each sync a different shard "
+        + "and the outputs merge without overlapping")
+    parser.add_argument("--resume", action="store_true",
+        help="if provided, pick up where a previous sync that failed (or was interrupted) left off, using the journal "
+        + "it left in the --path-to-save-to folder, so only the problems it didn't get to are fetched")
+    parser.add_argument("--discard-journal", dest="discard_journal", action="store_true",
+        help="if provided, throw away the journal a previous sync that failed (or was interrupted) left in the "
+        + "--path-to-save-to folder and start over, without this (or --resume) the sync refuses to start")
+    parser.add_argument("--no-journal", dest="no_journal", action="store_true",
+        help="if provided, don't journal the problems as they are fetched, which saves writing them all to disk "
+        + "twice, but a sync that fails can't be picked up again with --resume")
+
+    parser.add_argument("--skip-search-index", dest="skip_search_index", action="store_true",
+        help="if provided, don't update the search index that `search` uses in the --path-to-save-to folder")
+
+    parser.add_argument("--watch", action="store_true",
+        help="if provided, keep running and sync every --watch-interval seconds with the same session, only "
+        + "fetching and writing the problems that are new or changed, until interrupted")
+    parser.add_argument("--watch-interval", dest="watch_interval", type=float, default=constants.DEFAULT_WATCH_INTERVAL_SECONDS,
+        help="how many seconds --watch waits from the start of one sync to the start of the next")
+    parser.add_argument("--status-port", dest="status_port", type=int,
+        help="if provided along with --watch, serve the status of the syncs (as json at /status, and the metrics of "
+        + f"the current sync at /metrics) on this port of {constants.WATCH_STATUS_HOST}, 0 picks a free port")
     parser.add_argument("--overwrite", action="store_true", help="if provided, we will overwrite any existing files")
 
     parser.add_argument("--version", action="version", help="show the program version", version=leetcode_dl.__version__)
 
+    subparsers = parser.add_subparsers(dest="command",
+        help="what to do, leave it out to download the problems")
+
+    search_parser = subparsers.add_parser("search",
+        help="search the problems a sync wrote by their title, slug and question content, using the index the sync "
+        + "built instead of reading the files")
+    search_parser.add_argument("query", type=str, nargs="+",
+        help="the words to search for, every one of them has to match. a word ending in `*` matches any word "
+        + "starting with it, quote it so the shell doesn't expand it")
+    search_parser.add_argument("--folder", dest="search_folder", type=utils.isDirectoryType,
+        help="the folder the problems were synced to, defaults to --path-to-save-to")
+    search_parser.add_argument("--difficulty", dest="search_difficulty", type=str, nargs="+",
+        choices=constants.DIFFICULTY_NAME_TO_LEVEL_DICT.keys(),
+        help="only show problems with one of these difficulties")
+    search_parser.add_argument("--limit", dest="search_limit", type=int, default=constants.DEFAULT_SEARCH_LIMIT,
+        help="the most hits to show")
+
     group = parser.add_mutually_exclusive_group()
     group.add_argument("--verbose", action="store_true", help="Increase logging verbosity")
     group.add_argument("--logging-config", dest="logging_config",
         type=utils.isFileType, help="Specify a JSON file representing logging configuration")
+    parser.add_argument("--background-logging", dest="background_logging", action="store_true",
+        help="if provided, log records get formatted and written by a background thread instead of the thread "
+        + "that logged them, which keeps --verbose from slowing down the download")
 
+    logging_listener = None
     try:
         parsed_args = parser.parse_args()
 
         # set logging level based on arguments
         if parsed_args.verbose:
             root_logger.setLevel("DEBUG")
+        elif parsed_args.command == "search" and not parsed_args.logging_config:
+            # keep the output to just the hits
+            root_logger.setLevel("WARNING")
         else:
             if parsed_args.logging_config:
                 with open(parsed_args.logging_config, "r", encoding="utf-8") as f:
@@ -177,13 +519,26 @@ if __name__ == "__main__":
             else:
                 root_logger.setLevel("INFO")
 
+        # this has to come after the logging config, since that replaces the handlers
+        if parsed_args.background_logging:
+            logging_listener = utils.start_background_logging(root_logger)
+
         root_logger.debug("Parsed arguments: %s", parsed_args)
-        root_logger.debug("Logger hierarchy:\n%s", logging_tree.format.build_description(node=None))
+        if root_logger.isEnabledFor(logging.DEBUG):
+            import logging_tree
+            root_logger.debug("Logger hierarchy:\n%s", logging_tree.format.build_description(node=None))
 
         # run the application
-        run(parsed_args, root_logger)
+        if parsed_args.command == "search":
+            run_search(parsed_args, root_logger)
+        else:
+            run(parsed_args, root_logger)
 
         root_logger.info("Done!")
     except Exception as e:
         root_logger.exception("Something went wrong!")
-        sys.exit(1)
\ No newline at end of file
+        sys.exit(1)
+    finally:
+        # write out whatever is still in the queue
+        if logging_listener:
+            logging_listener.stop()
\ No newline at end of file
@@ -0,0 +1,229 @@
+import json
+import logging
+import pathlib
+import sqlite3
+import threading
+import time
+import typing
+import zlib
+
+import attr
+
+from leetcode_dl import constants
+
+if typing.TYPE_CHECKING:
+    import requests
+
+logger = logging.getLogger(__name__)
+
+@attr.s(auto_attribs=True)
+class CachedResponse:
+    ''' a http response body (and the bits of the response we care about) that came out of the
+    ResponseCache
+    '''
+
+    status_code:int = attr.ib()
+    url:str = attr.ib()
+    encoding:str = attr.ib()
+    headers:dict = attr.ib()
+    body:bytes = attr.ib()
+    created:float = attr.ib()
+
+    def to_requests_response(self) -> "requests.Response":
+        ''' builds a requests.Response out of this cached response so callers can't tell
+        the difference between a cached response and one that came from the network
+
+        @return a requests.Response object
+        '''
+
+        import requests
+
+        response = requests.Response()
+        response.status_code = self.status_code
+        response.url = self.url
+        response.encoding = self.encoding
+        response.headers = requests.structures.CaseInsensitiveDict(self.headers)
+        response._content = self.body
+        # so `iter_content()` hands out the body instead of trying to read it off a connection
+        response._content_consumed = True
+        return response
+
+
+class ResponseCache:
+    ''' an on disk cache of http response bodies, stored zlib compressed in a sqlite database
+
+    entries are keyed by a string (usually the url plus the titleSlug), entries older than the TTL
+    are treated as missing, and once the database holds more than `max_size_bytes` of compressed bodies
+    the least recently used entries get evicted
+    '''
+
+    def __init__(self, cache_dir:pathlib.Path, ttl_seconds:float, max_size_bytes:int):
+        '''
+        constructor
+
+        @param cache_dir the folder to store the sqlite database in
+        @param ttl_seconds how many seconds a cached entry is considered fresh for
+        @param max_size_bytes the maximum size of all of the compressed bodies before we start evicting entries
+        '''
+
+        self.db_path = pathlib.Path(cache_dir) / constants.RESPONSE_CACHE_DATABASE_FILENAME
+        self.ttl_seconds = ttl_seconds
+        self.max_size_bytes = max_size_bytes
+
+        # the downloader calls into us from multiple threads, so share one connection behind a lock
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self.connection.execute('''CREATE TABLE IF NOT EXISTS responses (
+            cache_key TEXT PRIMARY KEY,
+            status_code INTEGER NOT NULL,
+            url TEXT NOT NULL,
+            encoding TEXT,
+            headers TEXT NOT NULL,
+            body BLOB NOT NULL,
+            body_size INTEGER NOT NULL,
+            created REAL NOT NULL,
+            last_accessed REAL NOT NULL)''')
+        self.connection.commit()
+
+        self.hits = 0
+        self.misses = 0
+
+        logger.info("using the response cache at `%s` with a ttl of `%s` seconds", self.db_path, self.ttl_seconds)
+
+        self.evict()
+
+    def get(self, cache_key:str) -> typing.Optional[CachedResponse]:
+        '''
+        returns the cached response for the given key, or None if we don't have one or it is stale
+
+        @param cache_key the key of the entry to look up
+        @return a CachedResponse or None
+        '''
+
+        now = time.time()
+
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT status_code, url, encoding, headers, body, created FROM responses WHERE cache_key = ?",
+                (cache_key,)).fetchone()
+
+            if row is None or now - row[5] > self.ttl_seconds:
+                self.misses += 1
+                logger.debug("response cache miss for `%s`", cache_key)
+                return None
+
+            self.connection.execute("UPDATE responses SET last_accessed = ? WHERE cache_key = ?", (now, cache_key))
+            self.connection.commit()
+            self.hits += 1
+
+        logger.debug("response cache hit for `%s`", cache_key)
+
+        status_code, url, encoding, headers, body, created = row
+        return CachedResponse(
+            status_code=status_code,
+            url=url,
+            encoding=encoding,
+            headers=json.loads(headers),
+            body=zlib.decompress(body),
+            created=created)
+
+    def put(self, cache_key:str, response:"requests.Response"):
+        '''
+        stores the given response in the cache, replacing any existing entry for the key
+
+        @param cache_key the key to store the response under
+        @param response the requests.Response to store
+        '''
+
+        self.put_compressed(cache_key, response,
+            zlib.compress(response.content, constants.RESPONSE_CACHE_COMPRESSION_LEVEL), len(response.content))
+
+    def iter_and_put(self, cache_key:str, response:"requests.Response",
+            chunk_iterable:typing.Iterable[bytes]) -> typing.Iterator[bytes]:
+        '''
+        passes along the chunks of a streamed response body, compressing them as they go by, and stores the
+        response in the cache once the last one has been read, so the body never has to be in memory at once
+
+        if the caller stops before the end (or reading the body fails), nothing gets stored
+
+        @param cache_key the key to store the response under
+        @param response the streamed requests.Response, whose body hasn't been read
+        @param chunk_iterable the body of the response, in chunks
+        @return a generator of the same chunks
+        '''
+
+        compressor = zlib.compressobj(constants.RESPONSE_CACHE_COMPRESSION_LEVEL)
+        compressed_part_list = []
+        body_size = 0
+
+        for iter_chunk in chunk_iterable:
+            compressed_part_list.append(compressor.compress(iter_chunk))
+            body_size += len(iter_chunk)
+            yield iter_chunk
+
+        compressed_part_list.append(compressor.flush())
+        self.put_compressed(cache_key, response, b"".join(compressed_part_list), body_size)
+
+    def put_compressed(self, cache_key:str, response:"requests.Response", compressed_body:bytes, body_size:int):
+        '''
+        stores a response whose body was already compressed, replacing any existing entry for the key
+
+        @param cache_key the key to store the response under
+        @param response the requests.Response to store, its body isn't used
+        @param compressed_body the body, zlib compressed
+        @param body_size the size of the body before it was compressed
+        '''
+
+        now = time.time()
+
+        # we only keep the headers needed to decode the body later
+        headers_to_keep = {k: v for k, v in response.headers.items() if k.lower() == "content-type"}
+
+        with self.lock:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (cache_key, response.status_code, response.url, response.encoding, json.dumps(headers_to_keep),
+                    compressed_body, len(compressed_body), now, now))
+            self.connection.commit()
+
+        logger.debug("stored `%s` bytes (`%s` compressed) in the response cache for `%s`",
+            body_size, len(compressed_body), cache_key)
+
+    def evict(self):
+        '''
+        removes any entries that are older than the TTL, and then removes the least recently used entries
+        until the cache fits in `max_size_bytes`
+        '''
+
+        with self.lock:
+            expired_cursor = self.connection.execute(
+                "DELETE FROM responses WHERE created < ?", (time.time() - self.ttl_seconds,))
+            expired_count = expired_cursor.rowcount
+
+            total_size = self.connection.execute("SELECT COALESCE(SUM(body_size), 0) FROM responses").fetchone()[0]
+
+            evicted_count = 0
+            if total_size > self.max_size_bytes:
+                for cache_key, body_size in self.connection.execute(
+                        "SELECT cache_key, body_size FROM responses ORDER BY last_accessed ASC").fetchall():
+                    if total_size <= self.max_size_bytes:
+                        break
+                    self.connection.execute("DELETE FROM responses WHERE cache_key = ?", (cache_key,))
+                    total_size -= body_size
+                    evicted_count += 1
+
+            self.connection.commit()
+
+        logger.debug("response cache eviction removed `%s` expired and `%s` least recently used entries, size is now `%s` bytes",
+            expired_count, evicted_count, total_size)
+
+    def close(self):
+        ''' evicts anything that needs evicting and closes the database
+        '''
+
+        self.evict()
+
+        logger.info("response cache had `%s` hits and `%s` misses", self.hits, self.misses)
+
+        with self.lock:
+            self.connection.close()
@@ -1,36 +1,137 @@
 import leetcode_dl.model as model
 
-import jmespath
-
 import re
 
+LEETCODE_BASE_URL = "https://leetcode.com"
+
 LEETCODE_PROBLEM_URL_MINUS_SLUG_END_SLASH = "https://leetcode.com/problems/"
 
-SECONDS_TO_SLEEP_BETWEEN_GRAPHQL_API_REQUESTS = 0.5
+# how many questionData requests we make at once by default
+DEFAULT_MAX_CONCURRENCY = 1
+
+# how many problems we ask for in a single (batched) questionData request by default
+DEFAULT_GRAPHQL_BATCH_SIZE = 1
+
+# how much of the /api/problems/all response gets decoded at a time
+API_PROBLEMS_ALL_CHUNK_SIZE = 64 * 1024
+
+# how many problems can be fetched ahead of the one currently being written by default
+DEFAULT_PIPELINE_QUEUE_SIZE = 32
+
+REQUESTS_RETRY_LIMIT = 5
+
+# failed requests are retried after a random wait of up to BASE * 2^attempt seconds, capped at MAX seconds
+# (or longer if the server sends a Retry-After header)
+REQUESTS_BACKOFF_BASE_SECONDS = 1
+REQUESTS_BACKOFF_MAX_SECONDS = 30
+
+# the status codes that mean the server wants us to slow down
+THROTTLE_STATUS_CODES = (429, 500, 502, 503, 504)
+
+# the adaptive rate limiter starts at DEFAULT_REQUESTS_PER_SECOND, multiplies by RATE_LIMITER_INCREASE_FACTOR after
+# every healthy response and by RATE_LIMITER_DECREASE_FACTOR (at most once per cooldown) when throttled, so it keeps
+# ramping up as long as less than about 1 in 8 requests gets throttled
+DEFAULT_REQUESTS_PER_SECOND = 2.0
+DEFAULT_MAX_REQUESTS_PER_SECOND = 20.0
+RATE_LIMITER_MIN_REQUESTS_PER_SECOND = 0.2
+RATE_LIMITER_INCREASE_FACTOR = 1.05
+RATE_LIMITER_DECREASE_FACTOR = 0.7
+RATE_LIMITER_DECREASE_COOLDOWN_SECONDS = 1.0
+
+# how many threads write the problem files by default, and how many files each of them can have queued up
+DEFAULT_WRITER_THREADS = 4
+WRITER_PENDING_FILES_PER_THREAD = 16
+
+# the formats that `--output-format` can write the problems in. `dedup` writes the same folders as `directory`, but
+# files with identical contents are hardlinked to each other, everything else puts every file into a single
+# archive (with the same `<problem folder>/<file>` layout) in the --path-to-save-to folder
+OUTPUT_FORMAT_DIRECTORY = "directory"
+OUTPUT_FORMAT_DEDUP = "dedup"
+OUTPUT_FORMAT_ZIP = "zip"
+OUTPUT_FORMAT_TAR_ZST = "tar.zst"
+OUTPUT_FORMAT_SQLITE = "sqlite"
+OUTPUT_FORMAT_CHOICES = [OUTPUT_FORMAT_DIRECTORY, OUTPUT_FORMAT_DEDUP, OUTPUT_FORMAT_ZIP, OUTPUT_FORMAT_TAR_ZST,
+    OUTPUT_FORMAT_SQLITE]
+OUTPUT_ARCHIVE_BASENAME = "leetcode_problems"
+OUTPUT_ARCHIVE_PENDING_FILES = 256
+OUTPUT_ZIP_COMPRESSION_LEVEL = 6
+OUTPUT_ZSTD_COMPRESSION_LEVEL = 10
+OUTPUT_SQLITE_COMMIT_EVERY_FILES = 1000
+
+# how `--file-name-policy` names the file of a problem in a programming language. `extension` is just the file
+# extension, so languages that share one (like `python` and `python3`) get the same file name, `language` always
+# adds the language slug before the extension, and `unique` only adds it for languages that share their extension
+# with another language being written. the default is the naming every version before `--file-name-policy` used,
+# so existing folders keep their file names
+FILE_NAME_POLICY_EXTENSION = "extension"
+FILE_NAME_POLICY_LANGUAGE = "language"
+FILE_NAME_POLICY_UNIQUE = "unique"
+FILE_NAME_POLICY_CHOICES = [FILE_NAME_POLICY_EXTENSION, FILE_NAME_POLICY_UNIQUE, FILE_NAME_POLICY_LANGUAGE]
+DEFAULT_FILE_NAME_POLICY = FILE_NAME_POLICY_EXTENSION
+
+# response cache settings
+RESPONSE_CACHE_DATABASE_FILENAME = "leetcode_dl_response_cache.sqlite3"
+RESPONSE_CACHE_COMPRESSION_LEVEL = 6
+DEFAULT_RESPONSE_CACHE_TTL_SECONDS = 60 * 60 * 24
+DEFAULT_RESPONSE_CACHE_MAX_SIZE_BYTES = 512 * 1024 * 1024
+
+# the memo of html -> text conversions lives next to the response cache, and entries that
+# haven't been used in this long get evicted
+CONVERSION_MEMO_DATABASE_FILENAME = "leetcode_dl_html2text_memo.sqlite3"
+CONVERSION_MEMO_MAX_AGE_SECONDS = 60 * 60 * 24 * 30
+
+# the names that `--difficulty` accepts, and the `difficulty.level` that /api/problems/all uses for them
+DIFFICULTY_NAME_TO_LEVEL_DICT = {
+    "easy": 1,
+    "medium": 2,
+    "hard": 3,
+}
 
-REQUESTS_RETRY_LIMIT = 3
-REQUESTS_SECONDS_TO_SLEEP_AFTER_FAILURE = 5
+# what `--paid-only` and `--new-questions` can do with the problems that have that flag set
+SELECTION_INCLUDE = "include"
+SELECTION_EXCLUDE = "exclude"
+SELECTION_ONLY = "only"
+SELECTION_CHOICES = [SELECTION_INCLUDE, SELECTION_EXCLUDE, SELECTION_ONLY]
+
+# the manifest that `--incremental` uses to figure out what changed since the last run. version 2 added the file
+# name policy and the output format, a version 1 manifest doesn't say how its files were named so it gets ignored
+MANIFEST_FILENAME = ".leetcode_dl_manifest.json"
+MANIFEST_VERSION = 2
+
+# the journal of fetched problems that `--resume` picks up from, it is fsync()'d every so many problems or
+# seconds, whichever comes first
+JOURNAL_FILENAME = ".leetcode_dl_journal.jsonl"
+JOURNAL_VERSION = 1
+JOURNAL_FSYNC_EVERY_RECORDS = 64
+JOURNAL_FSYNC_INTERVAL_SECONDS = 1.0
+
+# the binary snapshot of the parsed problems that `--save-snapshot` writes and `--from-snapshot` reads
+SNAPSHOT_MAGIC = b"LCDLSNAP"
+SNAPSHOT_VERSION = 1
+SNAPSHOT_COMPRESSION_LEVEL = 6
+
+# the search index that gets built next to the output, title and slug terms count this many times more than
+# a term in the question content, and the ranking uses BM25 with these parameters
+SEARCH_INDEX_FILENAME = ".leetcode_dl_search_index.sqlite3"
+SEARCH_INDEX_VERSION = 1
+SEARCH_INDEX_COMMIT_EVERY_PROBLEMS = 200
+SEARCH_INDEX_TITLE_WEIGHT = 5
+SEARCH_BM25_K1 = 1.2
+SEARCH_BM25_B = 0.75
+DEFAULT_SEARCH_LIMIT = 20
+
+# metrics settings, the upper bounds (in seconds) of the latency histogram buckets, and how often progress is logged
+METRICS_LATENCY_BUCKETS_SECONDS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+METRICS_PROGRESS_INTERVAL_SECONDS = 5.0
+METRICS_OPENMETRICS_PREFIX = "leetcode_dl"
+
+# `--watch` settings, how long to wait between syncs by default, and where the status endpoint listens (only
+# locally, it isn't meant to be reachable from other machines)
+DEFAULT_WATCH_INTERVAL_SECONDS = 600.0
+WATCH_STATUS_HOST = "127.0.0.1"
 
 USER_AGENT_STRING = "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:69.0) Gecko/20100101 Firefox/69.0"
 
-# jmespath expresson for getting out the question list in the api/problems/all API
-JMESPATH_API_PROBLEMS_ALL_SEARCH_QUERY = jmespath.compile("stat_status_pairs")
-
-# jmespath expression for getting various parts of data out in the response from
-# the graphql questionData API
-JMESPATH_Q_QUESTION_ID = jmespath.compile("stat.question_id")
-JMESPATH_Q_TITLE = jmespath.compile("stat.question__title")
-JMESPATH_Q_SLUG = jmespath.compile("stat.question__title_slug")
-JMESPATH_Q_DIFFICULTY = jmespath.compile("difficulty.level")
-JMESPATH_Q_PAID_ONLY = jmespath.compile("paid_only")
-
-JMESPATH_Q_CONTENT = jmespath.compile("data.question.content")
-JMESPATH_Q_CODE_SNIPPETS = jmespath.compile("data.question.codeSnippets")
-
-JMESPATH_Q_CODE_SNIPPET_LANGUAGE = jmespath.compile("lang")
-JMESPATH_Q_CODE_SNIPPET_LANGUAGE_SLUG = jmespath.compile("langSlug")
-JMESPATH_Q_CODE_SNIPPET_CONTENT = jmespath.compile("code")
-
 # https://docs.microsoft.com/en-us/windows/win32/fileio/naming-a-file?redirectedfrom=MSDN#file-and-directory-names
 INVALID_FILEPATH_CHARACTER_LIST = ["<", ">", ":", '"', "/", "\\", "|", "?", "*"]
 _invalid_filepath_character_list_joined = "".join(INVALID_FILEPATH_CHARACTER_LIST)
@@ -81,13 +182,34 @@ GRAPHQL_QUESTIONDATA_QUERY = '''query questionData($titleSlug: String!) {
 
 '''
 
+# the fields that the batched questionData query asks for, for each aliased `question` selection,
+# keep this in sync with GRAPHQL_QUESTIONDATA_QUERY
+GRAPHQL_QUESTIONDATA_FRAGMENT_NAME = "questionDataFields"
+GRAPHQL_QUESTIONDATA_FRAGMENT = f'''fragment {GRAPHQL_QUESTIONDATA_FRAGMENT_NAME} on QuestionNode {{
+  questionId
+  questionFrontendId
+  boundTopicId
+  title
+  titleSlug
+  content
+  codeSnippets {{
+    lang
+    langSlug
+    code
+    __typename
+  }}
+}}
+
+'''
+
+GRAPHQL_BATCHED_QUESTIONDATA_OPERATION_NAME = "questionDataBatch"
+
 # common headers for making requests to leetcode
 COMMON_HEADERS = {"Host": "leetcode.com",
     "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
     "Accept-Language": "en-US,en;q=0.5",
-     # their server supports 'brotli' so if you put 'br' in here you get back binary
-     # instead of JSON text
-    "Accept-Encoding": "gzip, deflate",
+    # `Accept-Encoding` gets filled in by the transport with only the encodings it can decode, asking for
+    # `br` without the `brotli` package installed gets you back brotli compressed binary instead of JSON text
     "DNT": "1",
     "Connection": "keep-alive",
     "Referer": "https://leetcode.com/",
@@ -0,0 +1,203 @@
+import concurrent.futures
+import hashlib
+import logging
+import multiprocessing
+import pathlib
+import sqlite3
+import threading
+import time
+import typing
+import zlib
+
+from leetcode_dl import constants
+
+# html2text is imported by the functions that use it, so runs that never convert anything (like rendering a
+# snapshot) don't pay to import it
+if typing.TYPE_CHECKING:
+    import html2text
+
+logger = logging.getLogger(__name__)
+
+def make_text_converter() -> "html2text.HTML2Text":
+    ''' returns a HTML2Text instance set up the way we want the question content converted
+
+    @return a HTML2Text instance
+    '''
+
+    import html2text
+
+    text_converter = html2text.HTML2Text()
+    text_converter.unicode_snob = True
+    text_converter.mark_code = True
+    return text_converter
+
+def get_conversion_cache_key(question_html:str) -> str:
+    ''' returns the key that a conversion gets memoized under, this includes the html2text version
+    so upgrading html2text doesn't serve stale conversions
+
+    @param question_html the html that is being converted
+    @return the key as a hex string
+    '''
+
+    import html2text
+
+    hasher = hashlib.sha256()
+    hasher.update(f"{html2text.__version__}\0".encode("utf-8"))
+    hasher.update(question_html.encode("utf-8"))
+    return hasher.hexdigest()
+
+# each process in the pool gets its own HTML2Text instance, since it isn't thread (or process) safe
+_worker_text_converter = None
+
+def _init_conversion_worker():
+    global _worker_text_converter
+    _worker_text_converter = make_text_converter()
+
+def _convert_in_worker(question_html:str) -> str:
+    return _worker_text_converter.handle(question_html)
+
+class ConversionMemo:
+    ''' an on disk memo of html -> text conversions, keyed by a hash of the html, so a question whose
+    content hasn't changed never gets converted again, even across runs
+
+    entries that haven't been used in `max_age_seconds` get evicted when the memo is closed
+    '''
+
+    def __init__(self, memo_dir:pathlib.Path, max_age_seconds:float):
+        '''
+        constructor
+
+        @param memo_dir the folder to store the sqlite database in
+        @param max_age_seconds entries that haven't been used in this many seconds get evicted
+        '''
+
+        self.db_path = pathlib.Path(memo_dir) / constants.CONVERSION_MEMO_DATABASE_FILENAME
+        self.max_age_seconds = max_age_seconds
+
+        # the downloader calls into us from multiple threads, so share one connection behind a lock
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self.connection.execute('''CREATE TABLE IF NOT EXISTS conversions (
+            html_hash TEXT PRIMARY KEY,
+            text BLOB NOT NULL,
+            last_accessed REAL NOT NULL)''')
+        self.connection.commit()
+
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, html_hash:str) -> typing.Optional[str]:
+        '''
+        @param html_hash the key from get_conversion_cache_key()
+        @return the memoized text, or None if we don't have it
+        '''
+
+        with self.lock:
+            row = self.connection.execute("SELECT text FROM conversions WHERE html_hash = ?", (html_hash,)).fetchone()
+
+            if row is None:
+                self.misses += 1
+                return None
+
+            self.connection.execute("UPDATE conversions SET last_accessed = ? WHERE html_hash = ?", (time.time(), html_hash))
+            self.connection.commit()
+            self.hits += 1
+
+        return zlib.decompress(row[0]).decode("utf-8")
+
+    def put(self, html_hash:str, text:str):
+        '''
+        @param html_hash the key from get_conversion_cache_key()
+        @param text the converted text
+        '''
+
+        compressed_text = zlib.compress(text.encode("utf-8"), constants.RESPONSE_CACHE_COMPRESSION_LEVEL)
+
+        with self.lock:
+            self.connection.execute("INSERT OR REPLACE INTO conversions VALUES (?, ?, ?)",
+                (html_hash, compressed_text, time.time()))
+            self.connection.commit()
+
+    def close(self):
+        ''' evicts old entries and closes the database
+        '''
+
+        with self.lock:
+            evicted_count = self.connection.execute("DELETE FROM conversions WHERE last_accessed < ?",
+                (time.time() - self.max_age_seconds,)).rowcount
+            self.connection.commit()
+            self.connection.close()
+
+        logger.info("html conversion memo had `%s` hits and `%s` misses, evicted `%s` old entries",
+            self.hits, self.misses, evicted_count)
+
+class HtmlToTextConverter:
+    ''' converts the question content html into markdown-ish text
+
+    conversions are looked up in the (optional) ConversionMemo first. anything that isn't memoized is either
+    converted right here (one thread at a time, since HTML2Text isn't thread safe), or if `workers` is more than 0,
+    on a process pool so that conversion scales across cores
+    '''
+
+    def __init__(self, workers:int, memo:typing.Optional[ConversionMemo]):
+        '''
+        constructor
+
+        @param workers how many processes to convert with, 0 converts in the calling thread
+        @param memo the ConversionMemo to use, or None to not memoize anything
+        '''
+
+        self.memo = memo
+
+        # created the first time something needs converting
+        self.text_converter = None
+        self.text_converter_lock = threading.Lock()
+
+        self.process_pool = None
+        if workers > 0:
+            # NOTE: spawn rather than fork, the pool starts its processes lazily, which would be from one of
+            # the fetch threads, and forking a process that has threads running can deadlock
+            self.process_pool = concurrent.futures.ProcessPoolExecutor(max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_conversion_worker)
+
+            logger.info("converting question content on `%s` processes", workers)
+
+    def convert(self, question_html:str) -> str:
+        '''
+        converts the html into text, this is safe to call from multiple threads at once
+
+        @param question_html the html string we got from the questionData api
+        @return the converted text
+        '''
+
+        html_hash = None
+        if self.memo:
+            html_hash = get_conversion_cache_key(question_html)
+            memoized_text = self.memo.get(html_hash)
+            if memoized_text is not None:
+                return memoized_text
+
+        if self.process_pool:
+            result = self.process_pool.submit(_convert_in_worker, question_html).result()
+        else:
+            # the HTML2Text instance keeps state while it is parsing, so we only let one thread use it at a time
+            with self.text_converter_lock:
+                if self.text_converter is None:
+                    self.text_converter = make_text_converter()
+                result = self.text_converter.handle(question_html)
+
+        if self.memo:
+            self.memo.put(html_hash, result)
+
+        return result
+
+    def close(self):
+        ''' shuts down the process pool and closes the memo
+        '''
+
+        if self.process_pool:
+            self.process_pool.shutdown(wait=True)
+
+        if self.memo:
+            self.memo.close()
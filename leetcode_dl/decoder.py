@@ -0,0 +1,381 @@
+import codecs
+import json
+import logging
+import re
+import typing
+
+from leetcode_dl.model import SingleLeetcodeProblemCodeSnippet, SingleLeetcodeProblem, make_code_snippet
+
+logger = logging.getLogger(__name__)
+
+# the paths of the fields we pull out of the api responses, along with a description that gets put in the error
+# message if the field is missing
+
+# fields of the /api/problems/all response
+FIELD_API_PROBLEMS_ALL_LIST = (("stat_status_pairs",), "problems list")
+
+# fields of a single entry in the `stat_status_pairs` list of the /api/problems/all response
+FIELD_Q_QUESTION_ID = (("stat", "question_id"), "single question -> question_id")
+FIELD_Q_TITLE = (("stat", "question__title"), "single question -> title")
+FIELD_Q_SLUG = (("stat", "question__title_slug"), "single question -> slug")
+FIELD_Q_DIFFICULTY = (("difficulty", "level"), "single question -> difficulty")
+FIELD_Q_PAID_ONLY = (("paid_only",), "single question -> paid only")
+
+# fields of the graphql questionData response
+FIELD_Q_CONTENT = (("data", "question", "content"), "question data -> content")
+FIELD_Q_CODE_SNIPPETS = (("data", "question", "codeSnippets"), "question data -> code snippets")
+
+# fields of a single entry in the `codeSnippets` list of the graphql questionData response
+FIELD_Q_CODE_SNIPPET_LANGUAGE = (("lang",), "question data -> code snippet -> language")
+FIELD_Q_CODE_SNIPPET_LANGUAGE_SLUG = (("langSlug",), "question data -> code snippet -> language slug")
+FIELD_Q_CODE_SNIPPET_CONTENT = (("code",), "question data -> code snippet -> code")
+
+def get_field(dict_to_search:dict, field:typing.Tuple[typing.Tuple[str, ...], str]):
+    ''' gets a (possibly nested) field out of a dictionary, raising an exception if it is missing or None
+
+    this is the slow path that the decode functions fall back to so that they can say exactly which field
+    was missing
+
+    @param dict_to_search the dictionary to get the field out of
+    @param field one of the FIELD_* tuples, the path of keys and a description for the error message
+    @return the value of the field
+    '''
+
+    field_path, description = field
+
+    result = dict_to_search
+    for iter_key in field_path:
+        if not isinstance(result, dict):
+            result = None
+            break
+        result = result.get(iter_key)
+
+    if result is None:
+        raise Exception(f"field `{'.'.join(field_path)}` (`{description}`) was missing or None")
+
+    return result
+
+def _raise_for_missing_field(dict_to_search:dict, field_list:typing.Sequence[typing.Tuple[typing.Tuple[str, ...], str]]):
+    ''' goes through the given fields with get_field() so that the first missing one raises a helpful exception
+
+    @param dict_to_search the dictionary we failed to decode
+    @param field_list the FIELD_* tuples that the decode function pulls out of the dictionary
+    '''
+
+    for iter_field in field_list:
+        get_field(dict_to_search, iter_field)
+
+    # this shouldn't happen, but don't hide the original problem if it does
+    raise Exception(f"failed to decode `{dict_to_search}`, but every field was present")
+
+_SINGLE_QUESTION_FIELD_LIST = [FIELD_Q_QUESTION_ID, FIELD_Q_TITLE, FIELD_Q_SLUG, FIELD_Q_DIFFICULTY, FIELD_Q_PAID_ONLY]
+
+def decode_api_problems_all_problem(problem_dict:dict) -> SingleLeetcodeProblem:
+    ''' decodes a single entry in the `stat_status_pairs` list of the /api/problems/all response
+
+    NOTE: we get rid of any extra spaces that might be at the end for title and slug, as some of them
+    have trailing spaces which causes problem we we save the problem to disk
+
+    @param problem_dict the dictionary for a single problem
+    @return a SingleLeetcodeProblem without the question content or the code snippets
+    '''
+
+    try:
+        stat_dict = problem_dict["stat"]
+        question_id = stat_dict["question_id"]
+        title = stat_dict["question__title"]
+        slug = stat_dict["question__title_slug"]
+        difficulty = problem_dict["difficulty"]["level"]
+        paid_only = problem_dict["paid_only"]
+
+        # this one is only used for `--new-questions`, so it is optional
+        is_new_question = bool(stat_dict.get("is_new_question"))
+
+        if question_id is None or title is None or slug is None or difficulty is None or paid_only is None:
+            raise KeyError()
+
+    except (KeyError, TypeError):
+        _raise_for_missing_field(problem_dict, _SINGLE_QUESTION_FIELD_LIST)
+
+    return SingleLeetcodeProblem(
+        question_id=question_id,
+        title=title.strip(),
+        slug=slug.strip(),
+        difficulty=difficulty,
+        paid_only=paid_only,
+        is_new_question=is_new_question,
+        question_content=None,
+        code_snippets=None)
+
+def decode_api_problems_all_response(response_dict:dict) -> typing.List[SingleLeetcodeProblem]:
+    ''' decodes the response from leetcode.com/api/problems/all
+
+    @param response_dict the dictionary we get from the web request that contains the problems
+    @return a list of SingleLeetcodeProblem objects, sorted by question_id, without the question content
+        or code snippets
+    '''
+
+    problems_list = get_field(response_dict, FIELD_API_PROBLEMS_ALL_LIST)
+
+    result_list = [decode_api_problems_all_problem(x) for x in problems_list]
+    result_list.sort(key=lambda x: x.question_id)
+
+    return result_list
+
+# the characters json allows between values
+_JSON_WHITESPACE_REGEX = re.compile(r"[ \t\n\r]*")
+
+# what can come after a value in an array, along with the whitespace around it
+_JSON_ARRAY_SEPARATOR_REGEX = re.compile(r"[ \t\n\r]*([,\]])[ \t\n\r]*")
+
+class JsonChunkReader:
+    ''' reads json values one at a time out of a document that arrives in chunks, so a document with a huge
+    array in it can be walked without ever having the whole thing (or its decoded tree) in memory
+
+    only the part of the document that hasn't been read yet (usually less than a chunk) is kept around
+    '''
+
+    def __init__(self, chunk_iterable:typing.Iterable[bytes]):
+        '''
+        constructor
+
+        @param chunk_iterable the utf-8 encoded document, in chunks of any size
+        '''
+
+        self.chunk_iterator = iter(chunk_iterable)
+        self.text_decoder = codecs.getincrementaldecoder("utf-8")()
+        self.json_decoder = json.JSONDecoder()
+
+        self.buffer = ""
+        self.position = 0
+        self.at_end = False
+
+    def _read_more(self) -> bool:
+        '''
+        appends the next chunk to the buffer, dropping the part of the buffer that was already read
+
+        @return False if there was nothing left to read
+        '''
+
+        if self.at_end:
+            return False
+
+        next_chunk = next(self.chunk_iterator, None)
+        if next_chunk is None:
+            self.at_end = True
+            new_text = self.text_decoder.decode(b"", final=True)
+        else:
+            new_text = self.text_decoder.decode(next_chunk)
+
+        self.buffer = self.buffer[self.position:] + new_text
+        self.position = 0
+
+        return True
+
+    def _skip_whitespace(self) -> bool:
+        '''
+        moves past any whitespace, reading more if we run out
+
+        @return False if the document ended before anything other than whitespace
+        '''
+
+        while True:
+            self.position = _JSON_WHITESPACE_REGEX.match(self.buffer, self.position).end()
+            if self.position < len(self.buffer):
+                return True
+            if not self._read_more():
+                return False
+
+    def read_character(self) -> str:
+        '''
+        @return the next character that isn't whitespace, like a `{`, `,` or `]`
+        '''
+
+        if not self._skip_whitespace():
+            raise Exception("the json document ended early")
+
+        character = self.buffer[self.position]
+        self.position += 1
+        return character
+
+    def peek_character(self) -> str:
+        '''
+        @return the next character that isn't whitespace, without reading it
+        '''
+
+        if not self._skip_whitespace():
+            raise Exception("the json document ended early")
+
+        return self.buffer[self.position]
+
+    def read_value(self):
+        '''
+        @return the next complete json value, decoded
+        '''
+
+        if not self._skip_whitespace():
+            raise Exception("the json document ended early")
+
+        while True:
+            try:
+                value, end = self.json_decoder.raw_decode(self.buffer, self.position)
+
+                # a number at the very end of the buffer might have more digits in the next chunk
+                if end < len(self.buffer) or self.at_end:
+                    self.position = end
+                    return value
+
+            except json.JSONDecodeError as e:
+                if self.at_end:
+                    raise e
+
+            # the value doesn't fit in what we have so far
+            self._read_more()
+
+    def read_end(self):
+        '''
+        reads the rest of the document, which can only be whitespace, so the chunks all get read
+        '''
+
+        if self._skip_whitespace():
+            raise Exception(f"expected the json document to end, got `{self.buffer[self.position:self.position + 20]}`")
+
+    def iter_array_values(self) -> typing.Iterator:
+        '''
+        reads the values of an array one at a time, call this once the `[` has been read, and it stops once
+        the `]` has been read
+
+        this is the same as calling read_value() and read_character() for every value, without going through
+        them (and their whitespace skipping) once per value, since the arrays we walk have a lot of values
+
+        @return a generator of the decoded values
+        '''
+
+        if self.peek_character() == "]":
+            self.position += 1
+            return
+
+        raw_decode = self.json_decoder.raw_decode
+        separator_match = _JSON_ARRAY_SEPARATOR_REGEX.match
+
+        while True:
+            try:
+                value, end = raw_decode(self.buffer, self.position)
+            except json.JSONDecodeError as e:
+                if self.at_end:
+                    raise e
+
+                # the value doesn't fit in what we have so far
+                self._read_more()
+                continue
+
+            # the value needs a separator after it in the buffer, otherwise a number at the very end of the buffer
+            # might have more digits in the next chunk, and the separator might be in the next chunk anyway
+            separator = separator_match(self.buffer, end)
+            if separator is None or separator.end() == len(self.buffer):
+                if not self.at_end:
+                    self._read_more()
+                    continue
+
+                if separator is None:
+                    raise Exception("expected a `,` or `]` after a value in an array")
+
+            self.position = separator.end()
+            yield value
+
+            if separator.group(1) == "]":
+                return
+
+def iter_decode_api_problems_all_chunks(chunk_iterable:typing.Iterable[bytes]) -> typing.Iterator[SingleLeetcodeProblem]:
+    ''' decodes the response from leetcode.com/api/problems/all as it is read, yielding each problem as soon as it
+    has been decoded, so neither the whole response nor its decoded json has to be in memory at once
+
+    every field other than `stat_status_pairs` is skipped over
+
+    @param chunk_iterable the body of the response, in chunks, like `requests.Response.iter_content()` returns
+    @return a generator of SingleLeetcodeProblem objects, without the question content or code snippets, in the
+        order the response has them in (which is NOT sorted by question_id)
+    '''
+
+    json_reader = JsonChunkReader(chunk_iterable)
+
+    if json_reader.read_character() != "{":
+        raise Exception("the /api/problems/all response is not a json object")
+
+    found_problems_list = False
+    if json_reader.peek_character() == "}":
+        json_reader.read_character()
+    else:
+        while True:
+            key = json_reader.read_value()
+            if json_reader.read_character() != ":":
+                raise Exception(f"expected a `:` after the key `{key}` in the /api/problems/all response")
+
+            # the value can be null, which get_field() treats as missing
+            if key == FIELD_API_PROBLEMS_ALL_LIST[0][0] and json_reader.peek_character() == "[":
+                found_problems_list = True
+                json_reader.read_character()
+
+                for iter_problem_dict in json_reader.iter_array_values():
+                    yield decode_api_problems_all_problem(iter_problem_dict)
+            else:
+                json_reader.read_value()
+
+            separator = json_reader.read_character()
+            if separator == "}":
+                break
+            elif separator != ",":
+                raise Exception(f"expected a `,` or `}}` in the /api/problems/all response, got `{separator}`")
+
+    json_reader.read_end()
+
+    if not found_problems_list:
+        field_path, description = FIELD_API_PROBLEMS_ALL_LIST
+        raise Exception(f"field `{'.'.join(field_path)}` (`{description}`) was missing or None")
+
+_CODE_SNIPPET_FIELD_LIST = [FIELD_Q_CODE_SNIPPET_LANGUAGE, FIELD_Q_CODE_SNIPPET_LANGUAGE_SLUG, FIELD_Q_CODE_SNIPPET_CONTENT]
+
+def decode_code_snippet(code_snippet_dict:dict,
+        code_snippet_memo:typing.Optional[typing.Dict[str, str]]=None) -> SingleLeetcodeProblemCodeSnippet:
+    ''' decodes a single entry in the `codeSnippets` list of the graphql questionData response
+
+    @param code_snippet_dict the dictionary for a single code snippet
+    @param code_snippet_memo see `make_code_snippet()`
+    @return a SingleLeetcodeProblemCodeSnippet
+    '''
+
+    try:
+        language = code_snippet_dict["lang"]
+        language_slug = code_snippet_dict["langSlug"]
+        code_snippet = code_snippet_dict["code"]
+
+        if language is None or language_slug is None or code_snippet is None:
+            raise KeyError()
+
+    except (KeyError, TypeError):
+        _raise_for_missing_field(code_snippet_dict, _CODE_SNIPPET_FIELD_LIST)
+
+    return make_code_snippet(language, language_slug, code_snippet, code_snippet_memo)
+
+def decode_question_data_response(res_json_dict:dict) -> typing.Tuple[str, typing.List[SingleLeetcodeProblemCodeSnippet]]:
+    ''' decodes the response from the graphql questionData API
+
+    @param res_json_dict the dictionary we got from the questionData response
+    @return a tuple of the question content html, and a list of SingleLeetcodeProblemCodeSnippet objects
+    '''
+
+    try:
+        question_dict = res_json_dict["data"]["question"]
+        question_html = question_dict["content"]
+        code_snippet_list = question_dict["codeSnippets"]
+
+        if question_html is None or code_snippet_list is None:
+            raise KeyError()
+
+    except (KeyError, TypeError):
+        _raise_for_missing_field(res_json_dict, [FIELD_Q_CONTENT, FIELD_Q_CODE_SNIPPETS])
+
+    # identical snippets of the same problem share the same string
+    code_snippet_memo = dict()
+
+    return question_html, [decode_code_snippet(x, code_snippet_memo) for x in code_snippet_list]
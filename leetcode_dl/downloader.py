@@ -1,25 +1,34 @@
-import sys
 import argparse
 import pathlib
 import typing
 import time
 import logging
 import json
+import collections
+import concurrent.futures
+import urllib.parse
 
 # third party imports
-import arrow
+# NOTE: requests and html2text only get imported once something needs them (see transport.py and convert.py),
+# so rendering a snapshot never imports them
 import attr
-import requests
-import logging_tree
-import html2text
-import jmespath
 
-from leetcode_dl.model import SingleLeetcodeProblemCodeSnippet, SingleLeetcodeProblem, AllLeetcodeProblems, UrlRequest
+from leetcode_dl.model import SingleLeetcodeProblem, AllLeetcodeProblems, UrlRequest
 from leetcode_dl import constants
+from leetcode_dl import decoder
+from leetcode_dl import convert
+from leetcode_dl import ratelimit
+from leetcode_dl import metrics
+from leetcode_dl import transport
+from leetcode_dl.cache import ResponseCache, CachedResponse
+from leetcode_dl.manifest import ProblemManifest
+from leetcode_dl.snapshot import ProblemSnapshot
+from leetcode_dl.journal import ProgressJournal
+from leetcode_dl.selection import ProblemSelection
+from leetcode_dl import utils
 
 
 logger = logging.getLogger(__name__)
-jmespath_logger = logger.getChild("jmespath")
 
 class LeetcodeProblemDownloader:
     '''main application class
@@ -34,22 +43,126 @@ class LeetcodeProblemDownloader:
         self.logger = logger
         self.args = args
 
-        self.rsession = requests.session()
+        # can be pointed somewhere else, like the simulator in `leetcode_simulator.py`
+        self.base_url = (getattr(self.args, "base_url", None) or constants.LEETCODE_BASE_URL).rstrip("/")
+
+        # counters and latency histograms for everything the sync does
+        self.metrics = metrics.SyncMetrics()
+
+        # every worker thread gets its own connection to keep alive, a snapshot doesn't need the network at all
+        self.transport = None
+        if not getattr(self.args, "from_snapshot", None):
+            self.transport = transport.RequestsTransport(pool_size=self.get_max_concurrency())
+
+        self.response_cache = None
+        conversion_memo = None
+        if getattr(self.args, "cache_dir", None):
+            self.response_cache = ResponseCache(self.args.cache_dir,
+                ttl_seconds=self.args.cache_ttl,
+                max_size_bytes=self.args.cache_max_size)
+            conversion_memo = convert.ConversionMemo(self.args.cache_dir,
+                max_age_seconds=constants.CONVERSION_MEMO_MAX_AGE_SECONDS)
+
+        self.html_converter = convert.HtmlToTextConverter(
+            workers=getattr(self.args, "conversion_workers", None) or 0,
+            memo=conversion_memo)
+
+        # shared by every thread making requests
+        self.rate_limiter = ratelimit.AdaptiveRateLimiter(
+            initial_rate=getattr(self.args, "requests_per_second", None) or constants.DEFAULT_REQUESTS_PER_SECOND,
+            min_rate=constants.RATE_LIMITER_MIN_REQUESTS_PER_SECOND,
+            max_rate=getattr(self.args, "max_requests_per_second", None) or constants.DEFAULT_MAX_REQUESTS_PER_SECOND,
+            burst=self.get_max_concurrency(),
+            increase_factor=constants.RATE_LIMITER_INCREASE_FACTOR,
+            decrease_factor=constants.RATE_LIMITER_DECREASE_FACTOR,
+            decrease_cooldown_seconds=constants.RATE_LIMITER_DECREASE_COOLDOWN_SECONDS)
+
+        # which problems we were asked for, see `--difficulty`, `--shard` and friends
+        self.selection = ProblemSelection.from_args(self.args)
+
+        # `--watch` only ever writes what changed, so it always has a manifest
+        self.manifest = None
+        if getattr(self.args, "incremental", False) or getattr(self.args, "watch", False):
+            self.manifest = ProblemManifest.load(self.args.path_to_save_to / constants.MANIFEST_FILENAME)
+
+        # the `If-None-Match` / `If-Modified-Since` headers for the next poll_api_problems_all()
+        self.api_problems_all_validator_headers = dict()
+
+        # every problem we fetch gets journaled, so a sync that dies can be picked up again with `--resume`
+        self.journal = None
+        if getattr(self.args, "path_to_save_to", None) and not getattr(self.args, "from_snapshot", None) \
+                and not getattr(self.args, "no_journal", False):
+            self.journal = ProgressJournal(self.args.path_to_save_to / constants.JOURNAL_FILENAME,
+                resume=getattr(self.args, "resume", False),
+                discard=getattr(self.args, "discard_journal", False))
+
+
+    def close(self):
+        '''
+        cleans up anything the downloader is holding on to
+        '''
+
+        if self.response_cache:
+            self.response_cache.close()
 
-        self.rsession.headers.update({'User-Agent': constants.USER_AGENT_STRING})
+        self.html_converter.close()
 
-        self.text_converter = html2text.HTML2Text()
-        self.text_converter.unicode_snob = True
-        self.text_converter.mark_code = True
+        if self.transport:
+            self.transport.close()
+
+        # if the sync completed then the journal was already closed (and deleted), otherwise keep it for `--resume`
+        if self.journal:
+            self.journal.close()
+
+
+    def get_common_headers(self) -> dict:
+        '''
+        returns the headers we send with every request, pointed at our base url
+
+        @return a new dict of the headers, that is safe to modify
+        '''
+
+        # don't modify the constant value
+        headers = constants.COMMON_HEADERS.copy()
+
+        headers["Host"] = urllib.parse.urlsplit(self.base_url).netloc
+        headers["Referer"] = f"{self.base_url}/"
+
+        # only ask for what the transport can decode
+        headers["Accept-Encoding"] = self.transport.get_accept_encoding()
+
+        return headers
 
 
     def make_requests_call(self, request_to_make:UrlRequest) -> UrlRequest:
+        '''
+        makes the http request described by the UrlRequest, retrying if it fails
+
+        if the request has a `cache_key` and we have a response cache, a fresh cached response is
+        returned without hitting the network, and successful responses get stored in the cache (a streamed
+        one once its body has been read, see iter_response_chunks())
 
+        @param request_to_make the UrlRequest to make
+        @return a new UrlRequest with the `response` attribute set
+        '''
+
+        if self.response_cache and request_to_make.cache_key:
+            cached_response = self.response_cache.get(request_to_make.cache_key)
+            if cached_response:
+                self.logger.debug("http request served from the response cache: %s - %s",
+                    request_to_make.method, request_to_make.url)
+                self.metrics.increment(metrics.COUNTER_HTTP_CACHE_HITS)
+                return attr.evolve(request_to_make, response=cached_response.to_requests_response(), from_cache=True)
+
+        retry_limit = self.get_retry_limit()
 
         exception_list = []
-        for iter_try in range(constants.REQUESTS_RETRY_LIMIT):
+        for iter_try in range(retry_limit):
             result = None
 
+            # wait our turn, this is what paces all of the threads making requests
+            self.rate_limiter.acquire()
+
             try:
                 self.logger.debug("http request (try `%s`): %s - %s", iter_try, request_to_make.method, request_to_make.url)
 
@@ -59,53 +172,109 @@ class LeetcodeProblemDownloader:
                 # with a different body= or json= parameter
                 if request_to_make.body_is_json:
                     actual_body = json.dumps(request_to_make.body)
-                result = self.rsession.request(
-                    method=request_to_make.method,
-                    url=request_to_make.url,
-                    headers=request_to_make.headers,
-                    params=request_to_make.query,
-                    data=actual_body)
 
+                self.metrics.increment(metrics.COUNTER_HTTP_REQUESTS)
+                if iter_try > 0:
+                    self.metrics.increment(metrics.COUNTER_HTTP_RETRIES)
+                if actual_body:
+                    self.metrics.increment(metrics.COUNTER_HTTP_BYTES_SENT, len(actual_body))
+
+                with self.metrics.time_stage(metrics.STAGE_HTTP_REQUEST):
+                    transport_response = self.transport.send(
+                        method=request_to_make.method,
+                        url=request_to_make.url,
+                        headers=request_to_make.headers,
+                        params=request_to_make.query,
+                        data=actual_body,
+                        stream=request_to_make.stream)
 
-            except requests.RequestException as e:
+                result = transport_response.response
+
+
+            except transport.TransportError as e:
                 # add the exception and try again
-                self.logger.exception(f"Error processing request (try `{iter_try}`): `{request_to_make}`")
+                self.logger.exception("Error processing request (try `%s`): `%s`", iter_try, request_to_make)
                 exception_list.append(e)
-                time.sleep(constants.REQUESTS_SECONDS_TO_SLEEP_AFTER_FAILURE)
+                self.metrics.increment(metrics.COUNTER_HTTP_FAILURES)
+                self.rate_limiter.on_throttle()
+                self.sleep_before_retry(iter_try, retry_limit)
                 continue
 
-            self.logger.debug("http request (try `%s`): %s - %s -> %s",
-                iter_try, request_to_make.method, request_to_make.url, result.status_code)
+            # the body of a streamed response gets counted as it is read
+            if request_to_make.stream and result.status_code in request_to_make.allowed_status_codes:
+                self.logger.debug("http request (try `%s`): %s - %s -> %s, streaming the body (`%s` encoded)",
+                    iter_try, request_to_make.method, request_to_make.url, result.status_code,
+                    transport_response.content_encoding)
+            else:
+                self.logger.debug("http request (try `%s`): %s - %s -> %s, `%s` bytes (`%s` bytes `%s` encoded)",
+                    iter_try, request_to_make.method, request_to_make.url, result.status_code, len(result.content),
+                    self.transport.get_wire_bytes(result), transport_response.content_encoding)
+
+                self.metrics.increment(metrics.COUNTER_HTTP_BYTES_RECEIVED, len(result.content))
+                self.metrics.increment(metrics.COUNTER_HTTP_WIRE_BYTES_RECEIVED, self.transport.get_wire_bytes(result))
 
-            if result.status_code != 200:
-                e = Exception(f"(try {iter_try}) Request returned non 200 status code `{result.status_code}` with the request `{request_to_make}`, and cookies: `{self.rsession.cookies}`, and text: `{result.text}`, raw: `{result.request.body}`")
+            if result.status_code not in request_to_make.allowed_status_codes:
+                e = Exception(f"(try {iter_try}) Request returned non 200 status code `{result.status_code}` with the request `{request_to_make}`, and cookies: `{self.transport.get_cookies()}`, and text: `{result.text}`, raw: `{result.request.body}`")
                 exception_list.append(e)
-                time.sleep(constants.REQUESTS_SECONDS_TO_SLEEP_AFTER_FAILURE)
+                self.metrics.increment(metrics.COUNTER_HTTP_FAILURES)
+
+                # give the connection back to the pool now, rather than whenever the response gets garbage collected,
+                # a streamed one would otherwise keep it checked out while we sleep (and after we give up)
+                result.close()
+
+                # only back off the rate if the server is telling us to slow down or is struggling
+                retry_after_seconds = None
+                if result.status_code in constants.THROTTLE_STATUS_CODES:
+                    self.metrics.increment(metrics.COUNTER_HTTP_THROTTLED)
+                    retry_after_seconds = ratelimit.parse_retry_after(result.headers.get("Retry-After"))
+                    self.rate_limiter.on_throttle(retry_after_seconds)
+
+                self.sleep_before_retry(iter_try, retry_limit, retry_after_seconds)
                 continue
             else:
+                self.rate_limiter.on_success()
+
+                # a 304 doesn't have a body worth keeping
+                if (self.response_cache and request_to_make.cache_key and result.status_code == 200
+                        and not request_to_make.stream):
+                    self.response_cache.put(request_to_make.cache_key, result)
+
                 return attr.evolve(request_to_make, response=result)
 
-        self.logger.error("reached retry limit of `%s`, caught exceptions: `%s`", constants.REQUESTS_RETRY_LIMIT, exception_list)
-        raise Exception(f"retry limit reached ({constants.REQUESTS_RETRY_LIMIT} and all failed: `{exception_list}`")
+        self.logger.error("reached retry limit of `%s`, caught exceptions: `%s`", retry_limit, exception_list)
+        raise Exception(f"retry limit reached ({retry_limit} and all failed: `{exception_list}`")
 
 
-    def jmespath_search_helper(self, jmespath_compiled_query, dict_to_search, description):
+    def sleep_before_retry(self, attempt:int, retry_limit:int, retry_after_seconds:typing.Optional[float]=None):
         '''
-        helper that runs a jmespath search and raises an exception if we get None back
+        sleeps with jittered exponential backoff after a failed request, unless it was the last attempt
 
-        @param dict_to_search the dictionary to search using .search()
-        @param jmespath_compiled_query the query object to call search on
-        @param description a string that gets inserted into the log message
-        @return the result of the .search() call or throws an exception
+        @param attempt which attempt just failed, starting at 0
+        @param retry_limit how many attempts we make in total
+        @param retry_after_seconds what the server told us to wait in a `Retry-After` header, if anything
         '''
 
-        jmespath_search_result = jmespath_compiled_query.search(dict_to_search)
+        if attempt + 1 >= retry_limit:
+            return
+
+        backoff_seconds = ratelimit.compute_backoff_seconds(attempt,
+            base_seconds=constants.REQUESTS_BACKOFF_BASE_SECONDS,
+            max_seconds=constants.REQUESTS_BACKOFF_MAX_SECONDS,
+            retry_after_seconds=retry_after_seconds)
 
-        if jmespath_search_result == None:
-            raise Exception(
-                f"jmespath compiled search `{jmespath_compiled_query}` (`{description}`) returned None")
+        self.logger.debug("sleeping for `%.2f` seconds before retrying...", backoff_seconds)
+        time.sleep(backoff_seconds)
 
-        return jmespath_search_result
+
+    def get_retry_limit(self) -> int:
+        '''
+        returns how many times we try a request before giving up
+
+        @return the retry limit, at least 1
+        '''
+
+        retry_limit = getattr(self.args, "retry_limit", None) or constants.REQUESTS_RETRY_LIMIT
+        return max(1, retry_limit)
 
 
     def parse_api_problems_all_response(self, response_dict:dict) -> AllLeetcodeProblems:
@@ -117,45 +286,45 @@ class LeetcodeProblemDownloader:
         @return a AllLeetcodeProblems object
         '''
 
-        result_dict = dict()
-
         try:
+            self.logger.info("have `%s` questions to parse", len(response_dict.get("stat_status_pairs") or []))
 
-            problems_list_result = self.jmespath_search_helper(
-                constants.JMESPATH_API_PROBLEMS_ALL_SEARCH_QUERY, response_dict, "problems list")
+            # the decoder hands them back sorted by question id
+            with self.metrics.time_stage(metrics.STAGE_PARSE_API_PROBLEMS_ALL):
+                problems_list = decoder.decode_api_problems_all_response(response_dict)
 
-            self.logger.info("have `%s` questions to parse", len(problems_list_result))
+        except Exception as e:
+            self.logger.exception("Problem when parsing the /api/problems/all api response")
+            raise e
 
-            # go through each question in the list (after sorting by question id) and then parse them into
-            # a SingleLeetcodeProblem object
-            for iter_problem_dict in sorted(problems_list_result, key=lambda x: constants.JMESPATH_Q_QUESTION_ID.search(x)):
+        result_dict = {x.question_id: x for x in problems_list}
 
+        self.logger.info("`%s` questions parsed successfully", len(result_dict))
+        return AllLeetcodeProblems(problems=result_dict)
 
-                # NOTE: we get rid of any extra spaces that might be at the end for title and slug, as some of them
-                # have trailing spaces which causes problem we we save the problem to disk
-                single_q = SingleLeetcodeProblem(
-                    question_id = self.jmespath_search_helper(constants.JMESPATH_Q_QUESTION_ID, iter_problem_dict,
-                        "single question -> question_id"),
-                    title = self.jmespath_search_helper(constants.JMESPATH_Q_TITLE, iter_problem_dict,
-                        "single question -> title").strip(),
-                    slug = self.jmespath_search_helper(constants.JMESPATH_Q_SLUG, iter_problem_dict,
-                        "single question -> slug").strip(),
-                    difficulty = self.jmespath_search_helper(constants.JMESPATH_Q_DIFFICULTY, iter_problem_dict,
-                        "single question -> difficulty"),
-                    paid_only = self.jmespath_search_helper(constants.JMESPATH_Q_PAID_ONLY, iter_problem_dict,
-                        "single question -> paid only"),
-                    question_content = None,
-                    code_snippets = None)
 
-                result_dict[single_q.question_id] = single_q
-                self.logger.debug("Question `%s` - `%s` parsed successfully", single_q.question_id, single_q.title)
+    def parse_api_problems_all_stream(self, chunk_iterable:typing.Iterable[bytes]) -> AllLeetcodeProblems:
+        '''
+        parses the response from leetcode.com/api/problems/all like `parse_api_problems_all_response()`, but
+        straight from the body, one problem at a time, so the decoded json of the whole response never
+        has to be in memory
+
+        @param chunk_iterable the body of the response, in chunks
+        @return a AllLeetcodeProblems object
+        '''
 
+        try:
+            with self.metrics.time_stage(metrics.STAGE_PARSE_API_PROBLEMS_ALL):
+                problems_list = list(decoder.iter_decode_api_problems_all_chunks(chunk_iterable))
+                problems_list.sort(key=lambda x: x.question_id)
 
         except Exception as e:
             self.logger.exception("Problem when parsing the /api/problems/all api response")
             raise e
 
-        self.logger.info("`%s` questions parsed successfully", len(problems_list_result))
+        result_dict = {x.question_id: x for x in problems_list}
+
+        self.logger.info("`%s` questions parsed successfully", len(result_dict))
         return AllLeetcodeProblems(problems=result_dict)
 
 
@@ -167,7 +336,7 @@ class LeetcodeProblemDownloader:
         '''
 
         # hit the home page
-        home_page_response_req = self.make_requests_call(UrlRequest(method="GET", url="https://leetcode.com"))
+        home_page_response_req = self.make_requests_call(UrlRequest(method="GET", url=f"{self.base_url}/"))
 
         return home_page_response_req
 
@@ -178,7 +347,7 @@ class LeetcodeProblemDownloader:
         @return the CSRF token as a string
         '''
 
-        csrf_token_from_cookie = self.rsession.cookies["csrftoken"]
+        csrf_token_from_cookie = self.transport.get_cookies()["csrftoken"]
 
         self.logger.debug("csrf middleware token from the cookie jar is `%s`", csrf_token_from_cookie)
         return csrf_token_from_cookie
@@ -199,21 +368,38 @@ class LeetcodeProblemDownloader:
 
         login_page_response_req = self.make_requests_call(
             UrlRequest(method="POST",
-                url="https://leetcode.com/accounts/login",
+                url=f"{self.base_url}/accounts/login",
                 body=login_body_dict,
-                headers=constants.COMMON_HEADERS))
+                headers=self.get_common_headers()))
 
         return login_page_response_req
 
-    def make_api_problems_all_request(self) -> UrlRequest:
+    def make_api_problems_all_request(self, validator_headers:typing.Optional[dict]=None) -> UrlRequest:
         '''
-        makes the HTTP request to hit the /api/problems/all API
+        makes the HTTP request to hit the /api/problems/all API, the body is streamed so it has to be read with
+        iter_response_chunks()
+
+        @param validator_headers if provided, the request is a conditional one: these headers get sent along,
+            the response can be a 304, and the response cache is never used, since the whole point is to ask
+            the server whether anything changed
         @return the resulting UrlRequest
         '''
 
-        problems_set_all_req = self.make_requests_call(
-            UrlRequest(method="GET", url="https://leetcode.com/api/problems/all",
-         headers=constants.COMMON_HEADERS))
+        if validator_headers is None:
+            problems_set_all_req = self.make_requests_call(
+                UrlRequest(method="GET", url=f"{self.base_url}/api/problems/all",
+                    headers=self.get_common_headers(),
+                    cache_key=f"GET {self.base_url}/api/problems/all",
+                    stream=True))
+        else:
+            headers = self.get_common_headers()
+            headers.update(validator_headers)
+
+            problems_set_all_req = self.make_requests_call(
+                UrlRequest(method="GET", url=f"{self.base_url}/api/problems/all",
+                    headers=headers,
+                    allowed_status_codes=(200, 304),
+                    stream=True))
 
         return problems_set_all_req
 
@@ -235,16 +421,70 @@ class LeetcodeProblemDownloader:
             "query": constants.GRAPHQL_QUESTIONDATA_QUERY
         }
 
-        # don't modify the constant value
-        headers = constants.COMMON_HEADERS.copy()
+        headers = self.get_common_headers()
 
         headers["x-csrftoken"] = csrf_token
         headers["Content-Type"] = "application/json"
-        headers["Referer"] = f"https://leetcode.com/problems/{leetcode_question.slug}"
+        headers["Referer"] = f"{self.base_url}/problems/{leetcode_question.slug}"
 
         graphql_req = UrlRequest(
             method="POST",
-            url="https://leetcode.com/graphql",
+            url=f"{self.base_url}/graphql",
+            body=question_data_body_dict,
+            body_is_json=True,
+            headers=headers,
+            cache_key=self.get_graphql_questiondata_cache_key(leetcode_question))
+
+        graphql_response_req = self.make_requests_call(graphql_req)
+
+        return graphql_response_req
+
+
+    def make_graphql_batched_questiondata_query(self, csrf_token,
+            leetcode_questions:typing.Sequence[SingleLeetcodeProblem]) -> UrlRequest:
+        '''
+        method to make a single HTTP request that gets the 'extended' information about several leetcode questions
+        at once, by putting one aliased `question` selection per problem into the query
+
+        @param csrf_token the CSRF token we got from the home page request
+        @param leetcode_questions the SingleLeetcodeProblem objects that we want the extended info for
+        @return the resulting UrlRequest, the response has one `data.<alias>` entry per problem,
+            see `get_graphql_batch_alias()`
+        '''
+
+        variables_dict = dict()
+        variable_definition_list = []
+        selection_list = []
+
+        for iter_idx, iter_question in enumerate(leetcode_questions):
+            variable_name = f"titleSlug{iter_idx}"
+            variables_dict[variable_name] = iter_question.slug
+            variable_definition_list.append(f"${variable_name}: String!")
+            selection_list.append(
+                f"  {self.get_graphql_batch_alias(iter_idx)}: question(titleSlug: ${variable_name}) {{\n"
+                + f"    ...{constants.GRAPHQL_QUESTIONDATA_FRAGMENT_NAME}\n  }}\n")
+
+        query = (f"query {constants.GRAPHQL_BATCHED_QUESTIONDATA_OPERATION_NAME}({', '.join(variable_definition_list)}) {{\n"
+            + "".join(selection_list)
+            + "}\n\n"
+            + constants.GRAPHQL_QUESTIONDATA_FRAGMENT)
+
+        question_data_body_dict = {
+            "operationName": constants.GRAPHQL_BATCHED_QUESTIONDATA_OPERATION_NAME,
+            "variables": variables_dict,
+            "query": query
+        }
+
+        headers = self.get_common_headers()
+
+        headers["x-csrftoken"] = csrf_token
+        headers["Content-Type"] = "application/json"
+        headers["Referer"] = f"{self.base_url}/problemset/all/"
+
+        # NOTE: no cache key, the batch gets split up and cached per slug instead
+        graphql_req = UrlRequest(
+            method="POST",
+            url=f"{self.base_url}/graphql",
             body=question_data_body_dict,
             body_is_json=True,
             headers=headers)
@@ -254,89 +494,569 @@ class LeetcodeProblemDownloader:
         return graphql_response_req
 
 
+    def get_graphql_batch_alias(self, batch_idx:int) -> str:
+        '''
+        returns the alias that the question at the given index of a batched questionData query is put under
+
+        @param batch_idx the index of the question in the batch
+        @return the alias as a string
+        '''
+
+        return f"q{batch_idx}"
+
+
+    def parse_graphql_questiondata_response(self, leetcode_question:SingleLeetcodeProblem,
+            res_json_dict:dict) -> SingleLeetcodeProblem:
+        '''
+        parses the response from the questionData graphql API into the question content and code snippets
+
+        @param leetcode_question the SingleLeetcodeProblem object that the response is for
+        @param res_json_dict the dictionary we got from the questionData response
+        @return a new SingleLeetcodeProblem with the question content and code snippets filled in
+        '''
+
+        question_html, code_snippet_list = decoder.decode_question_data_response(res_json_dict)
+        question_as_markdown = self.convert_question_html(question_html)
+
+        self.metrics.increment(metrics.COUNTER_PROBLEMS_FETCHED)
+
+        self.logger.debug("have `%s` snippets for Question `%s` - `%s`",
+            len(code_snippet_list), leetcode_question.question_id, leetcode_question.title)
+
+        return attr.evolve(leetcode_question,
+            question_content=question_as_markdown,
+            code_snippets={x.language_slug: x for x in code_snippet_list})
+
+
+    def get_graphql_questiondata_cache_key(self, leetcode_question:SingleLeetcodeProblem) -> str:
+        '''
+        returns the response cache key for the questionData response of the given problem, it includes the base url
+        so caches shared between sites (e.g. leetcode.com and leetcode.cn) don't hand out each other's responses
+
+        @param leetcode_question the SingleLeetcodeProblem the response is for
+        @return the cache key as a string
+        '''
+
+        return f"POST {self.base_url}/graphql questionData {leetcode_question.slug}"
+
+
+    def fetch_single_leetcode_problem(self, csrf_token, leetcode_question:SingleLeetcodeProblem) -> SingleLeetcodeProblem:
+        '''
+        fetches the question content and code snippets for a single leetcode problem, this is safe to call
+        from multiple threads at once
+
+        @param csrf_token the CSRF token we got from the homepage request
+        @param leetcode_question the SingleLeetcodeProblem object that we want the extended info for
+        @return a new SingleLeetcodeProblem with the question content and code snippets filled in
+        '''
+
+        self.logger.info("Updating Question `%s` - `%s`", leetcode_question.question_id, leetcode_question.title)
+
+        graphql_response_req = self.make_graphql_questiondata_query(csrf_token, leetcode_question)
+
+        return self.parse_graphql_questiondata_response(leetcode_question, graphql_response_req.response.json())
+
+
+    def fetch_leetcode_problem_batch(self, csrf_token,
+            leetcode_questions:typing.Sequence[SingleLeetcodeProblem]) -> typing.Mapping[str, SingleLeetcodeProblem]:
+        '''
+        fetches the question content and code snippets for several leetcode problems with a single batched
+        questionData request, this is safe to call from multiple threads at once
+
+        problems that are already in the response cache are not put in the batch, and any problem whose
+        part of the batched response is missing or errored is fetched again on its own
+
+        @param csrf_token the CSRF token we got from the homepage request
+        @param leetcode_questions the SingleLeetcodeProblem objects that we want the extended info for, each
+            with a different slug
+        @return a dict of slug -> new SingleLeetcodeProblem with the question content and code snippets filled in
+        '''
+
+        result_dict = dict()
+
+        if len(leetcode_questions) == 1:
+            result_dict[leetcode_questions[0].slug] = self.fetch_single_leetcode_problem(csrf_token, leetcode_questions[0])
+            return result_dict
+
+        # anything we already have cached doesn't need to go in the batch
+        questions_to_batch = []
+        for iter_question in leetcode_questions:
+            cached_response = None
+            if self.response_cache:
+                cached_response = self.response_cache.get(self.get_graphql_questiondata_cache_key(iter_question))
+
+            if cached_response:
+                self.logger.debug("questionData for `%s` served from the response cache", iter_question.slug)
+                self.metrics.increment(metrics.COUNTER_HTTP_CACHE_HITS)
+                result_dict[iter_question.slug] = self.parse_graphql_questiondata_response(
+                    iter_question, cached_response.to_requests_response().json())
+            else:
+                questions_to_batch.append(iter_question)
+
+        if not questions_to_batch:
+            return result_dict
+
+        self.logger.info("Updating Questions `%s` in a batch",
+            ", ".join(f"{x.question_id} - {x.title}" for x in questions_to_batch))
+
+        graphql_response_req = self.make_graphql_batched_questiondata_query(csrf_token, questions_to_batch)
+        res_json_dict = graphql_response_req.response.json()
+        batch_data_dict = res_json_dict.get("data") or dict()
+
+        if res_json_dict.get("errors"):
+            self.logger.warning("batched questionData request returned errors: `%s`", res_json_dict["errors"])
+
+        questions_to_retry = []
+        for iter_idx, iter_question in enumerate(questions_to_batch):
+
+            question_dict = batch_data_dict.get(self.get_graphql_batch_alias(iter_idx))
+
+            if not question_dict or question_dict.get("content") is None or question_dict.get("codeSnippets") is None:
+                self.logger.warning("batched questionData response was missing Question `%s` - `%s`, "
+                    + "will retry it on its own", iter_question.question_id, iter_question.title)
+                questions_to_retry.append(iter_question)
+                continue
+
+            # make it look like the response of a non batched request
+            single_res_json_dict = {"data": {"question": question_dict}}
+            result_dict[iter_question.slug] = self.parse_graphql_questiondata_response(iter_question, single_res_json_dict)
+
+            if self.response_cache:
+                self.response_cache.put(self.get_graphql_questiondata_cache_key(iter_question),
+                    CachedResponse(
+                        status_code=graphql_response_req.response.status_code,
+                        url=graphql_response_req.response.url,
+                        encoding="utf-8",
+                        headers={"Content-Type": "application/json"},
+                        body=json.dumps(single_res_json_dict).encode("utf-8"),
+                        created=time.time()).to_requests_response())
+
+        # fall back to asking for the ones that failed one at a time
+        for iter_question in questions_to_retry:
+            result_dict[iter_question.slug] = self.fetch_single_leetcode_problem(csrf_token, iter_question)
+
+        return result_dict
+
+
+    def convert_question_html(self, question_html:str) -> str:
+        '''
+        converts the question's HTML into markdown-ish text, see HtmlToTextConverter
+
+        @param question_html the html string we got from the questionData api
+        @return the converted text
+        '''
+
+        with self.metrics.time_stage(metrics.STAGE_HTML_TO_TEXT):
+            return self.html_converter.convert(question_html)
+
+
     def update_leetcode_problems_with_content_and_snippets(self, csrf_token, all_problems:AllLeetcodeProblems) -> AllLeetcodeProblems:
         '''
         goes through all of our leetcode problems and update the SingleLeetcodeProblem instances
         with the question content and the code snippet information
 
+        this holds every problem in memory, see `iter_leetcode_problems_with_content_and_snippets()` if you
+        want them one at a time as they arrive
+
         @param all_problems the AllLeetcodeProblems instance we have
         @param csrf_token the CSRF token we got from the homepage request
         @return an updated AllLeetcodeProblems instance with the members having the question content
             and code snippets updated
         '''
 
-        # not good form to modify the dict while iterating over it so lets just create
-        # a new dict to insert the updated entries into
-        result_dict = dict()
+        return AllLeetcodeProblems(problems={x.question_id: x
+            for x in self.iter_leetcode_problems_with_content_and_snippets(csrf_token, all_problems)})
 
-        for question_idx, iter_single_lc_question in all_problems.problems.items():
 
+    def iter_leetcode_problems_with_content_and_snippets(self, csrf_token,
+            all_problems:AllLeetcodeProblems, journal:ProgressJournal=None) -> typing.Iterator[SingleLeetcodeProblem]:
+        '''
+        goes through all of our leetcode problems and yields new SingleLeetcodeProblem instances
+        with the question content and the code snippet information, as soon as they are fetched
 
-            self.logger.info("Updating Question `%s` - `%s`", question_idx, iter_single_lc_question.title)
+        the questionData requests are made on a thread pool of `--max-concurrency` workers, with up to
+        `--graphql-batch-size` problems per request. problems that share the same slug only get requested once,
+        and the problems are yielded in the same (question_id) order as `all_problems`
 
-            graphql_response_req = self.make_graphql_questiondata_query(csrf_token, iter_single_lc_question)
+        only up to `--pipeline-queue-size` problems are in flight (or fetched but not yet yielded) at once, so
+        memory use stays flat no matter how many problems there are
 
-            res_json_dict = graphql_response_req.response.json()
+        @param all_problems the AllLeetcodeProblems instance we have
+        @param csrf_token the CSRF token we got from the homepage request
+        @param journal if provided, every problem gets recorded in this ProgressJournal as soon as it is fetched,
+            rather than when it is yielded
+        @return a generator of updated SingleLeetcodeProblem objects
+        '''
 
-            question_html = self.jmespath_search_helper(constants.JMESPATH_Q_CONTENT, res_json_dict,
-                "question data -> content")
-            question_as_markdown = self.text_converter.handle(question_html)
-            question_code_snippets = self.jmespath_search_helper(constants.JMESPATH_Q_CODE_SNIPPETS, res_json_dict,
-                "question data -> code snippets")
+        max_concurrency = self.get_max_concurrency()
+        graphql_batch_size = self.get_graphql_batch_size()
 
-            self.logger.debug("have `%s` snippets to process for Question `%s` - `%s`",
-                len(question_code_snippets), question_idx, iter_single_lc_question.title)
+        # we need at least enough problems queued up to keep every worker busy
+        pipeline_queue_size = max(self.get_pipeline_queue_size(), max_concurrency * graphql_batch_size)
 
-            code_snippet_dict = dict()
+        self.logger.info("fetching question data for `%s` questions with a max concurrency of `%s`, "
+            + "a batch size of `%s` and a queue size of `%s`",
+            len(all_problems.problems), max_concurrency, graphql_batch_size, pipeline_queue_size)
 
-            for iter_code_snippet_dict in question_code_snippets:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="fetch") as executor:
 
-                code_snippet_obj = SingleLeetcodeProblemCodeSnippet(
-                    language = self.jmespath_search_helper(constants.JMESPATH_Q_CODE_SNIPPET_LANGUAGE,
-                        iter_code_snippet_dict, "question data -> code snippet -> language"),
-                    language_slug = self.jmespath_search_helper(constants.JMESPATH_Q_CODE_SNIPPET_LANGUAGE_SLUG,
-                        iter_code_snippet_dict, "question data -> code snippet -> language slug"),
-                    code_snippet = self.jmespath_search_helper(constants.JMESPATH_Q_CODE_SNIPPET_CONTENT,
-                        iter_code_snippet_dict, "question data -> code snippet -> code"))
+            # the problems waiting to be yielded, in order
+            pending_question_deque = collections.deque()
 
-                self.logger.debug("new code snippet obj for Question `%s` - `%s`: `%s`",
-                    question_idx, iter_single_lc_question.title, code_snippet_obj)
+            # coalesce requests for the same slug so we only ever ask for it once while it is in flight,
+            # and keep track of how many pending problems need it so we can forget about it afterwards
+            slug_to_future_dict = dict()
+            slug_to_pending_count_dict = collections.Counter()
 
-                code_snippet_dict[code_snippet_obj.language_slug] = code_snippet_obj
+            # the problems going in the next batch, keyed by slug
+            current_batch_dict = dict()
 
-            # now evolve the SingleLeetcodeProblem and put it in the new dict
-            new_single_lc_problem = attr.evolve(iter_single_lc_question,
-                question_content=question_as_markdown,
-                code_snippets=code_snippet_dict)
+            def journal_fetched_batch(future:concurrent.futures.Future):
+                if not future.cancelled() and future.exception() is None:
+                    for iter_fetched_problem in future.result().values():
+                        journal.record(iter_fetched_problem)
 
-            result_dict[new_single_lc_problem.question_id] = new_single_lc_problem
+            def submit_current_batch():
+                if not current_batch_dict:
+                    return
 
-            self.logger.debug("sleeping for `%s` seconds...", constants.SECONDS_TO_SLEEP_BETWEEN_GRAPHQL_API_REQUESTS)
-            time.sleep(constants.SECONDS_TO_SLEEP_BETWEEN_GRAPHQL_API_REQUESTS)
+                iter_future = executor.submit(self.fetch_leetcode_problem_batch, csrf_token,
+                    list(current_batch_dict.values()))
+                if journal:
+                    iter_future.add_done_callback(journal_fetched_batch)
+                for iter_batch_slug in current_batch_dict.keys():
+                    slug_to_future_dict[iter_batch_slug] = iter_future
+                current_batch_dict.clear()
 
+            def pop_next_fetched_problem() -> SingleLeetcodeProblem:
+                next_question = pending_question_deque.popleft()
 
-        return AllLeetcodeProblems(problems=result_dict)
+                # if the batch this problem is in hasn't been sent yet, then send it now
+                if next_question.slug not in slug_to_future_dict:
+                    submit_current_batch()
 
+                # how long we wait here shows whether the network is what is holding up the writing
+                with self.metrics.time_stage(metrics.STAGE_WAIT_FOR_QUESTIONDATA):
+                    fetched_problem = slug_to_future_dict[next_question.slug].result()[next_question.slug]
 
-    def get_all_leetcode_problems(self) -> AllLeetcodeProblems:
+                slug_to_pending_count_dict[next_question.slug] -= 1
+                if slug_to_pending_count_dict[next_question.slug] == 0:
+                    del slug_to_pending_count_dict[next_question.slug]
+                    del slug_to_future_dict[next_question.slug]
 
+                # the fetched problem is only a different one if another problem with the same slug was fetched
+                if fetched_problem.question_id == next_question.question_id:
+                    return fetched_problem
 
-        home_page_urlrequest = self.make_homepage_request()
+                return attr.evolve(next_question,
+                    question_content=fetched_problem.question_content,
+                    code_snippets=fetched_problem.code_snippets)
 
-        csrf_token_from_cookie = self.get_csrf_token_from_cookiejar()
+            try:
+                for iter_single_lc_question in all_problems.problems.values():
 
-        login_page_urlrequest = self.make_login_page_request(csrf_token_from_cookie)
+                    if iter_single_lc_question.slug not in slug_to_future_dict \
+                            and iter_single_lc_question.slug not in current_batch_dict:
+                        current_batch_dict[iter_single_lc_question.slug] = iter_single_lc_question
 
-        # logging in updates the csrf token
-        csrf_token_from_cookie = self.get_csrf_token_from_cookiejar()
+                        if len(current_batch_dict) >= graphql_batch_size:
+                            submit_current_batch()
+
+                    pending_question_deque.append(iter_single_lc_question)
+                    slug_to_pending_count_dict[iter_single_lc_question.slug] += 1
+
+                    while len(pending_question_deque) > pipeline_queue_size:
+                        yield pop_next_fetched_problem()
+
+                submit_current_batch()
+
+                while pending_question_deque:
+                    yield pop_next_fetched_problem()
+
+            finally:
+                # if something failed (or the caller stopped early), don't bother fetching the rest
+                for iter_future in slug_to_future_dict.values():
+                    iter_future.cancel()
+
+
+    def get_max_concurrency(self) -> int:
+        '''
+        returns how many questionData requests we are allowed to have in flight at once
+
+        @return the max concurrency, at least 1
+        '''
+
+        max_concurrency = getattr(self.args, "max_concurrency", None) or constants.DEFAULT_MAX_CONCURRENCY
+        return max(1, max_concurrency)
+
+
+    def get_graphql_batch_size(self) -> int:
+        '''
+        returns how many problems we put in a single batched questionData request
+
+        @return the batch size, at least 1
+        '''
+
+        graphql_batch_size = getattr(self.args, "graphql_batch_size", None) or constants.DEFAULT_GRAPHQL_BATCH_SIZE
+        return max(1, graphql_batch_size)
+
+
+    def get_pipeline_queue_size(self) -> int:
+        '''
+        returns how many problems can be in flight (or fetched but not yet consumed) at once
+
+        @return the queue size, at least 1
+        '''
+
+        pipeline_queue_size = getattr(self.args, "pipeline_queue_size", None) or constants.DEFAULT_PIPELINE_QUEUE_SIZE
+        return max(1, pipeline_queue_size)
+
+
+    def iter_all_leetcode_problems(self) -> typing.Iterator[SingleLeetcodeProblem]:
+        '''
+        logs in, gets the list of problems and then yields each problem (with the question content and code snippets)
+        as soon as it has been fetched, in question_id order
+
+        @return a generator of SingleLeetcodeProblem objects
+        '''
+
+        # render from a snapshot of a previous run, without touching the network
+        if getattr(self.args, "from_snapshot", None):
+            yield from self.iter_snapshot_problems(self.args.from_snapshot)
+            return
+
+        csrf_token_from_cookie = self.log_in()
 
         problem_set_all_urlrequest = self.make_api_problems_all_request()
 
         # get the problems without the question content and the code snippets
-        all_leetcode_problems = self.parse_api_problems_all_response(problem_set_all_urlrequest.response.json())
+        all_leetcode_problems = self.parse_api_problems_all_stream(
+            self.iter_response_chunks(problem_set_all_urlrequest, constants.API_PROBLEMS_ALL_CHUNK_SIZE))
+
+        yield from self.iter_problems_to_write(csrf_token_from_cookie, all_leetcode_problems)
+
+
+    def log_in(self) -> str:
+        '''
+        hits the homepage and logs in, the transport keeps the cookies for every request after this
+
+        @return the CSRF token to send along with the questionData requests
+        '''
+
+        # only the cookies matter, not the responses
+        self.make_homepage_request()
+
+        csrf_token_from_cookie = self.get_csrf_token_from_cookiejar()
+
+        self.make_login_page_request(csrf_token_from_cookie)
+
+        # logging in updates the csrf token
+        return self.get_csrf_token_from_cookiejar()
+
+
+    def poll_api_problems_all(self) -> typing.Optional[AllLeetcodeProblems]:
+        '''
+        gets the list of problems for `--watch`, sending along the `ETag` and `Last-Modified` of the last response
+        so the server can tell us that nothing changed with a 304 instead of sending the whole list again
+
+        @return a AllLeetcodeProblems, or None if the list hasn't changed since the last time this was called
+        '''
+
+        problem_set_all_urlrequest = self.make_api_problems_all_request(self.api_problems_all_validator_headers)
+        response = problem_set_all_urlrequest.response
+
+        if response.status_code == 304:
+            self.logger.info("the list of problems hasn't changed since the last sync")
+
+            # there is no body to read, but the connection has to go back to the pool
+            response.close()
+            return None
+
+        # servers that don't send either of these just get asked for the whole list every time
+        validator_headers = dict()
+        if response.headers.get("ETag"):
+            validator_headers["If-None-Match"] = response.headers["ETag"]
+        if response.headers.get("Last-Modified"):
+            validator_headers["If-Modified-Since"] = response.headers["Last-Modified"]
+        self.api_problems_all_validator_headers = validator_headers
+
+        return self.parse_api_problems_all_stream(
+            self.iter_response_chunks(problem_set_all_urlrequest, constants.API_PROBLEMS_ALL_CHUNK_SIZE))
+
+
+    def iter_response_chunks(self, urlrequest:UrlRequest, chunk_size:int) -> typing.Iterator[bytes]:
+        '''
+        reads the body of a response a chunk at a time, which for a streamed request means it comes off the
+        network as it is read, and only one chunk of it is in memory at once. a streamed response that should be
+        cached gets stored once the whole body has been read, and its size is counted in the metrics
+
+        NOTE: the request isn't retried if the connection fails part of the way through the body, since whatever
+        was read has already been handed to the caller
+
+        @param urlrequest the UrlRequest that make_requests_call() returned
+        @param chunk_size roughly how many bytes to read at a time
+        @return a generator of the chunks of the body
+        '''
+
+        response = urlrequest.response
+
+        # responses that aren't streamed (including the ones from the response cache) are already in memory
+        if not urlrequest.stream or urlrequest.from_cache:
+            yield from response.iter_content(chunk_size)
+            return
+
+        chunk_iterable = self.transport.iter_body(response, chunk_size)
+        if self.response_cache and urlrequest.cache_key and response.status_code == 200:
+            chunk_iterable = self.response_cache.iter_and_put(urlrequest.cache_key, response, chunk_iterable)
+
+        body_size = 0
+        try:
+            for iter_chunk in chunk_iterable:
+                body_size += len(iter_chunk)
+                yield iter_chunk
+        finally:
+            self.metrics.increment(metrics.COUNTER_HTTP_BYTES_RECEIVED, body_size)
+            self.metrics.increment(metrics.COUNTER_HTTP_WIRE_BYTES_RECEIVED, self.transport.get_wire_bytes(response))
+
+            self.logger.debug("read the body of %s - %s, `%s` bytes (`%s` bytes on the wire)", urlrequest.method,
+                urlrequest.url, body_size, self.transport.get_wire_bytes(response))
+
+
+    def get_new_or_changed_problems(self, all_problems:AllLeetcodeProblems) -> AllLeetcodeProblems:
+        '''
+        asks the manifest which problems are new or changed, given the languages, file names and output format
+        we were asked for
+
+        @param all_problems the AllLeetcodeProblems to narrow down
+        @return a AllLeetcodeProblems that only has the new or changed problems
+        '''
+
+        return self.manifest.get_new_or_changed_problems(all_problems,
+            utils.resolve_programming_languages(self.args.programming_languages),
+            getattr(self.args, "file_name_policy", None) or constants.DEFAULT_FILE_NAME_POLICY,
+            getattr(self.args, "output_format", None) or constants.OUTPUT_FORMAT_DIRECTORY)
+
+    def iter_problems_to_write(self, csrf_token, all_problems:AllLeetcodeProblems) -> typing.Iterator[SingleLeetcodeProblem]:
+        '''
+        narrows the list of problems down to the ones we were asked for (and with a manifest, the ones that are
+        new or changed), and then yields each of them with the question content and code snippets as soon as it
+        has been fetched
+
+        @param csrf_token the CSRF token we got from log_in()
+        @param all_problems the AllLeetcodeProblems we got from the /api/problems/all api
+        @return a generator of SingleLeetcodeProblem objects
+        '''
+
+        # leave out the problems we weren't asked for before making any questionData requests for them
+        all_leetcode_problems = self.selection.select(all_problems)
+
+        # only ask for the problems that changed since the last run
+        if self.manifest:
+            all_leetcode_problems = self.get_new_or_changed_problems(all_leetcode_problems)
+
+        # so the progress can have an ETA
+        self.metrics.set_gauge(metrics.GAUGE_PROBLEMS_EXPECTED, len(all_leetcode_problems.problems))
 
         # update the problems with the question content and the code snippets
-        all_leetcode_problems = self.update_leetcode_problems_with_content_and_snippets(
-            csrf_token_from_cookie, all_leetcode_problems)
+        if self.journal:
+            yield from self.iter_journaled_leetcode_problems(csrf_token, all_leetcode_problems)
+        else:
+            yield from self.iter_leetcode_problems_with_content_and_snippets(csrf_token, all_leetcode_problems)
+
+
+    def start_sync(self, reload_manifest:bool):
+        '''
+        gets ready for another sync with the same session, for `--watch`
+
+        @param reload_manifest whether to load the manifest from disk again, which is needed after a sync that
+            failed part of the way through, since it recorded problems in the manifest that it might not have written.
+            the list of problems gets asked for unconditionally as well, since a 304 would skip the problems that
+            sync didn't get to
+        '''
+
+        self.metrics = metrics.SyncMetrics()
+
+        if reload_manifest:
+            self.api_problems_all_validator_headers = dict()
+
+            if self.manifest:
+                self.manifest = ProblemManifest.load(self.manifest.manifest_path)
+
+        # a sync that failed leaves its journal behind, so pick up the problems it fetched rather than appending
+        # to it blindly, and a sync that completed deleted it, in which case this starts a new one
+        if self.journal:
+            self.journal.close()
+            self.journal = ProgressJournal(self.journal.journal_path, resume=self.journal.journal_path.exists())
+
+
+    def iter_journaled_leetcode_problems(self, csrf_token,
+            all_problems:AllLeetcodeProblems) -> typing.Iterator[SingleLeetcodeProblem]:
+        '''
+        like `iter_leetcode_problems_with_content_and_snippets()`, but the problems that a previous run already
+        fetched (and that haven't changed since) come from the journal, and every problem that does get fetched
+        is recorded in the journal as soon as it arrives
+
+        the journaled problems are yielded first, followed by the fetched ones in question_id order
+
+        @param csrf_token the CSRF token we got from the homepage request
+        @param all_problems the AllLeetcodeProblems instance we have
+        @return a generator of updated SingleLeetcodeProblem objects
+        '''
+
+        problems_to_fetch_dict = dict()
+        journaled_problem_list = []
+        for question_id, iter_problem in all_problems.problems.items():
+            journaled_problem = self.journal.pop_journaled_problem(iter_problem)
+            if journaled_problem is None:
+                problems_to_fetch_dict[question_id] = iter_problem
+            else:
+                journaled_problem_list.append(journaled_problem)
+
+        if journaled_problem_list:
+            self.logger.info("resuming, `%s` of `%s` problems were already fetched by a previous run",
+                len(journaled_problem_list), len(all_problems.problems))
+            self.metrics.increment(metrics.COUNTER_PROBLEMS_RESUMED, len(journaled_problem_list))
+
+        # the journaled problems are still in the journal, since we append to it
+        yield from journaled_problem_list
+
+        yield from self.iter_leetcode_problems_with_content_and_snippets(csrf_token,
+            AllLeetcodeProblems(problems=problems_to_fetch_dict), journal=self.journal)
+
+
+    def iter_snapshot_problems(self, snapshot_path:pathlib.Path) -> typing.Iterator[SingleLeetcodeProblem]:
+        '''
+        yields every problem from a snapshot saved with `--save-snapshot`, in question_id order
+
+        @param snapshot_path the path to the snapshot
+        @return a generator of SingleLeetcodeProblem objects
+        '''
+
+        with ProblemSnapshot(snapshot_path) as problem_snapshot:
+
+            if not self.manifest and self.selection.is_everything():
+                self.metrics.set_gauge(metrics.GAUGE_PROBLEMS_EXPECTED, len(problem_snapshot))
+                yield from problem_snapshot.iter_problems()
+                return
+
+            # the manifest needs to see every problem to know which ones changed
+            all_leetcode_problems = self.selection.select(
+                AllLeetcodeProblems(problems={x.question_id: x for x in problem_snapshot.iter_problems()}))
+
+        if self.manifest:
+            all_leetcode_problems = self.get_new_or_changed_problems(all_leetcode_problems)
+
+        self.metrics.set_gauge(metrics.GAUGE_PROBLEMS_EXPECTED, len(all_leetcode_problems.problems))
+        yield from all_leetcode_problems.problems.values()
+
+
+    def get_all_leetcode_problems(self) -> AllLeetcodeProblems:
+        '''
+        logs in and gets every problem (with the question content and code snippets)
+
+        this holds every problem in memory, see `iter_all_leetcode_problems()` if you want them one at a time
+
+        @return a AllLeetcodeProblems
+        '''
 
-        return all_leetcode_problems
\ No newline at end of file
+        return AllLeetcodeProblems(problems={x.question_id: x for x in self.iter_all_leetcode_problems()})
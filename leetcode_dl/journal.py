@@ -0,0 +1,201 @@
+import json
+import logging
+import os
+import pathlib
+import threading
+import time
+import typing
+
+from leetcode_dl.model import SingleLeetcodeProblem
+from leetcode_dl.manifest import compute_problem_content_hash
+from leetcode_dl import constants
+
+logger = logging.getLogger(__name__)
+
+class ProgressJournal:
+    ''' an append only journal of every problem that has been fetched, one json object per line, so that if a sync
+    dies part of the way through, `--resume` only has to fetch the problems that are left
+
+    the first line is a header with the journal version, and every line after that is a problem along with the
+    content hash of its /api/problems/all fields, so that a problem that changed since it was journaled gets
+    fetched again. the journal is fsync()'d in batches, so a crash loses at most a few seconds of fetching, and
+    it gets deleted once a sync completes
+    '''
+
+    def __init__(self, journal_path:pathlib.Path, resume:bool, discard:bool=False):
+        '''
+        constructor
+
+        @param journal_path where the journal lives
+        @param resume if True, load the problems from an existing journal and append to it
+        @param discard if True, an existing journal is thrown away. if neither this nor `resume` is True and there
+            is an existing journal, an exception is raised rather than losing what the previous run fetched
+        '''
+
+        self.journal_path = journal_path
+
+        # slug -> (content hash, SingleLeetcodeProblem.to_dict()) of the problems from the previous run
+        self.journaled_problem_dict = dict()
+
+        valid_length = 0
+        if resume:
+            valid_length = self._load()
+        elif self.journal_path.exists():
+            if not discard:
+                raise Exception(f"the journal `{self.journal_path}` from a previous run that didn't complete exists, "
+                    + "run with --resume to pick up where it left off, or --discard-journal to start over")
+
+            logger.info("discarding the journal `%s` from a previous run since --discard-journal was provided", self.journal_path)
+
+        # how many problems are in the journal, one that doesn't have any gets deleted on close()
+        self.problem_count = len(self.journaled_problem_dict)
+
+        if valid_length:
+            self.journal_file = open(self.journal_path, "r+b")
+
+            # get rid of a half written line from when the previous run died, so we don't append onto it
+            self.journal_file.truncate(valid_length)
+            self.journal_file.seek(valid_length)
+        else:
+            self.journal_file = open(self.journal_path, "wb")
+            self.journal_file.write(json.dumps({"version": constants.JOURNAL_VERSION}).encode("utf-8") + b"\n")
+
+        # problems get recorded from the fetch threads
+        self.lock = threading.Lock()
+
+        self.closed = False
+        self._sync()
+
+    def _load(self) -> int:
+        '''
+        loads the problems from the existing journal
+
+        @return how many bytes at the start of the journal are complete lines from a journal we understand,
+            or 0 if there was no usable journal
+        '''
+
+        if not self.journal_path.exists():
+            logger.info("no journal found at `%s`, nothing to resume", self.journal_path)
+            return 0
+
+        valid_length = 0
+        with open(self.journal_path, "rb") as f:
+
+            header_line = f.readline()
+            try:
+                header_dict = json.loads(header_line)
+            except ValueError:
+                header_dict = dict()
+
+            if not header_line.endswith(b"\n") or header_dict.get("version") != constants.JOURNAL_VERSION:
+                logger.warning("the journal `%s` is from a different version, or is corrupt, ignoring it", self.journal_path)
+                return 0
+
+            valid_length += len(header_line)
+
+            for iter_line in f:
+
+                # the last line might only be half written if we died while writing it
+                if not iter_line.endswith(b"\n"):
+                    logger.info("ignoring a half written line at the end of the journal `%s`", self.journal_path)
+                    break
+
+                try:
+                    entry_dict = json.loads(iter_line)
+                    self.journaled_problem_dict[entry_dict["problem"]["slug"]] = (entry_dict["content_hash"], entry_dict["problem"])
+                except (ValueError, KeyError, TypeError):
+                    logger.warning("ignoring a corrupt line at the end of the journal `%s`", self.journal_path)
+                    break
+
+                valid_length += len(iter_line)
+
+        logger.info("loaded `%s` problems from the journal `%s`", len(self.journaled_problem_dict), self.journal_path)
+
+        return valid_length
+
+    def pop_journaled_problem(self, leetcode_problem:SingleLeetcodeProblem) -> typing.Optional[SingleLeetcodeProblem]:
+        '''
+        returns the journaled version of a problem, if the previous run fetched it and it hasn't changed since
+
+        the problem is forgotten about afterwards, so the journal doesn't keep it in memory any longer than it has to
+
+        @param leetcode_problem the SingleLeetcodeProblem from the /api/problems/all api
+        @return a SingleLeetcodeProblem with the question content and code snippets filled in, or None
+        '''
+
+        journaled_entry = self.journaled_problem_dict.pop(leetcode_problem.slug, None)
+        if journaled_entry is None:
+            return None
+
+        content_hash, problem_dict = journaled_entry
+        if content_hash != compute_problem_content_hash(leetcode_problem):
+            logger.debug("problem `%s` - `%s` changed since it was journaled", leetcode_problem.question_id, leetcode_problem.slug)
+            return None
+
+        return SingleLeetcodeProblem.from_dict(problem_dict)
+
+    def record(self, leetcode_problem:SingleLeetcodeProblem):
+        '''
+        appends a fetched problem to the journal, this is safe to call from multiple threads at once
+
+        @param leetcode_problem the SingleLeetcodeProblem, with the question content and code snippets filled in
+        '''
+
+        entry_dict = {
+            "content_hash": compute_problem_content_hash(leetcode_problem),
+            "problem": leetcode_problem.to_dict(),
+        }
+
+        entry_bytes = json.dumps(entry_dict, separators=(",", ":")).encode("utf-8") + b"\n"
+
+        with self.lock:
+
+            # a batch can finish after the sync failed and the journal was closed
+            if self.closed:
+                return
+
+            self.journal_file.write(entry_bytes)
+            self.problem_count += 1
+
+            # fsync()'ing every line would make the journal the slowest part of the sync
+            self.unsynced_count += 1
+            if self.unsynced_count >= constants.JOURNAL_FSYNC_EVERY_RECORDS \
+                    or time.monotonic() - self.last_sync_time >= constants.JOURNAL_FSYNC_INTERVAL_SECONDS:
+                self._sync()
+
+    def _sync(self):
+        '''
+        makes sure everything recorded so far is on disk, must be called with the lock held (or from the constructor)
+        '''
+
+        self.journal_file.flush()
+        os.fsync(self.journal_file.fileno())
+
+        self.unsynced_count = 0
+        self.last_sync_time = time.monotonic()
+
+    def close(self, completed:bool=False):
+        '''
+        closes the journal
+
+        calling this more than once does nothing
+
+        @param completed whether the sync completed, in which case the journal isn't needed anymore and is deleted,
+            otherwise it is kept around for `--resume`, unless there is nothing in it to resume
+        '''
+
+        with self.lock:
+            if self.closed:
+                return
+            self.closed = True
+
+            # so a sync that failed before fetching anything doesn't make the next one need --discard-journal
+            if completed or not self.problem_count:
+                self.journal_file.close()
+                os.unlink(self.journal_path)
+                return
+
+            self._sync()
+            self.journal_file.close()
+
+        logger.info("kept the journal `%s`, run again with --resume to pick up where this run left off", self.journal_path)
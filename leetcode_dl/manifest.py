@@ -0,0 +1,190 @@
+import hashlib
+import json
+import logging
+import os
+import pathlib
+import typing
+
+import attr
+
+from leetcode_dl.model import SingleLeetcodeProblem, AllLeetcodeProblems
+from leetcode_dl import constants
+
+logger = logging.getLogger(__name__)
+
+def compute_problem_content_hash(leetcode_problem:SingleLeetcodeProblem) -> str:
+    ''' computes a hash of the fields of a problem that we get from the /api/problems/all api
+
+    NOTE: we only hash the fields that affect what we write to disk, things like `total_acs` change
+    every day and would make every problem look like it changed
+
+    @param leetcode_problem the SingleLeetcodeProblem to hash
+    @return the hash as a hex string
+    '''
+
+    hash_input = json.dumps([leetcode_problem.question_id, leetcode_problem.title, leetcode_problem.slug,
+        leetcode_problem.difficulty, leetcode_problem.paid_only])
+
+    return hashlib.sha1(hash_input.encode("utf-8")).hexdigest()
+
+@attr.s(auto_attribs=True)
+class ManifestEntry:
+    ''' what we remember about a single problem from the previous run
+    '''
+
+    question_id:int = attr.ib()
+    slug:str = attr.ib()
+    content_hash:str = attr.ib()
+
+class ProblemManifest:
+    ''' a record of what problems were written by the previous run, so that `--incremental` runs
+    only have to fetch and write the problems that are new or changed
+    '''
+
+    def __init__(self, manifest_path:pathlib.Path, entries:typing.Mapping[int, ManifestEntry],
+            programming_languages:typing.List[str], file_name_policy:typing.Optional[str]=None,
+            output_format:typing.Optional[str]=None):
+        '''
+        constructor
+
+        @param manifest_path where the manifest gets saved to
+        @param entries a dict of question_id -> ManifestEntry
+        @param programming_languages the programming languages that the previous run wrote files for
+        @param file_name_policy the `--file-name-policy` the previous run named the files with, None if there wasn't one
+        @param output_format the `--output-format` the previous run wrote, None if there wasn't one
+        '''
+
+        self.manifest_path = manifest_path
+        self.entries = entries
+        self.programming_languages = programming_languages
+        self.file_name_policy = file_name_policy
+        self.output_format = output_format
+
+    @classmethod
+    def load(cls, manifest_path:pathlib.Path) -> "ProblemManifest":
+        '''
+        loads the manifest from disk, returning an empty manifest if the file doesn't exist yet
+
+        @param manifest_path the path to the manifest file
+        @return a ProblemManifest
+        '''
+
+        if not manifest_path.exists():
+            logger.info("no manifest found at `%s`, every problem will be treated as new", manifest_path)
+            return cls(manifest_path, dict(), [])
+
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            manifest_dict = json.load(f)
+
+        if manifest_dict.get("version") != constants.MANIFEST_VERSION:
+            logger.warning("manifest at `%s` has version `%s` but we expected `%s`, ignoring it",
+                manifest_path, manifest_dict.get("version"), constants.MANIFEST_VERSION)
+            return cls(manifest_path, dict(), [])
+
+        entries = dict()
+        for iter_entry_dict in manifest_dict["problems"]:
+            entry = ManifestEntry(**iter_entry_dict)
+            entries[entry.question_id] = entry
+
+        logger.info("loaded manifest with `%s` problems from `%s`", len(entries), manifest_path)
+
+        return cls(manifest_path, entries, manifest_dict["programming_languages"],
+            file_name_policy=manifest_dict["file_name_policy"], output_format=manifest_dict["output_format"])
+
+    def get_new_or_changed_problems(self, all_problems:AllLeetcodeProblems,
+            programming_languages:typing.List[str], file_name_policy:str, output_format:str) -> AllLeetcodeProblems:
+        '''
+        returns only the problems that are not in the manifest or whose content hash changed
+
+        if we are asked for a programming language that the previous run didn't write, or the files get named
+        or written differently than the previous run did, then every problem is returned since every problem
+        is missing a file
+
+        @param all_problems the AllLeetcodeProblems we got from the /api/problems/all api
+        @param programming_languages the programming languages we are writing files for this run
+        @param file_name_policy the `--file-name-policy` of this run
+        @param output_format the `--output-format` of this run
+        @return a AllLeetcodeProblems that only has the new or changed problems, in the same order
+        '''
+
+        if self.entries and (self.file_name_policy, self.output_format) != (file_name_policy, output_format):
+            logger.info("the previous run wrote `--output-format %s --file-name-policy %s` but this one writes "
+                + "`--output-format %s --file-name-policy %s`, treating every problem as changed",
+                self.output_format, self.file_name_policy, output_format, file_name_policy)
+            return all_problems
+
+        new_languages = set(programming_languages) - set(self.programming_languages)
+        if new_languages:
+            logger.info("the languages `%s` were not written by the previous run, treating every problem as changed",
+                sorted(new_languages))
+            return all_problems
+
+        result_dict = dict()
+        for question_id, iter_problem in all_problems.problems.items():
+
+            existing_entry = self.entries.get(question_id)
+
+            if existing_entry is None:
+                logger.debug("problem `%s` - `%s` is new", question_id, iter_problem.slug)
+                result_dict[question_id] = iter_problem
+            elif existing_entry.content_hash != compute_problem_content_hash(iter_problem):
+                logger.debug("problem `%s` - `%s` has changed", question_id, iter_problem.slug)
+                result_dict[question_id] = iter_problem
+
+        logger.info("`%s` of `%s` problems are new or changed since the last run",
+            len(result_dict), len(all_problems.problems))
+
+        return AllLeetcodeProblems(problems=result_dict)
+
+    def record_problem(self, leetcode_problem:SingleLeetcodeProblem):
+        '''
+        records the given problem as written
+
+        @param leetcode_problem the problem that was written this run
+        '''
+
+        self.entries[leetcode_problem.question_id] = ManifestEntry(
+            question_id=leetcode_problem.question_id,
+            slug=leetcode_problem.slug,
+            content_hash=compute_problem_content_hash(leetcode_problem))
+
+    def record_programming_languages(self, programming_languages:typing.List[str], file_name_policy:str,
+            output_format:str):
+        '''
+        records the given programming languages as written, call this once every problem has been recorded
+
+        @param programming_languages the programming languages that were written this run
+        @param file_name_policy the `--file-name-policy` the files were named with this run
+        @param output_format the `--output-format` that was written this run
+        '''
+
+        # the languages that only the runs before this one wrote have their files named (or written) the old way
+        if (self.file_name_policy, self.output_format) != (file_name_policy, output_format):
+            self.programming_languages = []
+            self.file_name_policy = file_name_policy
+            self.output_format = output_format
+
+        # a run with a new language gets every problem, so after it the files for that language all exist
+        self.programming_languages = sorted(set(self.programming_languages) | set(programming_languages))
+
+    def save(self):
+        '''
+        writes the manifest to disk, writing to a temporary file first so a crash doesn't leave behind
+        a half written manifest
+        '''
+
+        manifest_dict = {
+            "version": constants.MANIFEST_VERSION,
+            "programming_languages": self.programming_languages,
+            "file_name_policy": self.file_name_policy,
+            "output_format": self.output_format,
+            "problems": [attr.asdict(x) for x in sorted(self.entries.values(), key=lambda x: x.question_id)]
+        }
+
+        tmp_path = self.manifest_path.with_name(self.manifest_path.name + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest_dict, f, indent=1)
+
+        os.replace(tmp_path, self.manifest_path)
+
+        logger.info("saved manifest with `%s` problems to `%s`", len(self.entries), self.manifest_path)
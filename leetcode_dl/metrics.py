@@ -0,0 +1,378 @@
+import bisect
+import collections
+import contextlib
+import json
+import logging
+import math
+import pathlib
+import threading
+import time
+import typing
+
+from leetcode_dl import constants
+
+logger = logging.getLogger(__name__)
+
+# counters that the rest of the code increments, kept here so the summary can find them
+COUNTER_HTTP_REQUESTS = "http_requests"
+COUNTER_HTTP_RETRIES = "http_retries"
+COUNTER_HTTP_FAILURES = "http_failures"
+COUNTER_HTTP_THROTTLED = "http_throttled"
+COUNTER_HTTP_CACHE_HITS = "http_cache_hits"
+COUNTER_HTTP_BYTES_SENT = "http_bytes_sent"
+COUNTER_HTTP_BYTES_RECEIVED = "http_bytes_received"
+COUNTER_HTTP_WIRE_BYTES_RECEIVED = "http_wire_bytes_received"
+COUNTER_PROBLEMS_FETCHED = "problems_fetched"
+COUNTER_PROBLEMS_WRITTEN = "problems_written"
+COUNTER_PROBLEMS_RESUMED = "problems_resumed"
+COUNTER_FILES_WRITTEN = "files_written"
+COUNTER_FILES_UNCHANGED = "files_unchanged"
+COUNTER_BYTES_WRITTEN = "bytes_written"
+
+# the stages we keep latency histograms for
+STAGE_HTTP_REQUEST = "http_request"
+STAGE_PARSE_API_PROBLEMS_ALL = "parse_api_problems_all"
+STAGE_WAIT_FOR_QUESTIONDATA = "wait_for_questiondata"
+STAGE_HTML_TO_TEXT = "html_to_text"
+STAGE_RENDER_PROBLEM = "render_problem"
+STAGE_WRITE_FILE = "write_file"
+STAGE_SEARCH_INDEX = "search_index"
+
+# how many problems we expect to fetch in total, used for the progress ETA. OpenMetrics keeps the `_total` suffix
+# for counters, so no gauge can end with it
+GAUGE_PROBLEMS_EXPECTED = "problems_expected"
+
+class LatencyHistogram:
+    ''' a histogram of how long something took, with fixed bucket boundaries
+
+    this isn't thread safe on its own, SyncMetrics only touches it with its lock held
+    '''
+
+    def __init__(self, bucket_bounds:typing.Sequence[float]):
+        '''
+        constructor
+
+        @param bucket_bounds the (sorted) upper bounds of each bucket in seconds, there is always an extra
+            bucket for anything bigger than the last one
+        '''
+
+        self.bucket_bounds = tuple(bucket_bounds)
+        self.bucket_counts = [0] * (len(self.bucket_bounds) + 1)
+        self.count = 0
+        self.sum_seconds = 0.0
+        self.min_seconds = None
+        self.max_seconds = None
+
+    def observe(self, seconds:float):
+        '''
+        @param seconds how long the thing took
+        '''
+
+        self.bucket_counts[bisect.bisect_left(self.bucket_bounds, seconds)] += 1
+        self.count += 1
+        self.sum_seconds += seconds
+        self.min_seconds = seconds if self.min_seconds is None else min(self.min_seconds, seconds)
+        self.max_seconds = seconds if self.max_seconds is None else max(self.max_seconds, seconds)
+
+    def get_quantile(self, quantile:float) -> typing.Optional[float]:
+        '''
+        estimates a quantile from the buckets, this is the upper bound of the bucket the quantile falls into
+        (or the max, for the last bucket), so it is only as precise as the buckets are
+
+        @param quantile the quantile, between 0 and 1
+        @return the estimate in seconds, or None if nothing was observed
+        '''
+
+        if not self.count:
+            return None
+
+        rank = max(1, math.ceil(quantile * self.count))
+        cumulative_count = 0
+        for iter_bound, iter_count in zip(self.bucket_bounds, self.bucket_counts):
+            cumulative_count += iter_count
+            if cumulative_count >= rank:
+                return min(iter_bound, self.max_seconds)
+
+        return self.max_seconds
+
+    def as_dict(self) -> dict:
+        '''
+        @return the histogram as a json friendly dict
+        '''
+
+        return {
+            "count": self.count,
+            "sum_seconds": self.sum_seconds,
+            "min_seconds": self.min_seconds,
+            "max_seconds": self.max_seconds,
+            "p50_seconds": self.get_quantile(0.5),
+            "p90_seconds": self.get_quantile(0.9),
+            "p99_seconds": self.get_quantile(0.99),
+            "buckets": [{"le": x, "count": y} for x, y in zip(self.bucket_bounds + ("+Inf",), self.bucket_counts)],
+        }
+
+class SyncMetrics:
+    ''' counters, gauges and per stage latency histograms for a single sync, safe to update from any thread
+
+    the clock starts when this gets created
+    '''
+
+    def __init__(self, bucket_bounds:typing.Sequence[float]=constants.METRICS_LATENCY_BUCKETS_SECONDS):
+        '''
+        constructor
+
+        @param bucket_bounds the upper bounds of the latency histogram buckets, in seconds
+        '''
+
+        self.bucket_bounds = tuple(bucket_bounds)
+
+        self.lock = threading.Lock()
+        self.start_time = time.monotonic()
+        self.counter_dict = collections.Counter()
+        self.gauge_dict = dict()
+
+        # stage name -> LatencyHistogram, in the order the stages were first seen
+        self.histogram_dict = dict()
+
+    def increment(self, counter_name:str, amount:int=1):
+        '''
+        @param counter_name the name of the counter, one of the COUNTER_* constants
+        @param amount how much to add to it
+        '''
+
+        with self.lock:
+            self.counter_dict[counter_name] += amount
+
+    def get_counter(self, counter_name:str) -> int:
+        with self.lock:
+            return self.counter_dict[counter_name]
+
+    def set_gauge(self, gauge_name:str, value:float):
+        '''
+        @param gauge_name the name of the gauge, one of the GAUGE_* constants
+        @param value the new value
+        '''
+
+        with self.lock:
+            self.gauge_dict[gauge_name] = value
+
+    def get_gauge(self, gauge_name:str) -> typing.Optional[float]:
+        with self.lock:
+            return self.gauge_dict.get(gauge_name)
+
+    def observe(self, stage_name:str, seconds:float):
+        '''
+        records how long one run of a stage took
+
+        @param stage_name the name of the stage, one of the STAGE_* constants
+        @param seconds how long it took
+        '''
+
+        with self.lock:
+            histogram = self.histogram_dict.get(stage_name)
+            if histogram is None:
+                histogram = LatencyHistogram(self.bucket_bounds)
+                self.histogram_dict[stage_name] = histogram
+            histogram.observe(seconds)
+
+    @contextlib.contextmanager
+    def time_stage(self, stage_name:str):
+        '''
+        a context manager that records how long the code inside of it took, even if it raises
+
+        @param stage_name the name of the stage, one of the STAGE_* constants
+        '''
+
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage_name, time.perf_counter() - start_time)
+
+    def get_elapsed_seconds(self) -> float:
+        return time.monotonic() - self.start_time
+
+    def as_dict(self) -> dict:
+        '''
+        @return everything as a json friendly dict
+        '''
+
+        elapsed_seconds = self.get_elapsed_seconds()
+
+        with self.lock:
+            counter_dict = dict(self.counter_dict)
+            result = {
+                "elapsed_seconds": elapsed_seconds,
+                "counters": counter_dict,
+                "gauges": dict(self.gauge_dict),
+                "rates": {
+                    "problems_per_second": counter_dict.get(COUNTER_PROBLEMS_WRITTEN, 0) / elapsed_seconds,
+                    "files_per_second": (counter_dict.get(COUNTER_FILES_WRITTEN, 0)
+                        + counter_dict.get(COUNTER_FILES_UNCHANGED, 0)) / elapsed_seconds,
+                    "http_requests_per_second": counter_dict.get(COUNTER_HTTP_REQUESTS, 0) / elapsed_seconds,
+                },
+                "stages": {x: y.as_dict() for x, y in self.histogram_dict.items()},
+            }
+
+        return result
+
+    def as_openmetrics(self) -> str:
+        '''
+        @return everything in the OpenMetrics text format, which prometheus and friends can scrape
+        '''
+
+        metrics_dict = self.as_dict()
+        prefix = constants.METRICS_OPENMETRICS_PREFIX
+
+        line_list = [
+            f"# TYPE {prefix}_elapsed_seconds gauge",
+            f"{prefix}_elapsed_seconds {metrics_dict['elapsed_seconds']}"]
+
+        for iter_name, iter_value in sorted(metrics_dict["counters"].items()):
+            line_list.append(f"# TYPE {prefix}_{iter_name} counter")
+            line_list.append(f"{prefix}_{iter_name}_total {iter_value}")
+
+        for iter_name, iter_value in sorted(metrics_dict["gauges"].items()):
+            line_list.append(f"# TYPE {prefix}_{iter_name} gauge")
+            line_list.append(f"{prefix}_{iter_name} {iter_value}")
+
+        line_list.append(f"# TYPE {prefix}_stage_seconds histogram")
+        line_list.append(f"# UNIT {prefix}_stage_seconds seconds")
+        for iter_stage_name, iter_histogram_dict in metrics_dict["stages"].items():
+            cumulative_count = 0
+            for iter_bucket_dict in iter_histogram_dict["buckets"]:
+                cumulative_count += iter_bucket_dict["count"]
+                line_list.append(f'{prefix}_stage_seconds_bucket{{stage="{iter_stage_name}",le="{iter_bucket_dict["le"]}"}} '
+                    + f"{cumulative_count}")
+            line_list.append(f'{prefix}_stage_seconds_sum{{stage="{iter_stage_name}"}} {iter_histogram_dict["sum_seconds"]}')
+            line_list.append(f'{prefix}_stage_seconds_count{{stage="{iter_stage_name}"}} {iter_histogram_dict["count"]}')
+
+        line_list.append("# EOF")
+
+        return "\n".join(line_list) + "\n"
+
+    def write(self, path:pathlib.Path):
+        '''
+        writes everything to a file, as json if the file name ends in `.json`, otherwise in the OpenMetrics text format
+
+        @param path the path of the file to write
+        '''
+
+        path = pathlib.Path(path)
+
+        if path.suffix.lower() == ".json":
+            file_contents = json.dumps(self.as_dict(), indent=4) + "\n"
+        else:
+            file_contents = self.as_openmetrics()
+
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(file_contents)
+
+        logger.info("wrote metrics to `%s`", path)
+
+    def log_summary(self, summary_logger:logging.Logger):
+        '''
+        logs a human readable summary of where the time went
+
+        @param summary_logger the Logger to log the summary to
+        '''
+
+        metrics_dict = self.as_dict()
+        counter_dict = metrics_dict["counters"]
+        rate_dict = metrics_dict["rates"]
+
+        summary_logger.info("sync took `%.1f` seconds: `%s` problems (`%.2f`/sec), `%s` files written and `%s` unchanged (`%.2f`/sec)",
+            metrics_dict["elapsed_seconds"],
+            counter_dict.get(COUNTER_PROBLEMS_WRITTEN, 0), rate_dict["problems_per_second"],
+            counter_dict.get(COUNTER_FILES_WRITTEN, 0), counter_dict.get(COUNTER_FILES_UNCHANGED, 0),
+            rate_dict["files_per_second"])
+
+        summary_logger.info("http: `%s` requests, `%s` retries, `%s` failures, `%s` throttled, `%s` served from the cache, "
+            + "`%s` bytes sent, `%s` bytes received (`%s` bytes before decompressing)",
+            counter_dict.get(COUNTER_HTTP_REQUESTS, 0), counter_dict.get(COUNTER_HTTP_RETRIES, 0),
+            counter_dict.get(COUNTER_HTTP_FAILURES, 0), counter_dict.get(COUNTER_HTTP_THROTTLED, 0),
+            counter_dict.get(COUNTER_HTTP_CACHE_HITS, 0),
+            counter_dict.get(COUNTER_HTTP_BYTES_SENT, 0), counter_dict.get(COUNTER_HTTP_BYTES_RECEIVED, 0),
+            counter_dict.get(COUNTER_HTTP_WIRE_BYTES_RECEIVED, 0))
+
+        for iter_stage_name, iter_histogram_dict in metrics_dict["stages"].items():
+            summary_logger.info("stage `%s`: count `%s`, total `%.3f`s, p50 `%s`, p90 `%s`, p99 `%s`, max `%.4f`s",
+                iter_stage_name, iter_histogram_dict["count"], iter_histogram_dict["sum_seconds"],
+                format_seconds(iter_histogram_dict["p50_seconds"]),
+                format_seconds(iter_histogram_dict["p90_seconds"]),
+                format_seconds(iter_histogram_dict["p99_seconds"]),
+                iter_histogram_dict["max_seconds"])
+
+def format_seconds(seconds:typing.Optional[float]) -> str:
+    ''' formats a quantile estimate from LatencyHistogram.get_quantile() for the summary
+
+    @param seconds the number of seconds, or None
+    @return a string like `<=0.25s`
+    '''
+
+    if seconds is None:
+        return "n/a"
+
+    return f"<={seconds:.3g}s"
+
+class ProgressReporter:
+    ''' logs how far along the sync is, how fast it is going and an ETA, at most once every `interval_seconds`
+
+    the rate (and so the ETA) is measured from the first problem being written, so the time spent logging in
+    and getting the list of problems doesn't skew it
+    '''
+
+    def __init__(self, metrics:SyncMetrics, progress_logger:logging.Logger,
+            interval_seconds:float=constants.METRICS_PROGRESS_INTERVAL_SECONDS):
+        '''
+        constructor
+
+        @param metrics the SyncMetrics to read the problem counts from
+        @param progress_logger the Logger to log the progress to
+        @param interval_seconds the least amount of time between two progress messages
+        '''
+
+        self.metrics = metrics
+        self.progress_logger = progress_logger
+        self.interval_seconds = interval_seconds
+        self.last_report_time = None
+
+        # when the first problem was written, and how many problems were written by then
+        self.first_update_time = None
+        self.first_update_problems_done = 0
+
+    def update(self, force:bool=False):
+        '''
+        call whenever a problem has been written, this logs the progress if it has been long enough
+
+        @param force log the progress even if it hasn't been long enough
+        '''
+
+        now = time.monotonic()
+        problems_done = self.metrics.get_counter(COUNTER_PROBLEMS_WRITTEN)
+
+        if self.first_update_time is None:
+            self.first_update_time = now
+            self.last_report_time = now
+            self.first_update_problems_done = problems_done
+
+        if not force and now - self.last_report_time < self.interval_seconds:
+            return
+        self.last_report_time = now
+
+        problems_expected = self.metrics.get_gauge(GAUGE_PROBLEMS_EXPECTED)
+        seconds_since_first_update = now - self.first_update_time
+        problems_per_second = 0.0
+        if seconds_since_first_update > 0:
+            problems_per_second = (problems_done - self.first_update_problems_done) / seconds_since_first_update
+
+        if not problems_expected:
+            self.progress_logger.info("progress: `%s` problems written, `%.2f` problems/sec", problems_done, problems_per_second)
+            return
+
+        eta = "unknown"
+        if problems_per_second > 0:
+            eta = f"{max(0, problems_expected - problems_done) / problems_per_second:.0f}s"
+
+        self.progress_logger.info("progress: `%s` / `%s` problems written (`%.1f`%%), `%.2f` problems/sec, ETA `%s`",
+            problems_done, problems_expected, 100 * problems_done / problems_expected, problems_per_second, eta)
@@ -1,8 +1,11 @@
+import sys
 import typing
 import logging
 
 import attr
-import requests
+
+if typing.TYPE_CHECKING:
+    import requests
 
 logger = logging.getLogger(__name__)
 
@@ -14,19 +17,26 @@ class UrlRequest:
     body:dict = attr.ib(default=None) # optional
     body_is_json:bool = attr.ib(default=False)
     headers:dict = attr.ib(default=None) # optional
-    response:requests.Response = attr.ib(default=None) # gets set after the request is processed
+    cache_key:str = attr.ib(default=None) # optional, if set the response can be served from / stored in the response cache
+    allowed_status_codes:typing.Tuple[int, ...] = attr.ib(default=(200,)) # anything else is treated as a failure and retried
+    stream:bool = attr.ib(default=False) # if set, the body is only read as the caller iterates over it, see LeetcodeProblemDownloader.iter_response_chunks()
+    response:"requests.Response" = attr.ib(default=None) # gets set after the request is processed
+    from_cache:bool = attr.ib(default=False) # gets set if the response came from the response cache
 
-@attr.s(auto_attribs=True)
+@attr.s(auto_attribs=True, slots=True)
 class ProgrammingLanguageMetadata:
     file_ext:str = attr.ib()
     comment_characters:str = attr.ib()
 
-@attr.s(auto_attribs=True)
+@attr.s(auto_attribs=True, slots=True)
 class SingleLeetcodeProblemCodeSnippet:
     ''' represents the code snippet that gets filled in when
     you start the problem on the leetcode editor for a given language
 
     this information comes from the `graphql (questionData)` endpoint
+
+    there are a dozen or so of these for every problem, so they are slotted, and they should be created with
+    `make_code_snippet()` so the strings they hold get shared
     '''
 
     language:str = attr.ib()
@@ -68,13 +78,37 @@ class SingleLeetcodeProblemCodeSnippet:
                 "language_slug of `%s` is not in the known dictionary, returning `//`", self.language_slug)
             return constants.DEFAULT_COMMENT_CHARACTERS
 
-@attr.s(auto_attribs=True)
+def make_code_snippet(language:str, language_slug:str, code_snippet:str,
+        code_snippet_memo:typing.Optional[typing.Dict[str, str]]=None) -> SingleLeetcodeProblemCodeSnippet:
+    ''' creates a SingleLeetcodeProblemCodeSnippet, without keeping a copy of the same string around thousands of times
+
+    the language names are the same for every problem so they get interned, and code that is identical to code
+    already in `code_snippet_memo` (like the `python` and `python3` snippets of a lot of problems) shares that string
+
+    @param language the name of the language
+    @param language_slug the slug of the language
+    @param code_snippet the code
+    @param code_snippet_memo if provided, a dict of code -> the same code that is shared by the snippets of a problem
+    @return a SingleLeetcodeProblemCodeSnippet
+    '''
+
+    if code_snippet_memo is not None:
+        code_snippet = code_snippet_memo.setdefault(code_snippet, code_snippet)
+
+    return SingleLeetcodeProblemCodeSnippet(
+        language=sys.intern(language),
+        language_slug=sys.intern(language_slug),
+        code_snippet=code_snippet)
+
+@attr.s(auto_attribs=True, slots=True)
 class SingleLeetcodeProblem:
     ''' represents a single problem from leetcode
 
     fields are a combination of information returned from the `/api/problems/all`
     and the `graphql (questionData)` endpoints
 
+    there is one of these for every problem on leetcode, so they are slotted
+
     '''
 
     question_id:int = attr.ib()
@@ -82,6 +116,7 @@ class SingleLeetcodeProblem:
     slug:str = attr.ib()
     difficulty:int = attr.ib()
     paid_only:bool = attr.ib()
+    is_new_question:bool = attr.ib(default=False)
     question_content:str = attr.ib(default=None)
     code_snippets:typing.Mapping[str, SingleLeetcodeProblemCodeSnippet] = attr.ib(default=None)
 
@@ -106,8 +141,54 @@ class SingleLeetcodeProblem:
 
         return list(self.code_snippets.keys())
 
+    def to_dict(self) -> dict:
+        ''' returns the problem as a json friendly dict, see from_dict()
 
-@attr.s(auto_attribs=True)
+        @return a dict, with the code snippets as a list of [language, language slug, code snippet] lists
+        '''
+
+        code_snippet_list = None
+        if self.code_snippets is not None:
+            code_snippet_list = [[x.language, x.language_slug, x.code_snippet] for x in self.code_snippets.values()]
+
+        return {
+            "question_id": self.question_id,
+            "title": self.title,
+            "slug": self.slug,
+            "difficulty": self.difficulty,
+            "paid_only": self.paid_only,
+            "is_new_question": self.is_new_question,
+            "question_content": self.question_content,
+            "code_snippets": code_snippet_list,
+        }
+
+    @classmethod
+    def from_dict(cls, problem_dict:dict) -> "SingleLeetcodeProblem":
+        ''' creates a problem from a dict that to_dict() returned
+
+        @param problem_dict the dict
+        @return a SingleLeetcodeProblem
+        '''
+
+        code_snippet_dict = None
+        if problem_dict["code_snippets"] is not None:
+            code_snippet_memo = dict()
+            code_snippet_dict = {x[1]: make_code_snippet(*x, code_snippet_memo=code_snippet_memo)
+                for x in problem_dict["code_snippets"]}
+
+        return cls(
+            question_id=problem_dict["question_id"],
+            title=problem_dict["title"],
+            slug=problem_dict["slug"],
+            difficulty=problem_dict["difficulty"],
+            paid_only=problem_dict["paid_only"],
+            # snapshots and journals written before this field existed don't have it
+            is_new_question=problem_dict.get("is_new_question", False),
+            question_content=problem_dict["question_content"],
+            code_snippets=code_snippet_dict)
+
+
+@attr.s(auto_attribs=True, slots=True)
 class AllLeetcodeProblems:
     problems:typing.Mapping[int,SingleLeetcodeProblem] = attr.ib()
 
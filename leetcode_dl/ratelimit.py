@@ -0,0 +1,147 @@
+import email.utils
+import logging
+import random
+import threading
+import time
+import typing
+
+logger = logging.getLogger(__name__)
+
+def parse_retry_after(retry_after_header:typing.Optional[str]) -> typing.Optional[float]:
+    ''' parses the value of a `Retry-After` header, which is either a number of seconds or a http date
+
+    @param retry_after_header the value of the header, or None if it wasn't sent
+    @return the number of seconds to wait, or None if there was no (valid) header
+    '''
+
+    if not retry_after_header:
+        return None
+
+    try:
+        return max(0.0, float(retry_after_header))
+    except ValueError:
+        pass
+
+    try:
+        retry_after_datetime = email.utils.parsedate_to_datetime(retry_after_header)
+    except (TypeError, ValueError):
+        logger.warning("could not parse the Retry-After header `%s`, ignoring it", retry_after_header)
+        return None
+
+    return max(0.0, retry_after_datetime.timestamp() - time.time())
+
+def compute_backoff_seconds(attempt:int, base_seconds:float, max_seconds:float,
+        retry_after_seconds:typing.Optional[float]=None) -> float:
+    ''' returns how long to wait before retrying a failed request, using exponential backoff with
+    'full jitter', so that a bunch of threads that failed at the same time don't all retry at the same time
+
+    @param attempt which attempt just failed, starting at 0
+    @param base_seconds the backoff for the first attempt
+    @param max_seconds the most we will ever wait, not counting `retry_after_seconds`
+    @param retry_after_seconds what the server told us to wait in a `Retry-After` header, if anything, we never
+        wait less than this
+    @return the number of seconds to wait
+    '''
+
+    backoff_seconds = random.uniform(0, min(max_seconds, base_seconds * (2 ** attempt)))
+
+    if retry_after_seconds is not None:
+        backoff_seconds = max(backoff_seconds, retry_after_seconds)
+
+    return backoff_seconds
+
+class AdaptiveRateLimiter:
+    ''' a token bucket shared by every thread making requests, whose rate adapts to how the server is behaving
+
+    the rate gets multiplied up a little after every healthy response, and multiplied down a lot whenever we
+    get throttled (a 429 / 5xx / connection error), so we run at about the highest rate the server puts up with.
+    if the server sends a `Retry-After`, nobody gets a token until it has passed
+    '''
+
+    def __init__(self, initial_rate:float, min_rate:float, max_rate:float, burst:float,
+            increase_factor:float, decrease_factor:float, decrease_cooldown_seconds:float):
+        '''
+        constructor
+
+        @param initial_rate the requests per second we start at
+        @param min_rate the lowest the rate can go
+        @param max_rate the highest the rate can go
+        @param burst how many tokens the bucket holds, so how many requests can go out at once after being idle
+        @param increase_factor what the rate gets multiplied by after each healthy response
+        @param decrease_factor what the rate gets multiplied by after being throttled
+        @param decrease_cooldown_seconds the rate is only decreased once in this many seconds, so that a bunch of
+            requests failing at once only counts once
+        '''
+
+        self.min_rate = min_rate
+        self.max_rate = max(min_rate, max_rate)
+        self.rate = min(self.max_rate, max(self.min_rate, initial_rate))
+        self.burst = max(1.0, burst)
+        self.increase_factor = increase_factor
+        self.decrease_factor = decrease_factor
+        self.decrease_cooldown_seconds = decrease_cooldown_seconds
+
+        self.lock = threading.Lock()
+        self.tokens = 1.0
+        self.last_refill_time = time.monotonic()
+        self.paused_until_time = 0.0
+        self.last_decrease_time = None
+
+    def _refill(self, now:float):
+        '''
+        adds the tokens that have accumulated since the last refill, must be called with the lock held
+
+        @param now the current time.monotonic()
+        '''
+
+        self.tokens = min(self.burst, self.tokens + (now - self.last_refill_time) * self.rate)
+        self.last_refill_time = now
+
+    def acquire(self):
+        '''
+        blocks until we are allowed to make a request
+        '''
+
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self._refill(now)
+
+                seconds_to_wait = self.paused_until_time - now
+                if seconds_to_wait <= 0:
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+                    seconds_to_wait = (1 - self.tokens) / self.rate
+
+            time.sleep(seconds_to_wait)
+
+    def on_success(self):
+        '''
+        call after a healthy response, to ramp the rate up
+        '''
+
+        with self.lock:
+            self.rate = min(self.max_rate, self.rate * self.increase_factor)
+
+    def on_throttle(self, retry_after_seconds:typing.Optional[float]=None):
+        '''
+        call after the server throttled us or failed, to back the rate off
+
+        @param retry_after_seconds what the server told us to wait in a `Retry-After` header, if anything
+        '''
+
+        with self.lock:
+            now = time.monotonic()
+
+            if self.last_decrease_time is None or now - self.last_decrease_time >= self.decrease_cooldown_seconds:
+                self._refill(now)
+                old_rate = self.rate
+                self.rate = max(self.min_rate, self.rate * self.decrease_factor)
+                self.last_decrease_time = now
+                logger.info("throttled by the server, lowering the request rate from `%.2f` to `%.2f` requests per second",
+                    old_rate, self.rate)
+
+            if retry_after_seconds:
+                self.paused_until_time = max(self.paused_until_time, now + retry_after_seconds)
+                logger.info("server asked us to wait `%s` seconds before making more requests", retry_after_seconds)
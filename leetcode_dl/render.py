@@ -0,0 +1,161 @@
+import collections
+import logging
+import typing
+
+from leetcode_dl.model import SingleLeetcodeProblem, SingleLeetcodeProblemCodeSnippet
+from leetcode_dl import constants
+
+logger = logging.getLogger(__name__)
+
+def get_problem_folder_name(leetcode_problem:SingleLeetcodeProblem) -> str:
+    ''' returns the name of the folder that the files for a problem get written to
+
+    @param leetcode_problem the SingleLeetcodeProblem
+    @return the folder name, with any characters that are invalid in a path replaced
+    '''
+
+    # handle invalid character paths
+    tmp_title = leetcode_problem.title
+    escaped_title = constants.INVALID_FILEPATH_CHARACTER_REPLACEMENT_REGEX.sub("_", tmp_title)
+    if tmp_title != escaped_title:
+        logger.debug("escaped invalid path characters in original title `%s` to be `%s`", tmp_title, escaped_title)
+
+    return f"{leetcode_problem.question_id} - {escaped_title}"
+
+def get_problem_file_name(leetcode_problem:SingleLeetcodeProblem, code_snippet_obj:SingleLeetcodeProblemCodeSnippet,
+        include_language_slug:bool=False) -> str:
+    ''' returns the name of the source code file for a problem in a given programming language
+
+    @param leetcode_problem the SingleLeetcodeProblem
+    @param code_snippet_obj the SingleLeetcodeProblemCodeSnippet for the programming language
+    @param include_language_slug whether to put the language slug before the file extension, like
+        `1_two-sum.python3.py`, so languages that share a file extension don't share a file name
+    @return the file name
+    '''
+
+    if include_language_slug:
+        return (f"{leetcode_problem.question_id}_{leetcode_problem.slug}.{code_snippet_obj.language_slug}"
+            + f".{code_snippet_obj.get_code_snippet_file_extension()}")
+
+    return f"{leetcode_problem.question_id}_{leetcode_problem.slug}.{code_snippet_obj.get_code_snippet_file_extension()}"
+
+def get_language_slugs_to_name_by_language(file_name_policy:str, programming_languages:typing.Iterable[str]) -> typing.FrozenSet[str]:
+    ''' works out which programming languages get their language slug in their file names, see
+    get_problem_file_name()
+
+    @param file_name_policy one of the FILE_NAME_POLICY_* constants
+    @param programming_languages the language slugs that files are being written for
+    @return the set of language slugs whose file names should include the language slug
+    '''
+
+    if file_name_policy == constants.FILE_NAME_POLICY_LANGUAGE:
+        return frozenset(programming_languages)
+
+    if file_name_policy not in (constants.FILE_NAME_POLICY_EXTENSION, constants.FILE_NAME_POLICY_UNIQUE):
+        raise Exception(f"unknown file name policy `{file_name_policy}`, expected one of `{constants.FILE_NAME_POLICY_CHOICES}`")
+
+    # file extension -> the languages that use it
+    file_ext_to_language_slugs_dict = collections.defaultdict(set)
+    for iter_language_slug in programming_languages:
+        language_metadata = constants.KNOWN_LANGUAGE_SLUG_TO_FILE_EXT_DICT.get(iter_language_slug)
+        file_ext = language_metadata.file_ext if language_metadata else constants.DEFAULT_FILE_EXTENSION
+        file_ext_to_language_slugs_dict[file_ext].add(iter_language_slug)
+
+    result = frozenset(y for x in file_ext_to_language_slugs_dict.values() if len(x) > 1 for y in x)
+
+    if file_name_policy == constants.FILE_NAME_POLICY_EXTENSION:
+        if result:
+            logger.warning("these languages share a file extension, so they get written to the same file (which "
+                + "needs --overwrite, and keeps the last one), use `--file-name-policy %s` to keep all of them: `%s`",
+                constants.FILE_NAME_POLICY_UNIQUE, sorted(result))
+        return frozenset()
+
+    if result:
+        logger.debug("these languages share a file extension, so their file names include the language slug: `%s`",
+            sorted(result))
+
+    return result
+
+class ProblemRenderer:
+    ''' renders the source code files for a single problem
+
+    every file for a problem starts with the same comment header (the title, url and question content), and there
+    are only a couple of comment styles, so the question content is normalised once and the header is built once per
+    comment style. each file is then just the shared header joined with the code snippet
+    '''
+
+    def __init__(self, leetcode_problem:SingleLeetcodeProblem):
+        '''
+        constructor
+
+        @param leetcode_problem the SingleLeetcodeProblem to render files for
+        '''
+
+        self.leetcode_problem = leetcode_problem
+
+        # the question content seems to have a mix of newlines and newlines + carriage returns, so
+        # get rid of the carriage returns. I think what is happening is python determines that it is
+        # `\n` newlines but since leetcode seems to be inconsistent , if i hae the carriage returns
+        # left in the string, i get gaps in the comments in the problem file which looks linda ugly
+        #
+        # NOTE: only split on `\n`, str.splitlines() would also split on a lone `\r` and a bunch of unicode line breaks
+        self.question_line_list = leetcode_problem.question_content.replace("\r", "").split("\n")
+
+        self.problem_url = f"{constants.LEETCODE_PROBLEM_URL_MINUS_SLUG_END_SLASH}{leetcode_problem.slug}"
+
+        # comment characters -> the rendered header
+        self.header_dict = dict()
+
+    def get_header(self, comment_characters:str) -> str:
+        '''
+        returns the comment header for the given comment style, building it the first time it is asked for
+
+        @param comment_characters the character(s) that start a comment
+        @return the header, which ends with the blank lines that go before the code snippet
+        '''
+
+        header = self.header_dict.get(comment_characters)
+        if header is not None:
+            return header
+
+        prefix = f"{comment_characters} "
+
+        # every line gets the prefix, and every line but the last one gets a newline. if the content ends in a
+        # newline then the last 'line' is empty and doesn't get written at all
+        question_comment = prefix + f"\n{prefix}".join(self.question_line_list)
+        if not self.question_line_list[-1]:
+            question_comment = question_comment[:-len(prefix)]
+
+        header = "".join((
+            f"{prefix}{self.leetcode_problem.title}\n",
+            f"{prefix}{self.problem_url}\n",
+            f"{comment_characters}\n",
+            question_comment,
+            "\n\n"))
+
+        self.header_dict[comment_characters] = header
+        return header
+
+    def render(self, code_snippet_obj:SingleLeetcodeProblemCodeSnippet) -> str:
+        '''
+        renders the contents of the source code file for the given programming language, which
+        is the problem title, url and question content in comments, followed by the code snippet
+
+        @param code_snippet_obj the SingleLeetcodeProblemCodeSnippet for the programming language
+        @return the contents of the file as a string
+        '''
+
+        return self.get_header(code_snippet_obj.get_code_snippet_comment_characters()) + code_snippet_obj.code_snippet
+
+def render_problem_file(leetcode_problem:SingleLeetcodeProblem, code_snippet_obj:SingleLeetcodeProblemCodeSnippet) -> str:
+    ''' renders the contents of the source code file for a problem in a given programming language
+
+    if you are rendering more than one language for the same problem, use a ProblemRenderer so the
+    header only gets built once per comment style
+
+    @param leetcode_problem the SingleLeetcodeProblem
+    @param code_snippet_obj the SingleLeetcodeProblemCodeSnippet for the programming language
+    @return the contents of the file as a string
+    '''
+
+    return ProblemRenderer(leetcode_problem).render(code_snippet_obj)
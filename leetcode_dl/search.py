@@ -0,0 +1,294 @@
+import collections
+import hashlib
+import json
+import logging
+import math
+import pathlib
+import re
+import sqlite3
+import typing
+
+import attr
+
+from leetcode_dl.model import SingleLeetcodeProblem
+from leetcode_dl import constants
+from leetcode_dl import render
+
+logger = logging.getLogger(__name__)
+
+# what counts as a word, the text is lowercased first
+SEARCH_TOKEN_REGEX = re.compile(r"[a-z0-9]+")
+
+def tokenize(text:str) -> typing.List[str]:
+    ''' splits text into the terms that get indexed (and searched for)
+
+    @param text the text
+    @return the list of terms, in order, with duplicates
+    '''
+
+    return SEARCH_TOKEN_REGEX.findall(text.lower())
+
+def compute_indexed_content_hash(leetcode_problem:SingleLeetcodeProblem) -> str:
+    ''' computes a hash of everything about a problem that ends up in the search index, so a problem that
+    hasn't changed doesn't get indexed again
+
+    @param leetcode_problem the SingleLeetcodeProblem
+    @return the hash as a hex string
+    '''
+
+    hash_input = json.dumps([leetcode_problem.question_id, leetcode_problem.title, leetcode_problem.slug,
+        leetcode_problem.difficulty, leetcode_problem.paid_only, leetcode_problem.question_content])
+
+    return hashlib.sha1(hash_input.encode("utf-8")).hexdigest()
+
+@attr.s(auto_attribs=True)
+class SearchHit:
+    ''' a single problem that matched a search
+    '''
+
+    question_id:int = attr.ib()
+    title:str = attr.ib()
+    slug:str = attr.ib()
+    difficulty:int = attr.ib()
+    paid_only:bool = attr.ib()
+    folder_name:str = attr.ib() # the folder the problem's files were written to
+    score:float = attr.ib()
+
+class SearchIndex:
+    ''' an inverted index of the title, slug and question content of every problem that has been written, stored
+    in a sqlite database next to the output, so finding problems doesn't have to read any of the problem files
+
+    every (term, problem) pair is a row in the `postings` table along with how many times the term shows up in
+    the problem (with title and slug terms counting extra), and searches are ranked with BM25. problems are
+    only indexed again if they changed, so `--incremental` runs only pay for what they wrote
+    '''
+
+    def __init__(self, index_path:pathlib.Path, create:bool=True):
+        '''
+        constructor
+
+        @param index_path the sqlite database to keep the index in
+        @param create whether to create the index if it doesn't exist, if False then a missing index raises
+        '''
+
+        self.index_path = pathlib.Path(index_path)
+
+        if not create and not self.index_path.exists():
+            raise Exception(f"there is no search index at `{self.index_path}`, it gets built by syncing to that folder")
+
+        self.connection = sqlite3.connect(str(self.index_path))
+
+        if not self._has_expected_version():
+            if not create:
+                raise Exception(f"the search index `{self.index_path}` is from a different version, sync to that "
+                    + "folder again to rebuild it")
+
+            logger.info("creating the search index `%s`", self.index_path)
+            self._create_tables()
+
+        self.uncommitted_count = 0
+        self.indexed_count = 0
+        self.unchanged_count = 0
+        self.closed = False
+
+    def _has_expected_version(self) -> bool:
+        '''
+        @return whether the database has the tables of the index version we understand
+        '''
+
+        try:
+            row = self.connection.execute("SELECT value FROM metadata WHERE key = 'version'").fetchone()
+        except sqlite3.OperationalError:
+            return False
+
+        return row is not None and row[0] == str(constants.SEARCH_INDEX_VERSION)
+
+    def _create_tables(self):
+        '''
+        (re)creates the tables, throwing away anything that was in them
+        '''
+
+        self.connection.executescript(f'''
+            DROP TABLE IF EXISTS metadata;
+            DROP TABLE IF EXISTS problems;
+            DROP TABLE IF EXISTS postings;
+
+            CREATE TABLE metadata (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL);
+
+            CREATE TABLE problems (
+                question_id INTEGER PRIMARY KEY,
+                title TEXT NOT NULL,
+                slug TEXT NOT NULL,
+                difficulty INTEGER NOT NULL,
+                paid_only INTEGER NOT NULL,
+                folder_name TEXT NOT NULL,
+                content_hash TEXT NOT NULL,
+                term_count INTEGER NOT NULL);
+
+            CREATE TABLE postings (
+                term TEXT NOT NULL,
+                question_id INTEGER NOT NULL,
+                frequency INTEGER NOT NULL,
+                PRIMARY KEY (term, question_id)) WITHOUT ROWID;
+
+            CREATE INDEX postings_question_id ON postings (question_id);
+
+            INSERT INTO metadata VALUES ('version', '{constants.SEARCH_INDEX_VERSION}');''')
+
+        self.connection.commit()
+
+    def add_problem(self, leetcode_problem:SingleLeetcodeProblem) -> bool:
+        '''
+        adds a problem to the index, replacing whatever was indexed for it before
+
+        @param leetcode_problem the SingleLeetcodeProblem, with the question content filled in
+        @return True if the problem was (re)indexed, False if it was already indexed and hasn't changed
+        '''
+
+        content_hash = compute_indexed_content_hash(leetcode_problem)
+
+        row = self.connection.execute("SELECT content_hash FROM problems WHERE question_id = ?",
+            (leetcode_problem.question_id,)).fetchone()
+        if row is not None and row[0] == content_hash:
+            self.unchanged_count += 1
+            return False
+
+        # the title and slug say what a problem is about far better than a random word in the description does
+        term_counter = collections.Counter(tokenize(leetcode_problem.question_content or ""))
+        for iter_term in tokenize(leetcode_problem.title) + tokenize(leetcode_problem.slug):
+            term_counter[iter_term] += constants.SEARCH_INDEX_TITLE_WEIGHT
+
+        self.connection.execute("DELETE FROM postings WHERE question_id = ?", (leetcode_problem.question_id,))
+        self.connection.executemany("INSERT INTO postings VALUES (?, ?, ?)",
+            ((x, leetcode_problem.question_id, y) for x, y in term_counter.items()))
+        self.connection.execute("INSERT OR REPLACE INTO problems VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (leetcode_problem.question_id, leetcode_problem.title, leetcode_problem.slug, leetcode_problem.difficulty,
+                leetcode_problem.paid_only, render.get_problem_folder_name(leetcode_problem), content_hash,
+                sum(term_counter.values())))
+
+        self.indexed_count += 1
+        self.uncommitted_count += 1
+        if self.uncommitted_count >= constants.SEARCH_INDEX_COMMIT_EVERY_PROBLEMS:
+            self.connection.commit()
+            self.uncommitted_count = 0
+
+        return True
+
+    def _get_term_postings(self, query_term:str) -> typing.Dict[str, typing.List[typing.Tuple[int, int]]]:
+        '''
+        @param query_term a term from the query, a term ending in `*` matches every term starting with it
+        @return a dict of matching term -> list of (question_id, frequency)
+        '''
+
+        if query_term.endswith("*"):
+            term_prefix = query_term.rstrip("*")
+            if not term_prefix:
+                return dict()
+
+            # every term that starts with the prefix sorts between the prefix and the prefix with its last
+            # character bumped up by one
+            cursor = self.connection.execute(
+                "SELECT term, question_id, frequency FROM postings WHERE term >= ? AND term < ?",
+                (term_prefix, term_prefix[:-1] + chr(ord(term_prefix[-1]) + 1)))
+        else:
+            cursor = self.connection.execute(
+                "SELECT term, question_id, frequency FROM postings WHERE term = ?", (query_term,))
+
+        result_dict = collections.defaultdict(list)
+        for iter_term, iter_question_id, iter_frequency in cursor:
+            result_dict[iter_term].append((iter_question_id, iter_frequency))
+
+        return result_dict
+
+    def search(self, query:str, difficulty_levels:typing.Optional[typing.Collection[int]]=None,
+            limit:int=constants.DEFAULT_SEARCH_LIMIT) -> typing.List[SearchHit]:
+        '''
+        finds the problems that have every term of the query in their title, slug or question content
+
+        a term ending in `*` matches any term that starts with it, and a query that is exactly the slug of a
+        problem always puts that problem first
+
+        @param query the search query
+        @param difficulty_levels if provided, only problems with one of these `difficulty.level` values are returned
+        @param limit the most hits to return
+        @return the list of SearchHit objects, best match first
+        '''
+
+        query_term_list = [x + "*" if y else x
+            for x, y in re.findall(r"([a-z0-9]+)(\*?)", query.lower())]
+        if not query_term_list:
+            return []
+
+        problem_count, average_term_count = self.connection.execute(
+            "SELECT COUNT(*), AVG(term_count) FROM problems").fetchone()
+        if not problem_count:
+            return []
+
+        # term_count of every problem, needed to normalise the scores by length
+        term_count_dict = dict(self.connection.execute("SELECT question_id, term_count FROM problems"))
+
+        score_dict = None
+        for iter_query_term in dict.fromkeys(query_term_list):
+
+            query_term_score_dict = collections.defaultdict(float)
+            for iter_postings_list in self._get_term_postings(iter_query_term).values():
+
+                # the rarer the term, the more a match counts
+                document_frequency = len(iter_postings_list)
+                idf = math.log(1 + (problem_count - document_frequency + 0.5) / (document_frequency + 0.5))
+
+                for iter_question_id, iter_frequency in iter_postings_list:
+                    length_norm = 1 - constants.SEARCH_BM25_B + constants.SEARCH_BM25_B \
+                        * term_count_dict[iter_question_id] / average_term_count
+                    query_term_score_dict[iter_question_id] += idf * iter_frequency * (constants.SEARCH_BM25_K1 + 1) \
+                        / (iter_frequency + constants.SEARCH_BM25_K1 * length_norm)
+
+            # every term has to match
+            if score_dict is None:
+                score_dict = query_term_score_dict
+            else:
+                score_dict = {x: y + query_term_score_dict[x] for x, y in score_dict.items() if x in query_term_score_dict}
+
+            if not score_dict:
+                return []
+
+        hit_list = []
+        for iter_row in self.connection.execute(
+                "SELECT question_id, title, slug, difficulty, paid_only, folder_name FROM problems"):
+
+            question_id, title, slug, difficulty, paid_only, folder_name = iter_row
+            if question_id not in score_dict:
+                continue
+            if difficulty_levels is not None and difficulty not in difficulty_levels:
+                continue
+
+            score = score_dict[question_id]
+            if slug == query.strip().lower():
+                score = math.inf
+
+            hit_list.append(SearchHit(question_id=question_id, title=title, slug=slug, difficulty=difficulty,
+                paid_only=bool(paid_only), folder_name=folder_name, score=score))
+
+        hit_list.sort(key=lambda x: (-x.score, x.question_id))
+
+        return hit_list[:limit]
+
+    def close(self):
+        '''
+        commits anything that hasn't been committed yet and closes the database
+
+        calling this more than once does nothing
+        '''
+
+        if self.closed:
+            return
+        self.closed = True
+
+        self.connection.commit()
+        self.connection.close()
+
+        if self.indexed_count or self.unchanged_count:
+            logger.info("search index `%s` indexed `%s` problems, `%s` were unchanged", self.index_path,
+                self.indexed_count, self.unchanged_count)
@@ -0,0 +1,128 @@
+import argparse
+import fnmatch
+import logging
+import typing
+
+import attr
+
+from leetcode_dl.model import SingleLeetcodeProblem, AllLeetcodeProblems
+from leetcode_dl import constants
+
+logger = logging.getLogger(__name__)
+
+def get_problem_shard(question_id:int, shard_count:int) -> int:
+    ''' returns which shard a problem belongs to
+
+    this only depends on the question_id, so every machine agrees on it no matter what order the problems
+    come back in or what other problems exist, and a problem never moves to a different shard
+
+    @param question_id the question_id of the problem
+    @param shard_count how many shards there are
+    @return the shard number, from 1 to `shard_count`
+    '''
+
+    return question_id % shard_count + 1
+
+@attr.s(auto_attribs=True)
+class ProblemSelection:
+    ''' decides which problems get fetched, using only the fields we get from the /api/problems/all api, so
+    the problems that get left out never cost us a questionData request
+
+    every field defaults to selecting everything
+    '''
+
+    difficulty_levels:typing.Optional[typing.FrozenSet[int]] = attr.ib(default=None) # the `difficulty.level` values to keep
+    paid_only:str = attr.ib(default=constants.SELECTION_INCLUDE) # one of constants.SELECTION_CHOICES
+    new_questions:str = attr.ib(default=constants.SELECTION_INCLUDE) # one of constants.SELECTION_CHOICES
+    question_id_ranges:typing.Optional[typing.List[typing.Tuple[int, int]]] = attr.ib(default=None) # inclusive (low, high) pairs
+    slug_globs:typing.Optional[typing.List[str]] = attr.ib(default=None) # fnmatch style patterns
+    shard:typing.Optional[typing.Tuple[int, int]] = attr.ib(default=None) # (shard number, shard count), see get_problem_shard()
+
+    @classmethod
+    def from_args(cls, args:argparse.Namespace) -> "ProblemSelection":
+        ''' creates a ProblemSelection from the command line arguments
+
+        @param args the parsed arguments
+        @return a ProblemSelection
+        '''
+
+        difficulty_levels = None
+        if getattr(args, "difficulty", None):
+            difficulty_levels = frozenset(constants.DIFFICULTY_NAME_TO_LEVEL_DICT[x] for x in args.difficulty)
+
+        return cls(
+            difficulty_levels=difficulty_levels,
+            paid_only=getattr(args, "paid_only", None) or constants.SELECTION_INCLUDE,
+            new_questions=getattr(args, "new_questions", None) or constants.SELECTION_INCLUDE,
+            question_id_ranges=getattr(args, "question_ids", None) or None,
+            slug_globs=getattr(args, "slugs", None) or None,
+            shard=getattr(args, "shard", None))
+
+    def is_everything(self) -> bool:
+        '''
+        @return True if this selects every problem, so there is no point in going through them
+        '''
+
+        return self == ProblemSelection()
+
+    def matches(self, leetcode_problem:SingleLeetcodeProblem) -> bool:
+        '''
+        @param leetcode_problem the SingleLeetcodeProblem, only the /api/problems/all fields are looked at
+        @return whether the problem is selected
+        '''
+
+        if self.difficulty_levels is not None and leetcode_problem.difficulty not in self.difficulty_levels:
+            return False
+
+        if not self._matches_flag(self.paid_only, leetcode_problem.paid_only):
+            return False
+
+        if not self._matches_flag(self.new_questions, leetcode_problem.is_new_question):
+            return False
+
+        if self.question_id_ranges is not None and not any(low <= leetcode_problem.question_id <= high
+                for low, high in self.question_id_ranges):
+            return False
+
+        if self.slug_globs is not None and not any(fnmatch.fnmatchcase(leetcode_problem.slug, x)
+                for x in self.slug_globs):
+            return False
+
+        if self.shard is not None:
+            shard_number, shard_count = self.shard
+            if get_problem_shard(leetcode_problem.question_id, shard_count) != shard_number:
+                return False
+
+        return True
+
+    @staticmethod
+    def _matches_flag(selection_choice:str, flag_value:bool) -> bool:
+        '''
+        @param selection_choice one of constants.SELECTION_CHOICES
+        @param flag_value the value of the flag on the problem
+        @return whether a problem with that flag value is selected
+        '''
+
+        if selection_choice == constants.SELECTION_EXCLUDE:
+            return not flag_value
+        elif selection_choice == constants.SELECTION_ONLY:
+            return bool(flag_value)
+        else:
+            return True
+
+    def select(self, all_problems:AllLeetcodeProblems) -> AllLeetcodeProblems:
+        '''
+        returns only the selected problems
+
+        @param all_problems the AllLeetcodeProblems we got from the /api/problems/all api
+        @return a AllLeetcodeProblems that only has the selected problems, in the same order
+        '''
+
+        if self.is_everything():
+            return all_problems
+
+        result_dict = {x: y for x, y in all_problems.problems.items() if self.matches(y)}
+
+        logger.info("`%s` of `%s` problems were selected", len(result_dict), len(all_problems.problems))
+
+        return AllLeetcodeProblems(problems=result_dict)
@@ -0,0 +1,431 @@
+import copy
+import email.utils
+import gzip
+import hashlib
+import http.server
+import json
+import logging
+import pathlib
+import random
+import re
+import secrets
+import socket
+import struct
+import threading
+import time
+import typing
+import urllib.parse
+
+import attr
+
+logger = logging.getLogger(__name__)
+
+EXAMPLE_RESPONSES_FOLDER = pathlib.Path(__file__).resolve().parent.parent / "example_requests_responses"
+
+# pulls the `alias: question(titleSlug: $variable)` selections out of a batched questionData query
+BATCHED_QUESTION_SELECTION_REGEX = re.compile(r"(\w+)\s*:\s*question\s*\(\s*titleSlug\s*:\s*\$(\w+)\s*\)")
+
+@attr.s(auto_attribs=True)
+class SimulatorConfig:
+    ''' how the simulated leetcode server should behave
+    '''
+
+    # how many problems the catalogue has, or None to serve the captured catalogue as is
+    problem_count:typing.Optional[int] = attr.ib(default=None)
+
+    # every request waits `latency_seconds`, plus a random amount up to `latency_jitter_seconds`
+    latency_seconds:float = attr.ib(default=0.0)
+    latency_jitter_seconds:float = attr.ib(default=0.0)
+
+    # the fraction of requests that get a 429 or 5xx response
+    error_rate:float = attr.ib(default=0.0)
+
+    # the fraction of requests that get the connection reset instead of a response
+    reset_rate:float = attr.ib(default=0.0)
+
+    # the value of the Retry-After header sent along with 429 responses, or None to not send one
+    retry_after_seconds:typing.Optional[float] = attr.ib(default=1.0)
+
+    # the seed for the random number generator, so runs are repeatable
+    seed:typing.Optional[int] = attr.ib(default=None)
+
+class SimulatorCatalogue:
+    ''' the problems that the simulator serves, in the same shapes as the captured responses
+    '''
+
+    def __init__(self, problem_count:typing.Optional[int], seed:typing.Optional[int]):
+        '''
+        constructor
+
+        @param problem_count how many problems to generate, or None to use the captured catalogue
+        @param seed the seed for the random number generator used to generate the catalogue
+        '''
+
+        with open(EXAMPLE_RESPONSES_FOLDER / "api_problems_all_json_response.txt", "r", encoding="utf-8") as f:
+            self.api_problems_all_dict = json.load(f)
+
+        with open(EXAMPLE_RESPONSES_FOLDER / "graphql_questionData_response.txt", "r", encoding="utf-8") as f:
+            self.template_question_dict = json.load(f)["data"]["question"]
+
+        if problem_count is not None:
+            self.api_problems_all_dict["stat_status_pairs"] = self.generate_stat_status_pairs(problem_count, seed)
+
+        self.api_problems_all_dict["num_total"] = len(self.api_problems_all_dict["stat_status_pairs"])
+
+        # slug -> the entry in stat_status_pairs
+        self.slug_to_problem_dict = {x["stat"]["question__title_slug"].strip(): x
+            for x in self.api_problems_all_dict["stat_status_pairs"]}
+
+        # problems can get added while requests are being served
+        self.lock = threading.Lock()
+        self.encode_api_problems_all()
+
+    def encode_api_problems_all(self):
+        '''
+        encodes the /api/problems/all response, along with the `ETag` and `Last-Modified` that conditional
+        requests for it get checked against
+        '''
+
+        body = json.dumps(self.api_problems_all_dict).encode("utf-8")
+
+        # replaced as a whole, so a request never sees the body of one version with the ETag of another
+        self.api_problems_all_response = (body, f'"{hashlib.sha1(body).hexdigest()}"',
+            email.utils.formatdate(time.time(), usegmt=True))
+
+    def add_problem(self) -> dict:
+        '''
+        adds a new problem to the catalogue, like leetcode does every now and then, using the first problem as
+        a template
+
+        @return the new entry in stat_status_pairs
+        '''
+
+        with self.lock:
+            question_id = max(x["stat"]["question_id"] for x in self.api_problems_all_dict["stat_status_pairs"]) + 1
+
+            problem_dict = copy.deepcopy(self.api_problems_all_dict["stat_status_pairs"][0])
+            problem_dict["stat"]["question_id"] = question_id
+            problem_dict["stat"]["frontend_question_id"] = question_id
+            problem_dict["stat"]["question__title"] = f"Added Problem {question_id}"
+            problem_dict["stat"]["question__title_slug"] = f"added-problem-{question_id}"
+            problem_dict["stat"]["is_new_question"] = True
+
+            # the newest problems come first
+            self.api_problems_all_dict["stat_status_pairs"].insert(0, problem_dict)
+            self.api_problems_all_dict["num_total"] = len(self.api_problems_all_dict["stat_status_pairs"])
+            self.slug_to_problem_dict[problem_dict["stat"]["question__title_slug"]] = problem_dict
+
+            self.encode_api_problems_all()
+
+        return problem_dict
+
+    def generate_stat_status_pairs(self, problem_count:int, seed:typing.Optional[int]) -> typing.List[dict]:
+        '''
+        generates a synthetic catalogue, using the first captured problem as a template
+
+        @param problem_count how many problems to generate
+        @param seed the seed for the random number generator
+        @return a list of dicts in the same shape as `stat_status_pairs`
+        '''
+
+        rng = random.Random(seed)
+        template_problem_dict = self.api_problems_all_dict["stat_status_pairs"][0]
+
+        result_list = []
+        for iter_question_id in range(1, problem_count + 1):
+            iter_problem_dict = copy.deepcopy(template_problem_dict)
+            iter_problem_dict["stat"]["question_id"] = iter_question_id
+            iter_problem_dict["stat"]["frontend_question_id"] = iter_question_id
+            iter_problem_dict["stat"]["question__title"] = f"Synthetic Problem {iter_question_id}"
+            iter_problem_dict["stat"]["question__title_slug"] = f"synthetic-problem-{iter_question_id}"
+            iter_problem_dict["stat"]["is_new_question"] = iter_question_id > problem_count - 10
+            iter_problem_dict["difficulty"]["level"] = rng.randint(1, 3)
+            iter_problem_dict["paid_only"] = rng.random() < 0.2
+            result_list.append(iter_problem_dict)
+
+        # the real api doesn't return them in order either
+        rng.shuffle(result_list)
+
+        return result_list
+
+    def get_question_data(self, slug:str) -> typing.Optional[dict]:
+        '''
+        returns the `question` part of a questionData response for the given slug
+
+        @param slug the titleSlug of the problem
+        @return the question dict, or None if there is no problem with that slug
+        '''
+
+        problem_dict = self.slug_to_problem_dict.get(slug)
+        if problem_dict is None:
+            return None
+
+        question_dict = dict(self.template_question_dict)
+        question_dict["questionId"] = str(problem_dict["stat"]["question_id"])
+        question_dict["questionFrontendId"] = str(problem_dict["stat"]["frontend_question_id"])
+        question_dict["title"] = problem_dict["stat"]["question__title"]
+        question_dict["titleSlug"] = slug
+        question_dict["content"] = (f"<p>This is <code>{slug}</code>.</p>\r\n" + self.template_question_dict["content"])
+
+        return question_dict
+
+class SimulatorStats:
+    ''' counts of what the simulator has done, so load tests can check how many faults were injected
+    '''
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counts = dict()
+
+    def increment(self, name:str, amount:int=1):
+        with self.lock:
+            self.counts[name] = self.counts.get(name, 0) + amount
+
+    def as_dict(self) -> dict:
+        with self.lock:
+            return dict(self.counts)
+
+class SimulatorRequestHandler(http.server.BaseHTTPRequestHandler):
+    ''' handles a single request to the simulated leetcode server
+    '''
+
+    # keep-alive, like the real site
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        logger.debug("%s - %s", self.address_string(), format % args)
+
+    def do_GET(self):
+        self.handle_request("GET")
+
+    def do_POST(self):
+        self.handle_request("POST")
+
+    def handle_request(self, method:str):
+        '''
+        injects any faults, and then dispatches the request to the right endpoint
+
+        @param method the http method of the request
+        '''
+
+        server = self.server
+        path = urllib.parse.urlsplit(self.path).path.rstrip("/") or "/"
+
+        request_body = b""
+        content_length = int(self.headers.get("Content-Length") or 0)
+        if content_length:
+            request_body = self.rfile.read(content_length)
+
+        server.stats.increment("requests")
+
+        # the simulator's own endpoints never have faults injected, so tests can always use them
+        if method == "GET" and path == "/__simulator/stats":
+            self.send_body(200, "application/json", json.dumps(server.stats.as_dict()).encode("utf-8"))
+            return
+
+        if method == "POST" and path == "/__simulator/add_problem":
+            self.send_body(200, "application/json", json.dumps(server.catalogue.add_problem()).encode("utf-8"))
+            return
+
+        config = server.config
+
+        latency = config.latency_seconds + server.random_uniform(0, config.latency_jitter_seconds)
+        if latency > 0:
+            time.sleep(latency)
+
+        if server.random_uniform(0, 1) < config.reset_rate:
+            server.stats.increment("connection_resets")
+            self.reset_connection()
+            return
+
+        if server.random_uniform(0, 1) < config.error_rate:
+            status_code = server.random_choice([429, 500, 502, 503])
+            server.stats.increment(f"status_{status_code}")
+            extra_headers = dict()
+            if status_code == 429 and config.retry_after_seconds is not None:
+                extra_headers["Retry-After"] = f"{config.retry_after_seconds:g}"
+            self.send_body(status_code, "text/plain", b"simulated error", extra_headers)
+            return
+
+        if method == "GET" and path == "/":
+            self.handle_homepage()
+        elif method == "POST" and path == "/accounts/login":
+            self.handle_login()
+        elif method == "GET" and path == "/api/problems/all":
+            self.handle_api_problems_all()
+        elif method == "POST" and path == "/graphql":
+            self.handle_graphql(request_body)
+        else:
+            self.send_body(404, "text/plain", b"not found")
+
+    def handle_homepage(self):
+        self.send_body(200, "text/html", b"<html><body>leetcode simulator</body></html>",
+            {"Set-Cookie": f"csrftoken={secrets.token_hex(16)}; Path=/"})
+
+    def handle_login(self):
+        # logging in gives you a new csrf token, like the real site
+        self.send_body(200, "text/html", b"<html><body>logged in</body></html>",
+            {"Set-Cookie": f"csrftoken={secrets.token_hex(16)}; Path=/"})
+
+    def handle_api_problems_all(self):
+        '''
+        sends the list of problems, or a 304 if the request's `If-None-Match` (or failing that, its
+        `If-Modified-Since`) says the client already has this version of it
+        '''
+
+        server = self.server
+        server.stats.increment("api_problems_all")
+
+        body, etag, last_modified = server.catalogue.api_problems_all_response
+        validator_headers = {"ETag": etag, "Last-Modified": last_modified}
+
+        if_none_match = self.headers.get("If-None-Match")
+        if if_none_match is not None:
+            not_modified = etag in [x.strip() for x in if_none_match.split(",")]
+        else:
+            not_modified = self.headers.get("If-Modified-Since") == last_modified
+
+        if not_modified:
+            server.stats.increment("api_problems_all_not_modified")
+            self.send_response(304)
+            for header_name, header_value in validator_headers.items():
+                self.send_header(header_name, header_value)
+            self.end_headers()
+            return
+
+        self.send_body(200, "application/json", body, validator_headers)
+
+    def handle_graphql(self, request_body:bytes):
+        '''
+        handles both the single questionData query, and the batched query that uses one alias per problem
+
+        @param request_body the body of the request
+        '''
+
+        server = self.server
+
+        try:
+            request_dict = json.loads(request_body)
+            variables_dict = request_dict.get("variables") or dict()
+            query = request_dict["query"]
+        except Exception as e:
+            self.send_body(400, "application/json", json.dumps({"errors": [{"message": str(e)}]}).encode("utf-8"))
+            return
+
+        data_dict = dict()
+        error_list = []
+
+        selection_list = BATCHED_QUESTION_SELECTION_REGEX.findall(query)
+        if not selection_list:
+            selection_list = [("question", "titleSlug")]
+
+        for iter_alias, iter_variable_name in selection_list:
+            server.stats.increment("graphql_questions")
+
+            question_dict = server.catalogue.get_question_data(variables_dict.get(iter_variable_name))
+            data_dict[iter_alias] = question_dict
+            if question_dict is None:
+                error_list.append({"message": "That question does not exist", "path": [iter_alias]})
+
+        server.stats.increment("graphql_requests")
+
+        response_dict = {"data": data_dict}
+        if error_list:
+            response_dict["errors"] = error_list
+
+        self.send_body(200, "application/json", json.dumps(response_dict).encode("utf-8"))
+
+    def send_body(self, status_code:int, content_type:str, body:bytes, extra_headers:typing.Mapping[str, str]=None):
+        '''
+        sends a response, gzipping it if the client asked for that
+
+        @param status_code the http status code
+        @param content_type the value of the Content-Type header
+        @param body the body of the response
+        @param extra_headers any other headers to send
+        '''
+
+        self.send_response(status_code)
+        self.send_header("Content-Type", content_type)
+
+        if "gzip" in (self.headers.get("Accept-Encoding") or ""):
+            body = gzip.compress(body, compresslevel=1)
+            self.send_header("Content-Encoding", "gzip")
+
+        self.send_header("Content-Length", str(len(body)))
+        for header_name, header_value in (extra_headers or dict()).items():
+            self.send_header(header_name, header_value)
+        self.end_headers()
+
+        self.wfile.write(body)
+        self.server.stats.increment("bytes_sent", len(body))
+
+    def reset_connection(self):
+        '''
+        closes the connection with a TCP RST instead of sending a response
+        '''
+
+        self.connection.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, struct.pack("ii", 1, 0))
+        self.close_connection = True
+        self.connection.close()
+
+class LeetcodeSimulatorServer(http.server.ThreadingHTTPServer):
+    ''' a local stand-in for leetcode.com that serves `/`, `/accounts/login`, `/api/problems/all` and `/graphql`
+    with the same shapes as the captured responses in `example_requests_responses`, for load and fault
+    injection testing
+
+    `GET /__simulator/stats` returns counts of what it has done, and `POST /__simulator/add_problem` adds a
+    problem to the catalogue
+
+    point the downloader at it with `--base-url http://<host>:<port>`
+    '''
+
+    daemon_threads = True
+
+    def __init__(self, server_address:typing.Tuple[str, int], config:SimulatorConfig):
+        '''
+        constructor
+
+        @param server_address the (host, port) to listen on, port 0 picks a free port
+        @param config the SimulatorConfig
+        '''
+
+        self.config = config
+        self.catalogue = SimulatorCatalogue(config.problem_count, config.seed)
+        self.stats = SimulatorStats()
+
+        self.rng = random.Random(config.seed)
+        self.rng_lock = threading.Lock()
+
+        super().__init__(server_address, SimulatorRequestHandler)
+
+    @property
+    def base_url(self) -> str:
+        ''' the url to pass to the downloader's `--base-url`
+        '''
+
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def random_uniform(self, low:float, high:float) -> float:
+        with self.rng_lock:
+            return self.rng.uniform(low, high)
+
+    def random_choice(self, choice_list:typing.Sequence):
+        with self.rng_lock:
+            return self.rng.choice(choice_list)
+
+    def start_in_background(self) -> threading.Thread:
+        '''
+        starts serving on a background daemon thread
+
+        @return the thread
+        '''
+
+        server_thread = threading.Thread(target=self.serve_forever, name="simulator", daemon=True)
+        server_thread.start()
+
+        logger.info("leetcode simulator listening on `%s` with `%s` problems", self.base_url,
+            len(self.catalogue.slug_to_problem_dict))
+
+        return server_thread
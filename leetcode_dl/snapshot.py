@@ -0,0 +1,276 @@
+import json
+import logging
+import mmap
+import os
+import pathlib
+import struct
+import tempfile
+import typing
+import zlib
+
+from leetcode_dl.model import SingleLeetcodeProblem
+from leetcode_dl import constants
+
+logger = logging.getLogger(__name__)
+
+# the layout of a snapshot file, everything is little endian:
+#
+# header:       magic, version, problem count, offset of the string table, offset of the question_id index,
+#               offset of the slug index
+# records:      one per problem, a u32 length followed by the zlib compressed json of SingleLeetcodeProblem.to_dict()
+# string table: every slug, utf-8 encoded, one after the other
+# qid index:    one (question_id, record offset) entry per problem, sorted by question_id
+# slug index:   one (string table offset, slug length, record offset) entry per problem, sorted by slug
+#
+# the indexes are fixed size entries so a lookup is a binary search over the mmap, without reading anything else
+SNAPSHOT_HEADER_STRUCT = struct.Struct("<8sIIQQQ")
+SNAPSHOT_RECORD_LENGTH_STRUCT = struct.Struct("<I")
+SNAPSHOT_QID_INDEX_ENTRY_STRUCT = struct.Struct("<qQ")
+SNAPSHOT_SLUG_INDEX_ENTRY_STRUCT = struct.Struct("<QIQ")
+
+class SnapshotWriter:
+    ''' writes a snapshot one problem at a time, so the problems never all have to be in memory at once
+
+    the snapshot is written to a temporary file and renamed over `snapshot_path` once it is complete
+    '''
+
+    def __init__(self, snapshot_path:pathlib.Path):
+        '''
+        constructor
+
+        @param snapshot_path where to write the snapshot
+        '''
+
+        self.snapshot_path = pathlib.Path(snapshot_path)
+
+        tmp_fd, self.tmp_path = tempfile.mkstemp(dir=self.snapshot_path.parent,
+            prefix=f".{self.snapshot_path.name}.", suffix=".tmp")
+        self.tmp_file = os.fdopen(tmp_fd, "wb")
+
+        # filled in properly once we know where everything is
+        self.tmp_file.write(SNAPSHOT_HEADER_STRUCT.pack(constants.SNAPSHOT_MAGIC, constants.SNAPSHOT_VERSION, 0, 0, 0, 0))
+
+        # question_id -> (slug, record offset)
+        self.record_dict = dict()
+        self.closed = False
+
+    def add_problem(self, leetcode_problem:SingleLeetcodeProblem):
+        '''
+        adds a problem to the snapshot, if a problem with the same question_id was already added then
+        the index points at this one instead
+
+        @param leetcode_problem the SingleLeetcodeProblem to add, with the question content and code snippets
+        '''
+
+        record_bytes = zlib.compress(
+            json.dumps(leetcode_problem.to_dict(), separators=(",", ":")).encode("utf-8"),
+            constants.SNAPSHOT_COMPRESSION_LEVEL)
+
+        record_offset = self.tmp_file.tell()
+        self.tmp_file.write(SNAPSHOT_RECORD_LENGTH_STRUCT.pack(len(record_bytes)))
+        self.tmp_file.write(record_bytes)
+
+        self.record_dict[leetcode_problem.question_id] = (leetcode_problem.slug, record_offset)
+
+    def close(self, succeeded:bool=True):
+        '''
+        writes the indexes and moves the snapshot into place
+
+        calling this more than once does nothing
+
+        @param succeeded whether every problem was added, if not then the snapshot is thrown away rather than
+            replacing an existing (complete) one
+        '''
+
+        if self.closed:
+            return
+        self.closed = True
+
+        if not succeeded:
+            self.tmp_file.close()
+            os.unlink(self.tmp_path)
+            logger.warning("abandoned writing the snapshot `%s`", self.snapshot_path)
+            return
+
+        try:
+            qid_index_list = sorted((x, y[1]) for x, y in self.record_dict.items())
+
+            # the string table, and the slug index that points into it
+            string_table_offset = self.tmp_file.tell()
+            slug_index_list = []
+            string_offset = 0
+            for iter_slug, iter_record_offset in sorted((x[0].encode("utf-8"), x[1]) for x in self.record_dict.values()):
+                self.tmp_file.write(iter_slug)
+                slug_index_list.append((string_offset, len(iter_slug), iter_record_offset))
+                string_offset += len(iter_slug)
+
+            qid_index_offset = self.tmp_file.tell()
+            self.tmp_file.write(b"".join(SNAPSHOT_QID_INDEX_ENTRY_STRUCT.pack(*x) for x in qid_index_list))
+
+            slug_index_offset = self.tmp_file.tell()
+            self.tmp_file.write(b"".join(SNAPSHOT_SLUG_INDEX_ENTRY_STRUCT.pack(*x) for x in slug_index_list))
+
+            self.tmp_file.seek(0)
+            self.tmp_file.write(SNAPSHOT_HEADER_STRUCT.pack(constants.SNAPSHOT_MAGIC, constants.SNAPSHOT_VERSION,
+                len(qid_index_list), string_table_offset, qid_index_offset, slug_index_offset))
+
+            self.tmp_file.close()
+
+            # mkstemp() only lets us read it, give it the permissions a normal file would have
+            current_umask = os.umask(0)
+            os.umask(current_umask)
+            os.chmod(self.tmp_path, 0o666 & ~current_umask)
+
+            os.replace(self.tmp_path, self.snapshot_path)
+
+        except Exception as e:
+            self.tmp_file.close()
+            os.unlink(self.tmp_path)
+            raise e
+
+        logger.info("saved a snapshot of `%s` problems to `%s`", len(qid_index_list), self.snapshot_path)
+
+def write_snapshot(snapshot_path:pathlib.Path, leetcode_problems:typing.Iterable[SingleLeetcodeProblem]):
+    ''' writes the given problems to a snapshot
+
+    @param snapshot_path where to write the snapshot
+    @param leetcode_problems the SingleLeetcodeProblem objects, with the question content and code snippets
+    '''
+
+    snapshot_writer = SnapshotWriter(snapshot_path)
+    succeeded = False
+    try:
+        for iter_problem in leetcode_problems:
+            snapshot_writer.add_problem(iter_problem)
+        succeeded = True
+    finally:
+        snapshot_writer.close(succeeded)
+
+class ProblemSnapshot:
+    ''' reads a snapshot through mmap, so opening it is instant and only the problems that are asked for get
+    read and decoded
+    '''
+
+    def __init__(self, snapshot_path:pathlib.Path):
+        '''
+        constructor
+
+        @param snapshot_path the snapshot to read
+        '''
+
+        self.snapshot_path = pathlib.Path(snapshot_path)
+
+        with open(self.snapshot_path, "rb") as f:
+            self.mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        try:
+            if len(self.mmap) < SNAPSHOT_HEADER_STRUCT.size:
+                raise Exception(f"the snapshot `{self.snapshot_path}` is too small to be a snapshot")
+
+            magic, version, self.problem_count, self.string_table_offset, self.qid_index_offset, \
+                self.slug_index_offset = SNAPSHOT_HEADER_STRUCT.unpack_from(self.mmap, 0)
+
+            if magic != constants.SNAPSHOT_MAGIC:
+                raise Exception(f"`{self.snapshot_path}` is not a snapshot")
+            if version != constants.SNAPSHOT_VERSION:
+                raise Exception(f"the snapshot `{self.snapshot_path}` has version `{version}` but we expected "
+                    + f"`{constants.SNAPSHOT_VERSION}`")
+
+        except Exception as e:
+            self.mmap.close()
+            raise e
+
+        logger.info("opened a snapshot of `%s` problems from `%s`", self.problem_count, self.snapshot_path)
+
+    def __len__(self) -> int:
+        return self.problem_count
+
+    def __enter__(self) -> "ProblemSnapshot":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        self.mmap.close()
+
+    def _read_record(self, record_offset:int) -> SingleLeetcodeProblem:
+        '''
+        @param record_offset the offset of the record from one of the indexes
+        @return the decoded SingleLeetcodeProblem
+        '''
+
+        (record_length,) = SNAPSHOT_RECORD_LENGTH_STRUCT.unpack_from(self.mmap, record_offset)
+        record_start = record_offset + SNAPSHOT_RECORD_LENGTH_STRUCT.size
+        record_bytes = zlib.decompress(self.mmap[record_start:record_start + record_length])
+
+        return SingleLeetcodeProblem.from_dict(json.loads(record_bytes))
+
+    def _get_qid_index_entry(self, index:int) -> typing.Tuple[int, int]:
+        return SNAPSHOT_QID_INDEX_ENTRY_STRUCT.unpack_from(self.mmap,
+            self.qid_index_offset + index * SNAPSHOT_QID_INDEX_ENTRY_STRUCT.size)
+
+    def _get_slug_index_entry(self, index:int) -> typing.Tuple[bytes, int]:
+        string_offset, slug_length, record_offset = SNAPSHOT_SLUG_INDEX_ENTRY_STRUCT.unpack_from(self.mmap,
+            self.slug_index_offset + index * SNAPSHOT_SLUG_INDEX_ENTRY_STRUCT.size)
+
+        slug_start = self.string_table_offset + string_offset
+        return self.mmap[slug_start:slug_start + slug_length], record_offset
+
+    def get_by_question_id(self, question_id:int) -> typing.Optional[SingleLeetcodeProblem]:
+        '''
+        @param question_id the question_id of the problem
+        @return the SingleLeetcodeProblem, or None if it isn't in the snapshot
+        '''
+
+        low, high = 0, self.problem_count
+        while low < high:
+            middle = (low + high) // 2
+            middle_question_id, record_offset = self._get_qid_index_entry(middle)
+
+            if middle_question_id == question_id:
+                return self._read_record(record_offset)
+            elif middle_question_id < question_id:
+                low = middle + 1
+            else:
+                high = middle
+
+        return None
+
+    def get_by_slug(self, slug:str) -> typing.Optional[SingleLeetcodeProblem]:
+        '''
+        @param slug the slug of the problem
+        @return the SingleLeetcodeProblem, or None if it isn't in the snapshot
+        '''
+
+        slug_bytes = slug.encode("utf-8")
+
+        low, high = 0, self.problem_count
+        while low < high:
+            middle = (low + high) // 2
+            middle_slug_bytes, record_offset = self._get_slug_index_entry(middle)
+
+            if middle_slug_bytes == slug_bytes:
+                return self._read_record(record_offset)
+            elif middle_slug_bytes < slug_bytes:
+                low = middle + 1
+            else:
+                high = middle
+
+        return None
+
+    def iter_question_ids(self) -> typing.Iterator[int]:
+        '''
+        @return a generator of every question_id in the snapshot, in order, without decoding any problems
+        '''
+
+        for iter_index in range(self.problem_count):
+            yield self._get_qid_index_entry(iter_index)[0]
+
+    def iter_problems(self) -> typing.Iterator[SingleLeetcodeProblem]:
+        '''
+        @return a generator of every problem in the snapshot, in question_id order, decoded one at a time
+        '''
+
+        for iter_index in range(self.problem_count):
+            yield self._read_record(self._get_qid_index_entry(iter_index)[1])
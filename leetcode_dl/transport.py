@@ -0,0 +1,165 @@
+import abc
+import logging
+import typing
+
+import attr
+
+from leetcode_dl import constants
+
+# requests is imported when a RequestsTransport gets created, so runs that never touch the network don't pay for it
+if typing.TYPE_CHECKING:
+    import requests
+
+logger = logging.getLogger(__name__)
+
+class TransportError(Exception):
+    ''' raised by a HttpTransport when a request fails without getting a response, like a connection error
+    or a timeout, so the caller can retry it without knowing which http client was used
+    '''
+
+    pass
+
+@attr.s(auto_attribs=True)
+class TransportResponse:
+    ''' a response from a HttpTransport, along with how big it was before it got decompressed
+    '''
+
+    response:"requests.Response" = attr.ib()
+    wire_bytes:int = attr.ib() # the size of the body as it came over the network, before decompressing, 0 if it was streamed
+    content_encoding:str = attr.ib() # the `Content-Encoding` the server used, `identity` if none
+
+class HttpTransport(abc.ABC):
+    ''' how the downloader sends its http requests, so the actual http client can be swapped out
+
+    whatever the implementation, the `Accept-Encoding` it asks for has to only list encodings that it can
+    decode, since the rest of the downloader expects to get back decoded bodies
+    '''
+
+    @abc.abstractmethod
+    def get_accept_encoding(self) -> str:
+        '''
+        @return the value to send as the `Accept-Encoding` header
+        '''
+
+    @abc.abstractmethod
+    def get_cookies(self) -> "requests.cookies.RequestsCookieJar":
+        '''
+        @return the cookie jar that every request sends and updates
+        '''
+
+    @abc.abstractmethod
+    def send(self, method:str, url:str, headers:typing.Optional[dict], params:typing.Optional[dict],
+            data:typing.Optional[typing.Union[str, dict]], stream:bool=False) -> TransportResponse:
+        '''
+        sends a request and reads the whole response, this has to be safe to call from multiple threads at once
+
+        @param method the http method
+        @param url the url
+        @param headers the headers to send, on top of any the transport always sends
+        @param params the query parameters
+        @param data the body
+        @param stream if True, only the status and the headers are read, and the body has to be read with
+            iter_body() (or the response closed)
+        @return a TransportResponse, with a body that is already decoded
+        @raise TransportError if the request failed without a response
+        '''
+
+    @abc.abstractmethod
+    def iter_body(self, response:"requests.Response", chunk_size:int) -> typing.Iterator[bytes]:
+        '''
+        reads the body of a response that send() streamed, a chunk at a time, and closes the response once it
+        has been read (or the caller stops early)
+
+        @param response the response from a TransportResponse that was sent with `stream=True`
+        @param chunk_size roughly how many bytes of the body to read at a time
+        @return a generator of the decoded chunks of the body
+        @raise TransportError if the connection fails part of the way through the body
+        '''
+
+    @abc.abstractmethod
+    def get_wire_bytes(self, response:"requests.Response") -> int:
+        '''
+        @param response the response from a TransportResponse
+        @return how many bytes of the body have come over the network so far, before decompressing
+        '''
+
+    def close(self):
+        ''' closes any connections the transport has open
+        '''
+
+        pass
+
+class RequestsTransport(HttpTransport):
+    ''' sends requests with a `requests.Session`
+
+    the connection pool is sized to how many requests are made at once, so every worker thread gets to keep
+    its connection alive instead of opening a new one (and throwing it away) for every request. `br` and `zstd`
+    are only asked for if the `brotli` and `zstandard` packages are installed, since those are what urllib3
+    uses to decode them
+    '''
+
+    def __init__(self, pool_size:int):
+        '''
+        constructor
+
+        @param pool_size how many connections to keep open to a host, this should be the number of threads
+            making requests at once
+        '''
+
+        import requests
+        import requests.adapters
+        import urllib3
+
+        # we have to catch its exceptions in send()
+        self.requests_exception_type = requests.RequestException
+
+        self.session = requests.session()
+        self.session.headers.update({'User-Agent': constants.USER_AGENT_STRING})
+
+        http_adapter = requests.adapters.HTTPAdapter(pool_maxsize=pool_size)
+        self.session.mount("https://", http_adapter)
+        self.session.mount("http://", http_adapter)
+
+        # urllib3 works out what it can decode from what packages are installed
+        self.accept_encoding = urllib3.util.make_headers(accept_encoding=True)["accept-encoding"]
+
+        logger.info("http transport using a connection pool of `%s` and accepting the encodings `%s`",
+            pool_size, self.accept_encoding)
+
+    def get_accept_encoding(self) -> str:
+        return self.accept_encoding
+
+    def get_cookies(self) -> "requests.cookies.RequestsCookieJar":
+        return self.session.cookies
+
+    def send(self, method:str, url:str, headers:typing.Optional[dict], params:typing.Optional[dict],
+            data:typing.Optional[typing.Union[str, dict]], stream:bool=False) -> TransportResponse:
+
+        try:
+            response = self.session.request(method=method, url=url, headers=headers, params=params, data=data,
+                stream=stream)
+        except self.requests_exception_type as e:
+            raise TransportError(f"{method} {url} failed: {e}") from e
+
+        # unless we are streaming, requests has read (and decoded) the whole body by now
+        return TransportResponse(
+            response=response,
+            wire_bytes=0 if stream else self.get_wire_bytes(response),
+            content_encoding=response.headers.get("Content-Encoding", "identity"))
+
+    def iter_body(self, response:"requests.Response", chunk_size:int) -> typing.Iterator[bytes]:
+
+        try:
+            yield from response.iter_content(chunk_size)
+        except self.requests_exception_type as e:
+            raise TransportError(f"reading the body of {response.url} failed: {e}") from e
+        finally:
+            response.close()
+
+    def get_wire_bytes(self, response:"requests.Response") -> int:
+
+        # urllib3 counts the bytes it read off the socket
+        return response.raw.tell()
+
+    def close(self):
+        self.session.close()
@@ -1,24 +1,105 @@
 import argparse
 import pathlib
 import logging
+import logging.handlers
+import math
+import queue
+import sys
+import time
 import typing
 import pathlib
 
-import arrow
-
 from leetcode_dl import constants
 
 class ArrowLoggingFormatter(logging.Formatter):
-    ''' logging.Formatter subclass that uses arrow, that formats the timestamp
-    to the local timezone (but its in ISO format)
+    ''' logging.Formatter subclass that formats the timestamp to the local timezone (but its in ISO format)
+
+    this used to go through arrow for every record, it now gives the exact same output by itself. the date, the
+    time up to the second and the utc offset only change once a second, so they are cached and most records
+    only have to format their microseconds
     '''
 
     def __init__(self, fmt, dateFmt=None, style='%'):
         super().__init__(fmt, dateFmt)
 
+        # (whole second, date and time up to that second, utc offset), replaced as a whole so a thread
+        # formatting a record at the same time as another one never sees half of an update
+        self.cached_second = (None, None, None)
+
     def formatTime(self, record, datefmt=None):
-        # use the 'timestamp' format code
-        return arrow.get(f"{record.created}", "X").to("local").isoformat()
+
+        # the same rounding datetime.fromtimestamp() does
+        fraction, whole_second = math.modf(record.created)
+        whole_second = int(whole_second)
+        microsecond = round(fraction * 1000000)
+        if microsecond >= 1000000:
+            whole_second += 1
+            microsecond -= 1000000
+
+        cached_whole_second, date_time_string, utc_offset_string = self.cached_second
+        if whole_second != cached_whole_second:
+            date_time_string, utc_offset_string = format_local_second(whole_second)
+            self.cached_second = (whole_second, date_time_string, utc_offset_string)
+
+        # isoformat() leaves the microseconds out when there aren't any
+        if microsecond:
+            return f"{date_time_string}.{microsecond:06d}{utc_offset_string}"
+
+        return date_time_string + utc_offset_string
+
+def format_local_second(whole_second:int) -> typing.Tuple[str, str]:
+    ''' formats a unix timestamp in the local timezone
+
+    @param whole_second the unix timestamp, in whole seconds
+    @return a tuple of the date and time as `YYYY-MM-DDTHH:MM:SS`, and the utc offset as `+HH:MM`
+    '''
+
+    local_time = time.localtime(whole_second)
+
+    utc_offset_seconds = local_time.tm_gmtoff
+    sign = "-" if utc_offset_seconds < 0 else "+"
+    offset_hours, offset_seconds = divmod(abs(utc_offset_seconds), 3600)
+    offset_minutes, offset_seconds = divmod(offset_seconds, 60)
+
+    utc_offset_string = f"{sign}{offset_hours:02d}:{offset_minutes:02d}"
+    if offset_seconds:
+        utc_offset_string += f":{offset_seconds:02d}"
+
+    return time.strftime("%Y-%m-%dT%H:%M:%S", local_time), utc_offset_string
+
+class BackgroundQueueHandler(logging.handlers.QueueHandler):
+    ''' logging.handlers.QueueHandler that puts records on the queue as they are, so that formatting them
+    (the message as well as the timestamp and any traceback) happens on the QueueListener's thread too
+
+    the stock QueueHandler formats the message before queueing the record, in case the arguments get changed
+    afterwards, but nothing we log gets changed once it has been logged
+    '''
+
+    def prepare(self, record):
+        return record
+
+def start_background_logging(logger:logging.Logger) -> logging.handlers.QueueListener:
+    ''' moves the handlers of a logger onto a background thread, so that logging a record only costs the thread
+    that logs it a queue put, and the formatting and writing happen on the listener's thread
+
+    the listener has to be stopped before exiting, or the records still in the queue are lost
+
+    @param logger the logger to move the handlers of, usually the root logger
+    @return the started QueueListener
+    '''
+
+    handler_list = list(logger.handlers)
+    for iter_handler in handler_list:
+        logger.removeHandler(iter_handler)
+
+    log_queue = queue.SimpleQueue()
+    logger.addHandler(BackgroundQueueHandler(log_queue))
+
+    # each handler still gets to filter by its own level, like it did when it was attached to the logger
+    queue_listener = logging.handlers.QueueListener(log_queue, *handler_list, respect_handler_level=True)
+    queue_listener.start()
+
+    return queue_listener
 
 def isDirectoryType(stringArg):
     ''' helper method for argparse to see if the argument is a directory
@@ -57,6 +138,48 @@ def isFileType(filePath):
 
     return path_resolved
 
+def questionIdRangeType(stringArg):
+    ''' helper method for argparse to parse a question_id range, like `1-100`, `250`, `2000-` or `-50`
+    @param stringArg - the argument we get from argparse
+    @return a (low, high) tuple, both inclusive, or raises ArgumentTypeError if it isn't a range'''
+
+    low_str, separator, high_str = stringArg.partition("-")
+
+    try:
+        if not separator:
+            low = high = int(low_str)
+        else:
+            low = int(low_str) if low_str.strip() else 0
+            high = int(high_str) if high_str.strip() else sys.maxsize
+
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"`{stringArg}` is not a question_id or a range like `1-100`")
+
+    if low > high:
+        raise argparse.ArgumentTypeError(f"the range `{stringArg}` is backwards")
+
+    return (low, high)
+
+def shardType(stringArg):
+    ''' helper method for argparse to parse a shard, like `2/4` for the second of four shards
+    @param stringArg - the argument we get from argparse
+    @return a (shard number, shard count) tuple, or raises ArgumentTypeError if it isn't a shard'''
+
+    shard_number_str, _, shard_count_str = stringArg.partition("/")
+
+    try:
+        shard_number = int(shard_number_str)
+        shard_count = int(shard_count_str)
+
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"`{stringArg}` is not a shard like `2/4`")
+
+    if not 1 <= shard_number <= shard_count:
+        raise argparse.ArgumentTypeError(f"the shard `{stringArg}` has to be between `1/{max(shard_count, 1)}` and "
+            + f"`{max(shard_count, 1)}/{max(shard_count, 1)}`")
+
+    return (shard_number, shard_count)
+
 
 def get_choices_for_programming_language() -> typing.List[str]:
     ''' returns the possible choices for a programming language that we support
@@ -72,3 +195,17 @@ def get_choices_for_programming_language() -> typing.List[str]:
     tmp.append(constants.PROGRAMMING_LANGUAGE_CHOICE_ALL)
     return tmp
 
+
+
+def resolve_programming_languages(programming_languages:typing.List[str]) -> typing.List[str]:
+    ''' returns the programming languages that we should write files for, expanding the special
+    'ALL' value into every supported language
+
+    @param programming_languages the list of programming languages the user passed in
+    @return a list of language slug strings
+    '''
+
+    if constants.PROGRAMMING_LANGUAGE_CHOICE_ALL in programming_languages:
+        return [x for x in get_choices_for_programming_language() if x != constants.PROGRAMMING_LANGUAGE_CHOICE_ALL]
+    else:
+        return list(programming_languages)
@@ -0,0 +1,228 @@
+import datetime
+import http.server
+import json
+import logging
+import threading
+import time
+import typing
+import urllib.parse
+
+from leetcode_dl import constants
+from leetcode_dl import metrics
+
+logger = logging.getLogger(__name__)
+
+SYNC_RESULT_WRITTEN = "written"
+SYNC_RESULT_NOT_MODIFIED = "not_modified"
+SYNC_RESULT_FAILED = "failed"
+
+def format_timestamp(timestamp:typing.Optional[float]) -> typing.Optional[str]:
+    '''
+    @param timestamp a unix timestamp, or None
+    @return the timestamp as an ISO 8601 string in UTC, or None
+    '''
+
+    if timestamp is None:
+        return None
+
+    return datetime.datetime.fromtimestamp(timestamp, datetime.timezone.utc).isoformat()
+
+class WatchStatus:
+    ''' what `--watch` is doing, updated by the sync loop and read by the status endpoint, so it is safe to use
+    from any thread
+    '''
+
+    def __init__(self, interval_seconds:float):
+        '''
+        constructor
+
+        @param interval_seconds how long the sync loop waits between the start of one sync and the next
+        '''
+
+        self.lock = threading.Lock()
+
+        self.interval_seconds = interval_seconds
+        self.start_time = time.time()
+
+        # the SyncMetrics of the sync that is running, or of the last one if we are waiting for the next one
+        self.sync_metrics = None
+        self.syncing = False
+
+        # SyncMetrics.as_dict() of the last sync as of when it finished, its rates would only go down afterwards
+        self.last_sync_metrics_dict = None
+
+        self.sync_count_dict = {SYNC_RESULT_WRITTEN: 0, SYNC_RESULT_NOT_MODIFIED: 0, SYNC_RESULT_FAILED: 0}
+        self.total_problems_written = 0
+
+        self.last_sync_start_time = None
+        self.last_sync_end_time = None
+        self.last_sync_result = None
+        self.last_sync_error = None
+        self.next_sync_time = None
+
+    def sync_started(self, sync_metrics:metrics.SyncMetrics):
+        '''
+        @param sync_metrics the SyncMetrics that the sync records everything in
+        '''
+
+        with self.lock:
+            self.sync_metrics = sync_metrics
+            self.syncing = True
+            self.last_sync_start_time = time.time()
+            self.next_sync_time = None
+
+    def sync_finished(self, sync_result:str, next_sync_time:float, error:typing.Optional[BaseException]=None):
+        '''
+        @param sync_result one of the SYNC_RESULT_* constants
+        @param next_sync_time the unix timestamp of when the next sync starts
+        @param error the exception if the sync failed
+        '''
+
+        metrics_dict = self.sync_metrics.as_dict()
+        problems_written = metrics_dict["counters"].get(metrics.COUNTER_PROBLEMS_WRITTEN, 0)
+
+        with self.lock:
+            self.syncing = False
+            self.last_sync_metrics_dict = metrics_dict
+            self.sync_count_dict[sync_result] += 1
+            self.total_problems_written += problems_written
+
+            self.last_sync_end_time = time.time()
+            self.last_sync_result = sync_result
+            self.last_sync_error = None if error is None else f"{type(error).__name__}: {error}"
+            self.next_sync_time = next_sync_time
+
+    def as_dict(self) -> dict:
+        '''
+        @return the status as a json friendly dict
+        '''
+
+        with self.lock:
+            result = {
+                "state": "syncing" if self.syncing else "waiting",
+                "started_at": format_timestamp(self.start_time),
+                "uptime_seconds": time.time() - self.start_time,
+                "interval_seconds": self.interval_seconds,
+                "syncs": dict(self.sync_count_dict),
+                "total_problems_written": self.total_problems_written,
+                "queue_depth": 0,
+                "current_sync": None,
+                "last_sync": None,
+                "next_sync_at": format_timestamp(self.next_sync_time),
+            }
+
+            if self.last_sync_result is not None:
+                result["last_sync"] = {
+                    "started_at": format_timestamp(self.last_sync_start_time),
+                    "finished_at": format_timestamp(self.last_sync_end_time),
+                    "result": self.last_sync_result,
+                    "error": self.last_sync_error,
+                    **summarize_sync_metrics(self.last_sync_metrics_dict),
+                }
+
+            current_sync_metrics = self.sync_metrics if self.syncing else None
+
+        if current_sync_metrics:
+            result["current_sync"] = summarize_sync_metrics(current_sync_metrics.as_dict())
+            result["queue_depth"] = result["current_sync"]["queue_depth"]
+
+        return result
+
+def summarize_sync_metrics(metrics_dict:dict) -> dict:
+    '''
+    @param metrics_dict what SyncMetrics.as_dict() returned
+    @return the parts of it that the status shows
+    '''
+
+    problems_expected = metrics_dict["gauges"].get(metrics.GAUGE_PROBLEMS_EXPECTED)
+    problems_written = metrics_dict["counters"].get(metrics.COUNTER_PROBLEMS_WRITTEN, 0)
+
+    # the problems that still have to be fetched and written, unknown until we have the list of problems
+    queue_depth = None
+    if problems_expected is not None:
+        queue_depth = max(0, problems_expected - problems_written)
+
+    return {
+        "elapsed_seconds": metrics_dict["elapsed_seconds"],
+        "problems_expected": problems_expected,
+        "problems_written": problems_written,
+        "queue_depth": queue_depth,
+        "http_requests": metrics_dict["counters"].get(metrics.COUNTER_HTTP_REQUESTS, 0),
+        **metrics_dict["rates"],
+    }
+
+class StatusRequestHandler(http.server.BaseHTTPRequestHandler):
+    ''' serves `/status` as json, and `/metrics` as the OpenMetrics text of the current (or last) sync
+    '''
+
+    def log_message(self, format, *args):
+        logger.debug("%s - %s", self.address_string(), format % args)
+
+    def do_GET(self):
+
+        path = urllib.parse.urlsplit(self.path).path.rstrip("/") or "/"
+
+        if path in ("/", "/status"):
+            self.send_body(200, "application/json", json.dumps(self.server.watch_status.as_dict(), indent=4) + "\n")
+        elif path == "/metrics":
+            sync_metrics = self.server.watch_status.sync_metrics
+            if sync_metrics is None:
+                self.send_body(503, "text/plain", "no sync has started yet\n")
+            else:
+                self.send_body(200, "application/openmetrics-text; version=1.0.0; charset=utf-8",
+                    sync_metrics.as_openmetrics())
+        else:
+            self.send_body(404, "text/plain", "not found\n")
+
+    def send_body(self, status_code:int, content_type:str, body:str):
+        '''
+        @param status_code the http status code
+        @param content_type the value of the Content-Type header
+        @param body the body of the response
+        '''
+
+        body_bytes = body.encode("utf-8")
+
+        self.send_response(status_code)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body_bytes)))
+        self.end_headers()
+
+        self.wfile.write(body_bytes)
+
+class StatusServer(http.server.ThreadingHTTPServer):
+    ''' a small http server for `--status-port`, that shows what `--watch` is doing
+    '''
+
+    daemon_threads = True
+
+    def __init__(self, port:int, watch_status:WatchStatus):
+        '''
+        constructor
+
+        @param port the port to listen on, 0 picks a free port
+        @param watch_status the WatchStatus to serve
+        '''
+
+        self.watch_status = watch_status
+
+        super().__init__((constants.WATCH_STATUS_HOST, port), StatusRequestHandler)
+
+    @property
+    def status_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/status"
+
+    def start_in_background(self) -> threading.Thread:
+        '''
+        starts serving on a background daemon thread
+
+        @return the thread
+        '''
+
+        server_thread = threading.Thread(target=self.serve_forever, name="status", daemon=True)
+        server_thread.start()
+
+        logger.info("serving the --watch status at `%s`", self.status_url)
+
+        return server_thread
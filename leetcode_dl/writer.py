@@ -0,0 +1,814 @@
+import abc
+import collections
+import concurrent.futures
+import errno
+import hashlib
+import io
+import logging
+import os
+import pathlib
+import sqlite3
+import tarfile
+import tempfile
+import time
+import typing
+import zipfile
+
+from leetcode_dl import constants
+from leetcode_dl import metrics
+
+logger = logging.getLogger(__name__)
+
+def encode_file_contents(file_contents:str) -> bytes:
+    ''' encodes the contents of a problem file the way it gets written to disk
+
+    @param file_contents the contents of the file
+    @return the bytes, in utf-8 with the platform's newlines, like a file opened in text mode would have
+    '''
+
+    if os.linesep != "\n":
+        file_contents = file_contents.replace("\n", os.linesep)
+
+    return file_contents.encode("utf-8")
+
+class ProblemFileWriter:
+    ''' writes the problem source code files to disk on a thread pool
+
+    the output folder is indexed once with os.scandir() when we start, so we don't need a stat() call per file
+    to see what already exists. files whose contents are byte for byte identical to what is already on disk are
+    skipped (so their mtime doesn't change), and everything else is written to a temporary file and then renamed
+    over the destination so nobody ever sees a half written file
+
+    writes to the same path (like two languages that share a file name) happen one after the other, in the order
+    they were given to write_file(), so the last one always wins like it would if they were written in order
+    '''
+
+    def __init__(self, output_folder:pathlib.Path, overwrite:bool, max_workers:int,
+            sync_metrics:typing.Optional[metrics.SyncMetrics]=None):
+        '''
+        constructor
+
+        @param output_folder the folder the problem folders get written to
+        @param overwrite whether we are allowed to replace an existing file whose contents differ
+        @param max_workers how many threads to write files with
+        @param sync_metrics the SyncMetrics to record the file counts and write latency in, if any
+        '''
+
+        self.output_folder = output_folder
+        self.overwrite = overwrite
+        self.max_workers = max(1, max_workers)
+        self.sync_metrics = sync_metrics
+
+        # folder name -> {file name -> file size}
+        self.existing_file_index = self.build_existing_file_index()
+
+        # os.umask() can only be read by setting it, so do it once now rather than in the worker threads
+        current_umask = os.umask(0)
+        os.umask(current_umask)
+        self.new_file_mode = 0o666 & ~current_umask
+
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="write")
+        self.pending_future_deque = collections.deque()
+
+        # file path -> the Future of the last write queued up for it, so a later write to the same path can wait
+        # for it. the finished ones get dropped every so often so this doesn't grow with the number of files
+        self.path_future_dict = dict()
+
+        self.files_written = 0
+        self.files_unchanged = 0
+        self.closed = False
+
+    def build_existing_file_index(self) -> typing.Mapping[str, typing.Mapping[str, int]]:
+        '''
+        scans the output folder (and the folders in it) to see what files already exist
+
+        @return a dict of folder name -> dict of file name -> file size
+        '''
+
+        result_dict = dict()
+
+        with os.scandir(self.output_folder) as output_folder_iter:
+            for iter_folder_entry in output_folder_iter:
+                if not iter_folder_entry.is_dir():
+                    continue
+
+                file_size_dict = dict()
+                with os.scandir(iter_folder_entry.path) as problem_folder_iter:
+                    for iter_file_entry in problem_folder_iter:
+                        if iter_file_entry.is_file():
+                            file_size_dict[iter_file_entry.name] = iter_file_entry.stat().st_size
+
+                result_dict[iter_folder_entry.name] = file_size_dict
+
+        logger.debug("indexed `%s` existing problem folders in `%s`", len(result_dict), self.output_folder)
+
+        return result_dict
+
+    def write_file(self, folder_name:str, file_name:str, file_contents:str):
+        '''
+        queues up a file to be written, if it is different from what is already on disk
+
+        any error from writing the file is raised from a later write_file() call or from close()
+
+        @param folder_name the name of the problem folder, relative to the output folder
+        @param file_name the name of the file in the problem folder
+        @param file_contents the contents of the file
+        '''
+
+        problem_folder = self.output_folder / folder_name
+
+        file_size_dict = self.existing_file_index.get(folder_name)
+        if file_size_dict is None:
+            logger.debug("-- creating problem folder: `%s`", problem_folder)
+            problem_folder.mkdir(exist_ok=True)
+            file_size_dict = dict()
+            self.existing_file_index[folder_name] = file_size_dict
+
+        file_bytes = encode_file_contents(file_contents)
+
+        existing_file_size = file_size_dict.get(file_name)
+        file_size_dict[file_name] = len(file_bytes)
+
+        file_path = problem_folder / file_name
+
+        write_future = self._queue_write(file_path, file_bytes, existing_file_size)
+        self.pending_future_deque.append(write_future)
+        self.path_future_dict[file_path] = write_future
+
+        pending_files_limit = self.max_workers * constants.WRITER_PENDING_FILES_PER_THREAD
+
+        # don't let the queue of files to write grow without bound
+        while len(self.pending_future_deque) > pending_files_limit:
+            self._collect_future(self.pending_future_deque.popleft())
+
+        if len(self.path_future_dict) > 2 * pending_files_limit:
+            self.path_future_dict = {x: y for x, y in self.path_future_dict.items() if not y.done()}
+
+    def _queue_write(self, file_path:pathlib.Path, file_bytes:bytes,
+            existing_file_size:typing.Optional[int]) -> concurrent.futures.Future:
+        '''
+        submits the write of a single file to the thread pool, after any earlier write to the same path
+
+        @param file_path the path of the file to write
+        @param file_bytes the contents of the file
+        @param existing_file_size the size of the existing file according to the index, or None if it doesn't exist
+        @return the Future of the write, which returns a tuple of whether the file was written and how many bytes
+            that took
+        '''
+
+        return self.executor.submit(self._write_file_in_worker, file_path, file_bytes, existing_file_size,
+            self.path_future_dict.get(file_path))
+
+    def _write_file_in_worker(self, file_path:pathlib.Path, file_bytes:bytes, existing_file_size:typing.Optional[int],
+            previous_future:typing.Optional[concurrent.futures.Future]=None) -> typing.Tuple[bool, int]:
+        '''
+        what runs on the thread pool, calls _write_file_if_changed() and records how long it took
+
+        @param previous_future the Future of an earlier write to the same path, which has to finish first. it was
+            queued up before this one, so it is already running (or done) by the time we get here and waiting on
+            it can't deadlock the pool
+        @return a tuple of what _write_file_if_changed() returned, and the size of the file
+        '''
+
+        # its error (if any) gets raised when it is collected, we only care that it is finished
+        if previous_future is not None:
+            concurrent.futures.wait([previous_future])
+
+        start_time = time.perf_counter()
+        try:
+            return self._write_file_if_changed(file_path, file_bytes, existing_file_size), len(file_bytes)
+        finally:
+            if self.sync_metrics:
+                self.sync_metrics.observe(metrics.STAGE_WRITE_FILE, time.perf_counter() - start_time)
+
+    def _write_file_if_changed(self, file_path:pathlib.Path, file_bytes:bytes, existing_file_size:typing.Optional[int]) -> bool:
+        '''
+        writes the file atomically, unless it already exists with the same contents
+
+        @param file_path the path of the file to write
+        @param file_bytes the contents of the file
+        @param existing_file_size the size of the existing file according to the index, or None if it doesn't exist
+        @return True if the file was written, False if it was unchanged
+        '''
+
+        if existing_file_size is not None:
+
+            # only bother reading the existing file if it could possibly be the same
+            if existing_file_size == len(file_bytes):
+                with open(file_path, "rb") as f:
+                    if hashlib.sha256(f.read()).digest() == hashlib.sha256(file_bytes).digest():
+                        logger.debug("------ file `%s` is unchanged, skipping", file_path)
+                        return False
+
+            if not self.overwrite:
+                raise Exception(f"the file `{file_path}` already exists and --overwrite was not provided, not writing over an existing file")
+
+        tmp_fd, tmp_path = tempfile.mkstemp(dir=file_path.parent, prefix=f".{file_path.name}.", suffix=".tmp")
+        try:
+            with os.fdopen(tmp_fd, "wb") as f:
+                f.write(file_bytes)
+            os.chmod(tmp_path, self.new_file_mode)
+            os.replace(tmp_path, file_path)
+        except Exception as e:
+            os.unlink(tmp_path)
+            raise e
+
+        logger.debug("------ wrote file `%s`", file_path)
+        return True
+
+    def _collect_future(self, future:concurrent.futures.Future):
+        '''
+        waits on a write to finish and updates the counts, raising any error the write had
+
+        @param future the Future from submitting _write_file_in_worker
+        '''
+
+        file_was_written, file_size = future.result()
+
+        if file_was_written:
+            self.files_written += 1
+        else:
+            self.files_unchanged += 1
+
+        if self.sync_metrics:
+            if file_was_written:
+                self.sync_metrics.increment(metrics.COUNTER_FILES_WRITTEN)
+                self.sync_metrics.increment(metrics.COUNTER_BYTES_WRITTEN, file_size)
+            else:
+                self.sync_metrics.increment(metrics.COUNTER_FILES_UNCHANGED)
+
+    def close(self, succeeded:bool=True):
+        '''
+        waits for every queued file to be written, raising the first error that happened
+
+        calling this more than once does nothing
+
+        @param succeeded whether the sync succeeded. if it didn't, the queued files that haven't started being
+            written are dropped and the errors of the rest are ignored, so that whatever failed the sync is what
+            gets raised. every file is written atomically on its own, so the ones that were written are kept
+        '''
+
+        if self.closed:
+            return
+        self.closed = True
+
+        try:
+            while succeeded and self.pending_future_deque:
+                self._collect_future(self.pending_future_deque.popleft())
+        finally:
+            for iter_future in self.pending_future_deque:
+                iter_future.cancel()
+            self.executor.shutdown(wait=True)
+
+        if not succeeded:
+            logger.warning("stopped writing files since the sync failed")
+            return
+
+        logger.info("wrote `%s` files, `%s` files were unchanged", self.files_written, self.files_unchanged)
+
+class DedupProblemFileWriter(ProblemFileWriter):
+    ''' writes the same problem folders as ProblemFileWriter, but files whose contents are byte for byte identical
+    are only stored (and written) once: the first one is written like any other file, and the rest are hardlinked
+    to it
+
+    files are looked up by the sha256 of their contents, and only the ones that turn out to be shared get linked,
+    so every other file is a plain file just like the directory writer writes. shared files are made read only,
+    since editing one of them in place would change all of them, but replacing one (which is always a rename over
+    it) leaves the others alone. files with the same contents that an earlier run wrote as copies get linked too.
+    if the filesystem can't hardlink, the files are written as plain copies instead
+
+    only the files written during this run are looked up, so with `--incremental` a file can't be linked to a file
+    of a problem that didn't change
+    '''
+
+    def __init__(self, output_folder:pathlib.Path, overwrite:bool, max_workers:int,
+            sync_metrics:typing.Optional[metrics.SyncMetrics]=None):
+        '''
+        constructor
+
+        @param output_folder the folder the problem folders get written to
+        @param overwrite whether we are allowed to replace an existing file whose contents differ
+        @param max_workers how many threads to write files with
+        @param sync_metrics the SyncMetrics to record the file counts and write latency in, if any
+        '''
+
+        super().__init__(output_folder, overwrite=overwrite, max_workers=max_workers, sync_metrics=sync_metrics)
+
+        # sha256 digest -> a tuple of the path of the first file queued up with those contents (that the rest get
+        # linked to), and the Future of writing it
+        self.digest_to_file_path_dict = dict()
+
+        # file path -> the sha256 digest of what was last queued up for it, so a path that gets something else
+        # written to it stops being linked to
+        self.file_path_to_digest_dict = dict()
+
+        # set (from whichever thread finds out first) once the filesystem turns out not to support hardlinks
+        self.hardlinks_unsupported = False
+
+        self.shared_file_mode = self.new_file_mode & 0o444
+
+    def _queue_write(self, file_path:pathlib.Path, file_bytes:bytes,
+            existing_file_size:typing.Optional[int]) -> concurrent.futures.Future:
+        '''
+        submits the write of a single file to the thread pool, as a hardlink to a file queued up earlier with the
+        same contents if there is one
+
+        @param file_path the path of the file to write
+        @param file_bytes the contents of the file
+        @param existing_file_size the size of the existing file according to the index, or None if it doesn't exist
+        @return the Future of the write, which returns a tuple of whether the file was written and how many bytes
+            that took
+        '''
+
+        file_digest = hashlib.sha256(file_bytes).digest()
+
+        # whatever was queued up for this path before is about to be replaced, so nothing can link to it anymore
+        previous_digest = self.file_path_to_digest_dict.get(file_path)
+        if previous_digest is not None and self.digest_to_file_path_dict.get(previous_digest, (None,))[0] == file_path:
+            del self.digest_to_file_path_dict[previous_digest]
+
+        self.file_path_to_digest_dict[file_path] = file_digest
+
+        link_source = self.digest_to_file_path_dict.get(file_digest)
+        if link_source is None:
+            write_future = super()._queue_write(file_path, file_bytes, existing_file_size)
+            self.digest_to_file_path_dict[file_digest] = (file_path, write_future)
+            return write_future
+
+        link_source_path, source_future = link_source
+
+        # the file we link to has to be written first, and any write queued up after this one for either path
+        # has to wait for the link. they were all queued up before this one, so waiting on them can't deadlock
+        link_future = self.executor.submit(self._link_file_in_worker, link_source_path, file_path, file_bytes,
+            existing_file_size, source_future,
+            [x for x in (self.path_future_dict.get(link_source_path), self.path_future_dict.get(file_path)) if x])
+        self.path_future_dict[link_source_path] = link_future
+
+        return link_future
+
+    def _link_file_in_worker(self, link_source_path:pathlib.Path, file_path:pathlib.Path, file_bytes:bytes,
+            existing_file_size:typing.Optional[int], source_future:concurrent.futures.Future,
+            previous_future_list:typing.List[concurrent.futures.Future]) -> typing.Tuple[bool, int]:
+        '''
+        what runs on the thread pool, calls _link_file_if_changed() and records how long it took
+
+        @param source_future the Future of writing `link_source_path` with these contents
+        @param previous_future_list the Futures of the earlier writes to either path, which have to finish first
+        @return a tuple of what _link_file_if_changed() returned, and how many bytes it wrote (0 for a hardlink)
+        '''
+
+        concurrent.futures.wait([source_future] + previous_future_list)
+
+        start_time = time.perf_counter()
+        try:
+            # if the file we would link to couldn't be written, it doesn't have these contents, the error itself
+            # gets raised when its own Future is collected
+            if source_future.exception() is not None:
+                return self._write_file_if_changed(file_path, file_bytes, existing_file_size), len(file_bytes)
+
+            return self._link_file_if_changed(link_source_path, file_path, file_bytes, existing_file_size)
+        finally:
+            if self.sync_metrics:
+                self.sync_metrics.observe(metrics.STAGE_WRITE_FILE, time.perf_counter() - start_time)
+
+    def _link_file_if_changed(self, link_source_path:pathlib.Path, file_path:pathlib.Path, file_bytes:bytes,
+            existing_file_size:typing.Optional[int]) -> typing.Tuple[bool, int]:
+        '''
+        hardlinks the file to a file with the same contents atomically, unless it already is
+
+        @param link_source_path the file with the same contents to link to
+        @param file_path the path of the file to write
+        @param file_bytes the contents of the file
+        @param existing_file_size the size of the existing file according to the index, or None if it doesn't exist
+        @return a tuple of whether the file was written, and how many bytes that took
+        '''
+
+        if existing_file_size is not None:
+
+            # a copy with the same contents is replaced by a link without needing --overwrite
+            same_contents = False
+            if existing_file_size == len(file_bytes):
+                with open(file_path, "rb") as f:
+                    same_contents = hashlib.sha256(f.read()).digest() == hashlib.sha256(file_bytes).digest()
+
+            if same_contents:
+                if self.hardlinks_unsupported or os.stat(file_path).st_ino == os.stat(link_source_path).st_ino:
+                    logger.debug("------ file `%s` is unchanged, skipping", file_path)
+                    return False, 0
+
+            elif not self.overwrite:
+                raise Exception(f"the file `{file_path}` already exists and --overwrite was not provided, not writing over an existing file")
+
+        if self.hardlinks_unsupported:
+            return self._write_file_if_changed(file_path, file_bytes, None), len(file_bytes)
+
+        tmp_path = file_path.parent / f".{file_path.name}.{os.urandom(4).hex()}.tmp"
+        try:
+            os.link(link_source_path, tmp_path)
+        except OSError as e:
+
+            # anything else (like the file we link to being gone) is a real error
+            if e.errno not in (errno.EXDEV, errno.EPERM, errno.ENOTSUP, errno.EOPNOTSUPP, errno.EMLINK):
+                raise e
+
+            # the file we link to just has as many links as the filesystem allows, the next one might not
+            if e.errno != errno.EMLINK and not self.hardlinks_unsupported:
+                self.hardlinks_unsupported = True
+                logger.warning("couldn't hardlink `%s` to `%s`, writing copies instead: `%s`", file_path, link_source_path, e)
+
+            return self._write_file_if_changed(file_path, file_bytes, None), len(file_bytes)
+
+        try:
+            # this changes the mode of every file linked to these contents, the file we link to included
+            os.chmod(tmp_path, self.shared_file_mode)
+            os.replace(tmp_path, file_path)
+        except Exception as e:
+            os.unlink(tmp_path)
+            raise e
+
+        logger.debug("------ linked file `%s` to `%s`", file_path, link_source_path)
+        return True, 0
+
+class SingleWriterProblemFileWriter(abc.ABC):
+    ''' base class for the writers that put every problem file into one output file, rather than a file per problem
+    per language
+
+    the files are handed to a single background thread in the order they were given to write_file(), which streams
+    them into the output, so compressing / inserting overlaps with downloading. subclasses implement
+    _open(), _add_file() and _finish()
+    '''
+
+    def __init__(self, output_path:pathlib.Path, overwrite:bool,
+            sync_metrics:typing.Optional[metrics.SyncMetrics]=None):
+        '''
+        constructor
+
+        @param output_path the path of the file that every problem file gets written into
+        @param overwrite whether we are allowed to replace an existing file (or an existing entry in it)
+        @param sync_metrics the SyncMetrics to record the file counts and write latency in, if any
+        '''
+
+        self.output_path = output_path
+        self.overwrite = overwrite
+        self.sync_metrics = sync_metrics
+
+        self.files_written = 0
+        self.files_unchanged = 0
+        self.closed = False
+
+        self._open()
+
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="write")
+        self.pending_future_deque = collections.deque()
+
+        logger.info("writing every problem file into `%s`", self.output_path)
+
+    @abc.abstractmethod
+    def _open(self):
+        '''
+        opens the output, called from the constructor
+        '''
+
+    @abc.abstractmethod
+    def _add_file(self, path_in_output:str, file_bytes:bytes) -> bool:
+        '''
+        adds a single file to the output, only ever called from the writer thread
+
+        @param path_in_output the `<problem folder>/<file name>` path of the file
+        @param file_bytes the contents of the file
+        @return True if the file was written, False if it was unchanged
+        '''
+
+    @abc.abstractmethod
+    def _finish(self, succeeded:bool):
+        '''
+        finishes the output, only ever called from the writer thread after every file was added
+
+        @param succeeded whether every file was added, if not then whatever got written should be thrown away
+            where that is possible
+        '''
+
+    def write_file(self, folder_name:str, file_name:str, file_contents:str):
+        '''
+        queues up a file to be written
+
+        any error from writing the file is raised from a later write_file() call or from close()
+
+        @param folder_name the name of the problem folder
+        @param file_name the name of the file in the problem folder
+        @param file_contents the contents of the file
+        '''
+
+        file_bytes = encode_file_contents(file_contents)
+
+        self.pending_future_deque.append(self.executor.submit(
+            self._add_file_in_worker, f"{folder_name}/{file_name}", file_bytes))
+
+        # don't let the queue of files to write grow without bound
+        while len(self.pending_future_deque) > constants.OUTPUT_ARCHIVE_PENDING_FILES:
+            self._collect_future(self.pending_future_deque.popleft())
+
+    def _add_file_in_worker(self, path_in_output:str, file_bytes:bytes) -> typing.Tuple[bool, int]:
+        '''
+        what runs on the writer thread, calls _add_file() and records how long it took
+
+        @return a tuple of what _add_file() returned, and the size of the file
+        '''
+
+        start_time = time.perf_counter()
+        try:
+            return self._add_file(path_in_output, file_bytes), len(file_bytes)
+        finally:
+            if self.sync_metrics:
+                self.sync_metrics.observe(metrics.STAGE_WRITE_FILE, time.perf_counter() - start_time)
+
+    # the bookkeeping is the same as it is for the directory writer
+    _collect_future = ProblemFileWriter._collect_future
+
+    def close(self, succeeded:bool=True):
+        '''
+        waits for every queued file to be written and then finishes the output, raising the first error that happened
+
+        calling this more than once does nothing
+
+        @param succeeded whether the sync succeeded, if it didn't then the queued files are thrown away and the
+            output is abandoned rather than finished, so a failed sync never replaces a complete archive
+        '''
+
+        if self.closed:
+            return
+        self.closed = True
+
+        every_file_added = False
+        try:
+            if succeeded:
+                while self.pending_future_deque:
+                    self._collect_future(self.pending_future_deque.popleft())
+                every_file_added = True
+        finally:
+            for iter_future in self.pending_future_deque:
+                iter_future.cancel()
+
+            try:
+                self.executor.submit(self._finish, every_file_added).result()
+            finally:
+                self.executor.shutdown(wait=True)
+
+        if not every_file_added:
+            logger.warning("abandoned writing `%s`", self.output_path)
+            return
+
+        logger.info("wrote `%s` files into `%s`, `%s` files were unchanged",
+            self.files_written, self.output_path, self.files_unchanged)
+
+class ArchiveProblemFileWriter(SingleWriterProblemFileWriter):
+    ''' base class for the writers that stream every problem file into a brand new archive, which is written to a
+    temporary file and renamed over `output_path` once it is complete
+
+    the archive is rebuilt from scratch every run, so every file counts as written. if two files end up with the
+    same path, the first one is kept (and if --overwrite wasn't provided it is an error, like it would be for
+    the directory writer)
+    '''
+
+    def _open(self):
+
+        if self.output_path.exists() and not self.overwrite:
+            raise Exception(f"the file `{self.output_path}` already exists and --overwrite was not provided, not writing over an existing file")
+
+        # os.umask() can only be read by setting it, so do it now rather than in the writer thread
+        current_umask = os.umask(0)
+        os.umask(current_umask)
+        self.new_file_mode = 0o666 & ~current_umask
+
+        tmp_fd, self.tmp_path = tempfile.mkstemp(dir=self.output_path.parent, prefix=f".{self.output_path.name}.", suffix=".tmp")
+        self.tmp_file = os.fdopen(tmp_fd, "wb")
+
+        # the paths we have added so far
+        self.path_set = set()
+
+        # every file in the archive gets the same modified time
+        self.file_mtime = time.time()
+
+        try:
+            self._open_archive(self.tmp_file)
+        except Exception as e:
+            self.tmp_file.close()
+            os.unlink(self.tmp_path)
+            raise e
+
+    @abc.abstractmethod
+    def _open_archive(self, fileobj:typing.BinaryIO):
+        '''
+        opens the archive for streaming writes
+
+        @param fileobj the temporary file to write the archive into
+        '''
+
+    @abc.abstractmethod
+    def _add_archive_member(self, path_in_output:str, file_bytes:bytes):
+        '''
+        adds a single file to the archive
+
+        @param path_in_output the `<problem folder>/<file name>` path of the file
+        @param file_bytes the contents of the file
+        '''
+
+    @abc.abstractmethod
+    def _close_archive(self):
+        '''
+        writes out whatever the archive format needs at the end, the temporary file gets closed afterwards
+        '''
+
+    def _add_file(self, path_in_output:str, file_bytes:bytes) -> bool:
+
+        if path_in_output in self.path_set:
+            if not self.overwrite:
+                raise Exception(f"the file `{path_in_output}` was already written to `{self.output_path}` and --overwrite was not provided")
+
+            logger.warning("the file `%s` was already written to `%s`, keeping the first one", path_in_output, self.output_path)
+            return False
+
+        self.path_set.add(path_in_output)
+        self._add_archive_member(path_in_output, file_bytes)
+        return True
+
+    def _finish(self, succeeded:bool):
+
+        if not succeeded:
+            self._abandon()
+            return
+
+        try:
+            self._close_archive()
+            self.tmp_file.close()
+        except Exception as e:
+            self._abandon()
+            raise e
+
+        os.chmod(self.tmp_path, self.new_file_mode)
+        os.replace(self.tmp_path, self.output_path)
+
+    def _abandon(self):
+        '''
+        throws away the temporary file, so a half written archive is never left lying around
+        '''
+
+        # the archive objects want to write their trailers when they get garbage collected, so let them do
+        # it now while the file is still open, it is getting deleted anyway
+        try:
+            self._close_archive()
+        except Exception:
+            logger.debug("failed to close the abandoned archive `%s`", self.tmp_path, exc_info=True)
+
+        self.tmp_file.close()
+        os.unlink(self.tmp_path)
+
+class ZipProblemFileWriter(ArchiveProblemFileWriter):
+    ''' writes every problem file into a single deflate compressed zip file
+    '''
+
+    def _open_archive(self, fileobj:typing.BinaryIO):
+
+        self.zip_file = zipfile.ZipFile(fileobj, "w",
+            compression=zipfile.ZIP_DEFLATED,
+            compresslevel=constants.OUTPUT_ZIP_COMPRESSION_LEVEL)
+
+        self.zip_date_time = time.localtime(self.file_mtime)[:6]
+
+    def _add_archive_member(self, path_in_output:str, file_bytes:bytes):
+
+        zip_info = zipfile.ZipInfo(path_in_output, date_time=self.zip_date_time)
+        zip_info.compress_type = zipfile.ZIP_DEFLATED
+        zip_info.external_attr = 0o644 << 16
+        self.zip_file.writestr(zip_info, file_bytes, compresslevel=constants.OUTPUT_ZIP_COMPRESSION_LEVEL)
+
+    def _close_archive(self):
+        self.zip_file.close()
+
+class TarZstProblemFileWriter(ArchiveProblemFileWriter):
+    ''' writes every problem file into a single zstandard compressed tar file
+
+    NOTE: this needs the optional `zstandard` package
+    '''
+
+    def _open_archive(self, fileobj:typing.BinaryIO):
+
+        try:
+            import zstandard
+        except ImportError:
+            raise Exception(f"the `zstandard` package is needed for --output-format {constants.OUTPUT_FORMAT_TAR_ZST}, "
+                + "install it with `pip install zstandard`")
+
+        self.zstd_writer = zstandard.ZstdCompressor(level=constants.OUTPUT_ZSTD_COMPRESSION_LEVEL).stream_writer(
+            fileobj, closefd=False)
+
+        # `w|` is the streaming mode, it never seeks
+        self.tar_file = tarfile.open(fileobj=self.zstd_writer, mode="w|", format=tarfile.PAX_FORMAT)
+
+    def _add_archive_member(self, path_in_output:str, file_bytes:bytes):
+
+        tar_info = tarfile.TarInfo(path_in_output)
+        tar_info.size = len(file_bytes)
+        tar_info.mtime = self.file_mtime
+        tar_info.mode = 0o644
+        self.tar_file.addfile(tar_info, io.BytesIO(file_bytes))
+
+    def _close_archive(self):
+        self.tar_file.close()
+        self.zstd_writer.close()
+
+class SqliteProblemFileWriter(SingleWriterProblemFileWriter):
+    ''' writes every problem file as a row in a single sqlite database
+
+    unlike the archives, the database is updated in place, so rows that are unchanged are left alone
+    (which is also why `--incremental` works with it)
+    '''
+
+    def _open(self):
+
+        # only the writer thread uses the connection after this
+        self.connection = sqlite3.connect(str(self.output_path), check_same_thread=False)
+        self.connection.execute('''CREATE TABLE IF NOT EXISTS problem_files (
+            folder_name TEXT NOT NULL,
+            file_name TEXT NOT NULL,
+            contents BLOB NOT NULL,
+            modified REAL NOT NULL,
+            PRIMARY KEY (folder_name, file_name))''')
+        self.connection.commit()
+
+        self.uncommitted_count = 0
+
+    def _add_file(self, path_in_output:str, file_bytes:bytes) -> bool:
+
+        folder_name, file_name = path_in_output.rsplit("/", 1)
+
+        row = self.connection.execute("SELECT contents FROM problem_files WHERE folder_name = ? AND file_name = ?",
+            (folder_name, file_name)).fetchone()
+
+        if row is not None:
+            if row[0] == file_bytes:
+                return False
+
+            if not self.overwrite:
+                raise Exception(f"the file `{path_in_output}` already exists in `{self.output_path}` and --overwrite was not provided, not writing over an existing file")
+
+        self.connection.execute("INSERT OR REPLACE INTO problem_files VALUES (?, ?, ?, ?)",
+            (folder_name, file_name, file_bytes, time.time()))
+
+        # committing every row would be a lot of fsyncs
+        self.uncommitted_count += 1
+        if self.uncommitted_count >= constants.OUTPUT_SQLITE_COMMIT_EVERY_FILES:
+            self.connection.commit()
+            self.uncommitted_count = 0
+
+        return True
+
+    def _finish(self, succeeded:bool):
+
+        try:
+            if succeeded:
+                self.connection.commit()
+            else:
+                self.connection.rollback()
+        finally:
+            self.connection.close()
+
+def get_output_archive_path(output_format:str, output_folder:pathlib.Path) -> pathlib.Path:
+    ''' returns the path of the single file that an archive `--output-format` writes to
+
+    @param output_format one of the OUTPUT_FORMAT_* constants, other than directory
+    @param output_folder the --path-to-save-to folder
+    @return the path
+    '''
+
+    return output_folder / f"{constants.OUTPUT_ARCHIVE_BASENAME}.{output_format}"
+
+def make_problem_file_writer(output_format:str, output_folder:pathlib.Path, overwrite:bool, max_workers:int,
+        sync_metrics:typing.Optional[metrics.SyncMetrics]=None):
+    ''' creates the writer for the given `--output-format`
+
+    @param output_format one of the OUTPUT_FORMAT_* constants
+    @param output_folder the folder the problem folders (or the archive) get written to
+    @param overwrite whether we are allowed to replace existing files
+    @param max_workers how many threads to write files with, only the directory and dedup writers use more than one
+    @param sync_metrics the SyncMetrics to record the file counts and write latency in, if any
+    @return a ProblemFileWriter (or a DedupProblemFileWriter), or one of the SingleWriterProblemFileWriter subclasses
+    '''
+
+    if output_format == constants.OUTPUT_FORMAT_DIRECTORY:
+        return ProblemFileWriter(output_folder, overwrite=overwrite, max_workers=max_workers, sync_metrics=sync_metrics)
+
+    if output_format == constants.OUTPUT_FORMAT_DEDUP:
+        return DedupProblemFileWriter(output_folder, overwrite=overwrite, max_workers=max_workers, sync_metrics=sync_metrics)
+
+    writer_class_dict = {
+        constants.OUTPUT_FORMAT_ZIP: ZipProblemFileWriter,
+        constants.OUTPUT_FORMAT_TAR_ZST: TarZstProblemFileWriter,
+        constants.OUTPUT_FORMAT_SQLITE: SqliteProblemFileWriter,
+    }
+
+    writer_class = writer_class_dict.get(output_format)
+    if writer_class is None:
+        raise Exception(f"unknown output format `{output_format}`, expected one of `{constants.OUTPUT_FORMAT_CHOICES}`")
+
+    return writer_class(get_output_archive_path(output_format, output_folder), overwrite=overwrite, sync_metrics=sync_metrics)
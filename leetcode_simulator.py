@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+
+# library imports
+import argparse
+import logging
+import sys
+
+from leetcode_dl import utils
+from leetcode_dl import simulator
+
+
+def run(parsed_args, root_logger):
+
+    logger = root_logger.getChild("main")
+
+    config = simulator.SimulatorConfig(
+        problem_count=parsed_args.problem_count,
+        latency_seconds=parsed_args.latency,
+        latency_jitter_seconds=parsed_args.latency_jitter,
+        error_rate=parsed_args.error_rate,
+        reset_rate=parsed_args.reset_rate,
+        retry_after_seconds=parsed_args.retry_after,
+        seed=parsed_args.seed)
+
+    server = simulator.LeetcodeSimulatorServer((parsed_args.host, parsed_args.port), config)
+
+    logger.info("leetcode simulator listening on `%s` with `%s` problems, point dl_leetcode_problems.py at it with `--base-url %s`",
+        server.base_url, len(server.catalogue.slug_to_problem_dict), server.base_url)
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("stopping, stats: `%s`", server.stats.as_dict())
+    finally:
+        server.server_close()
+
+
+
+if __name__ == "__main__":
+    # if we are being run as a real program
+
+    parser = argparse.ArgumentParser(
+        description="runs a local stand-in for leetcode.com, for load and fault injection testing of dl_leetcode_problems.py",
+        epilog="Copyright 2019-09-10 Mark Grandi",
+        fromfile_prefix_chars='@')
+
+    # set up logging stuff
+    logging.captureWarnings(True) # capture warnings with the logging infrastructure
+    root_logger = logging.getLogger()
+    logging_formatter = utils.ArrowLoggingFormatter("%(asctime)s %(threadName)-10s %(name)-10s %(levelname)-8s: %(message)s")
+    logging_handler = logging.StreamHandler(sys.stdout)
+    logging_handler.setFormatter(logging_formatter)
+    root_logger.addHandler(logging_handler)
+
+    parser.add_argument("--host", type=str, default="127.0.0.1", help="the address to listen on")
+    parser.add_argument("--port", type=int, default=8000, help="the port to listen on")
+    parser.add_argument("--problem-count", dest="problem_count", type=int,
+        help="generate a synthetic catalogue with this many problems, rather than serving the captured one")
+    parser.add_argument("--latency", type=float, default=0.0, help="how many seconds every request takes")
+    parser.add_argument("--latency-jitter", dest="latency_jitter", type=float, default=0.0,
+        help="up to this many extra seconds get randomly added to every request")
+    parser.add_argument("--error-rate", dest="error_rate", type=float, default=0.0,
+        help="the fraction of requests (0 to 1) that get a 429 or 5xx response")
+    parser.add_argument("--reset-rate", dest="reset_rate", type=float, default=0.0,
+        help="the fraction of requests (0 to 1) that get their connection reset")
+    parser.add_argument("--retry-after", dest="retry_after", type=float, default=1.0,
+        help="the Retry-After value in seconds to send with 429 responses")
+    parser.add_argument("--seed", type=int, help="seed for the random number generator, so runs are repeatable")
+    parser.add_argument("--verbose", action="store_true", help="Increase logging verbosity")
+
+    try:
+        parsed_args = parser.parse_args()
+
+        root_logger.setLevel("DEBUG" if parsed_args.verbose else "INFO")
+
+        run(parsed_args, root_logger)
+
+    except Exception as e:
+        root_logger.exception("Something went wrong!")
+        sys.exit(1)